@@ -0,0 +1,155 @@
+"""Compares servers running the same app.
+
+Each installed server is started in turn and loaded with wrk if it is
+on PATH, otherwise with a simple keep-alive asyncio client, which is
+itself a bottleneck and only good for a rough comparison.
+
+    cd examples/benchmark && python bench.py --duration 10
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import time
+import typing
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+SERVERS: typing.Dict[str, typing.Tuple[str, typing.List[str]]] = {
+    "slickpy": (
+        "slickpy",
+        [sys.executable, "-m", "slickpy.server", "bench_app:main"],
+    ),
+    "uvicorn": (
+        "uvicorn",
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "bench_app:main",
+            "--no-access-log",
+            "--log-level",
+            "warning",
+        ],
+    ),
+    "hypercorn": (
+        "hypercorn",
+        [sys.executable, "-m", "hypercorn", "bench_app:main", "-b"],
+    ),
+}
+
+
+def command(name: str, port: int) -> typing.List[str]:
+    args = list(SERVERS[name][1])
+    if name == "hypercorn":
+        args.append(f"{HOST}:{port}")
+    else:
+        args += ["--host", HOST, "--port", str(port)]
+    return args
+
+
+async def wait_ready(port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(HOST, port)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+        else:
+            writer.close()
+            return
+
+
+async def client(
+    port: int, path: str, deadline: float, latencies: typing.List[float]
+) -> None:
+    reader, writer = await asyncio.open_connection(HOST, port)
+    request = f"GET {path} HTTP/1.1\r\nHost: {HOST}\r\n\r\n".encode()
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        writer.write(request)
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = 0
+        for line in head.split(b"\r\n"):
+            if line.lower().startswith(b"content-length:"):
+                length = int(line[15:])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - started)
+    writer.close()
+
+
+async def load(port: int, path: str, connections: int, duration: float) -> str:
+    latencies: typing.List[float] = []
+    deadline = time.monotonic() + duration
+    await asyncio.gather(
+        *[client(port, path, deadline, latencies) for _ in range(connections)]
+    )
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    return f"{len(latencies) / duration:10.0f} req/s   p99 {p99:.2f}ms"
+
+
+def wrk(port: int, path: str, connections: int, duration: float) -> str:
+    out = subprocess.run(
+        [
+            "wrk",
+            "--latency",
+            f"-c{connections}",
+            f"-d{duration:.0f}s",
+            f"http://{HOST}:{port}{path}",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    rps = [line for line in out.splitlines() if "Requests/sec" in line]
+    p99 = [line for line in out.splitlines() if line.strip().startswith("99%")]
+    return " ".join(rps + p99)
+
+
+def bench(name: str, args: argparse.Namespace) -> None:
+    port = PORT
+    p = subprocess.Popen(
+        command(name, port),
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        asyncio.run(wait_ready(port))
+        for path in args.paths:
+            if shutil.which("wrk"):
+                result = wrk(port, path, args.connections, args.duration)
+            else:
+                result = asyncio.run(
+                    load(port, path, args.connections, args.duration)
+                )
+            print(f"{name:10} {path:8} {result}")
+    finally:
+        p.terminate()
+        p.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("servers", nargs="*", default=list(SERVERS))
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--paths", nargs="+", default=["/", "/json"])
+    args = parser.parse_args()
+    for name in args.servers:
+        if importlib.util.find_spec(SERVERS[name][0]) is None:
+            print(f"{name:10} not installed, skipped")
+            continue
+        bench(name, args)
+
+
+if __name__ == "__main__":
+    main()
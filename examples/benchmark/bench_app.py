@@ -0,0 +1,18 @@
+from slickpy import App, Writer
+from slickpy.response import JSONResponse
+
+app = App()
+
+
+@app.route("/")
+async def welcome(w: Writer) -> None:
+    await w.end(b"Hello, world!")
+
+
+@app.route("/json")
+async def json() -> JSONResponse:
+    return JSONResponse({"message": "Hello, world!"})
+
+
+# python -m slickpy.server bench_app:main
+main = app.asgi()
@@ -0,0 +1,22 @@
+import unittest
+
+from slickpy.functional import ASGIClient
+
+from bench_app import main  # noqa: I100, isort: skip
+
+
+class AppTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = ASGIClient(main)
+
+    def test_welcome(self):
+        res = self.client.go("/")
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.text, "Hello, world!")
+
+    def test_json(self):
+        res = self.client.go("/json")
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.text, '{"message":"Hello, world!"}')
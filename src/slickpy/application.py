@@ -1,9 +1,14 @@
+import asyncio
 import inspect
 import typing
+from operator import attrgetter
 
+from slickpy.drain import InFlight
 from slickpy.lifespan import Lifespan
+from slickpy.metrics import Metrics
 from slickpy.middleware.routing import RoutingMiddleware
 from slickpy.request import Request
+from slickpy.resource import Resource, ResourceFactory
 from slickpy.response import (
     BinaryResponse,
     JSONResponse,
@@ -12,17 +17,36 @@ from slickpy.response import (
     Writer,
 )
 from slickpy.router import Router
+from slickpy.scheduler import Job, JobCallable, Scheduler
+from slickpy.schema import (
+    HEADER,
+    MISSING,
+    QUERY,
+    ValidationError,
+    compile_model,
+    compile_value,
+    is_model,
+)
+from slickpy.tasks import TaskQueue
 from slickpy.typing import (
     ASGIAdapter,
     ASGICallable,
     AnyAsyncCallable,
+    HTTPError,
     HTTPMethods,
+    Headers,
     LifespanSubscriber,
+    Message,
     Middleware,
     Receive,
+    RequestOptions,
     Scope,
     Send,
+    default_options,
 )
+from slickpy.warmup import Warmup, WarmupRequest
+
+T = typing.TypeVar("T")
 
 asgi_adapters: typing.List[ASGIAdapter] = []
 
@@ -32,12 +56,27 @@ def register_asgi_adapter(fn: ASGIAdapter) -> None:
 
 
 class App(object):
-    def __init__(self) -> None:
+    def __init__(self, **options: typing.Any) -> None:
+        self.options = (
+            default_options.replace(**options) if options else default_options
+        )
         self.router = Router()
-        self.lifespan = Lifespan()
+        self.metrics = Metrics()
+        self.inflight = InFlight(self.metrics)
+        self.lifespan = Lifespan(self.inflight)
+        self.tasks = TaskQueue(self.metrics)
         self.entry: ASGICallable = RoutingMiddleware(
-            self.router, self.lifespan
+            self.router, self.lifespan, self.tasks, self.inflight
         )
+        # shutdown subscribers with ones they run after, background
+        # tasks are drained and jobs are stopped before any of them, a
+        # resource is released after its dependents
+        self.shutdowns: typing.Dict[
+            LifespanSubscriber, typing.List[LifespanSubscriber]
+        ] = {}
+        self.lifespan.add("lifespan.shutdown", self.tasks.drain)
+        self.scheduler = Scheduler()
+        self.warmups = Warmup(self.metrics)
 
     def middleware(self, m: Middleware) -> None:
         self.entry = m(self.entry)
@@ -47,11 +86,26 @@ class App(object):
         pattern: str,
         *,
         methods: HTTPMethods = ("GET", "HEAD"),
+        **options: typing.Any,
     ) -> typing.Callable[[AnyAsyncCallable], None]:
+        route_options = (
+            self.options.replace(**options) if options else self.options
+        )
+
         def decorator(handler: AnyAsyncCallable) -> None:
             for asgi_adapter in asgi_adapters:
                 asgi_callable = asgi_adapter(handler)
                 if asgi_callable:
+                    if route_options.on_disconnect:
+                        asgi_callable = disconnect_adapter(
+                            asgi_callable,
+                            route_options.on_disconnect,
+                            self.metrics,
+                        )
+                    if route_options is not default_options:
+                        asgi_callable = options_adapter(
+                            asgi_callable, route_options
+                        )
                     self.router.add(pattern, asgi_callable, methods=methods)
                     break
             else:
@@ -61,12 +115,142 @@ class App(object):
 
         return decorator
 
-    def on(self, event: str) -> typing.Callable[[LifespanSubscriber], None]:
-        def decorator(subscriber: LifespanSubscriber) -> None:
-            self.lifespan.add(event, subscriber)
+    def on(
+        self,
+        event: str,
+        *,
+        after: typing.Sequence[LifespanSubscriber] = (),
+        timeout: typing.Optional[float] = None,
+    ) -> typing.Callable[[LifespanSubscriber], LifespanSubscriber]:
+        """Subscribes to lifespan event.
+
+        Subscribers run concurrently, one with after runs once those
+        complete. Shutdown subscribers run once background tasks are
+        drained and jobs are stopped, resources are released in reverse
+        order of their startup.
+        """
+
+        def decorator(subscriber: LifespanSubscriber) -> LifespanSubscriber:
+            if event == "lifespan.shutdown":
+                self.add_shutdown(subscriber, after, timeout)
+            else:
+                self.lifespan.add(event, subscriber, after, timeout)
+            return subscriber
 
         return decorator
 
+    def resource(
+        self,
+        *,
+        after: typing.Sequence[Resource[typing.Any]] = (),
+        timeout: typing.Optional[float] = None,
+    ) -> typing.Callable[[ResourceFactory[T]], Resource[T]]:
+        """Registers app scoped resource created at lifespan startup.
+
+        Inject it as handler parameter default ``db: Pool = db.inject()``.
+        """
+
+        def decorator(factory: ResourceFactory[T]) -> Resource[T]:
+            r = Resource(factory.__name__, factory)
+
+            async def startup() -> None:
+                await r.start(self.lifespan.state)
+
+            async def shutdown() -> None:
+                await r.stop()
+
+            startup.__qualname__ = shutdown.__qualname__ = f"resource {r.name}"
+            r.startup = startup
+            r.shutdown = shutdown
+            self.lifespan.add(
+                "lifespan.startup",
+                startup,
+                [d.startup for d in after],
+                timeout,
+            )
+            self.add_shutdown(shutdown, (), timeout)
+            for d in after:
+                dependents = self.shutdowns.get(d.shutdown)
+                if dependents is not None:
+                    dependents.append(shutdown)
+            return r
+
+        return decorator
+
+    def add_shutdown(
+        self,
+        subscriber: LifespanSubscriber,
+        after: typing.Sequence[LifespanSubscriber],
+        timeout: typing.Optional[float],
+    ) -> None:
+        """Subscribes to shutdown after tasks are drained, jobs stopped."""
+        stop_after = [self.tasks.drain, *after]
+        if self.scheduler.jobs:
+            stop_after.append(self.scheduler.stop)
+        self.lifespan.add("lifespan.shutdown", subscriber, stop_after, timeout)
+        self.shutdowns[subscriber] = stop_after
+
+    def every(
+        self, seconds: float, *, jitter: float = 0.0, overlap: bool = False
+    ) -> typing.Callable[[JobCallable], JobCallable]:
+        """Runs the decorated function periodically.
+
+        Jobs start at lifespan startup complete and are cancelled at
+        shutdown, run times are observed in metrics.
+        """
+
+        def decorator(fn: JobCallable) -> JobCallable:
+            scheduler = self.scheduler
+            if not scheduler.jobs:
+                self.lifespan.add("lifespan.startup.complete", scheduler.start)
+                self.lifespan.add("lifespan.shutdown", scheduler.stop)
+                for stop_after in self.shutdowns.values():
+                    stop_after.append(scheduler.stop)
+            scheduler.add(Job(fn, seconds, jitter, overlap, self.metrics))
+            return fn
+
+        return decorator
+
+    def warmup(
+        self,
+        path: str,
+        *,
+        method: str = "GET",
+        headers: typing.Optional[Headers] = None,
+        body: typing.Optional[bytes] = None,
+        times: int = 1,
+    ) -> None:
+        """Adds a request replayed before startup complete is reported."""
+        if not self.warmups.requests:
+
+            async def warm_up() -> None:
+                await self.warmups.run(self.entry)
+
+            self.lifespan.add("lifespan.startup.complete", warm_up)
+        self.warmups.add(WarmupRequest(method, path, headers, body, times))
+
+    @property
+    def draining(self) -> bool:
+        return self.inflight.draining
+
+    def health(self, path: str = "/health") -> None:
+        """Adds a route that reports 503 once the app is draining.
+
+        The route is exempt from draining, so load balancers can take
+        the instance out of rotation while in-flight requests complete.
+        """
+        inflight = self.inflight
+
+        async def health() -> JSONResponse:
+            if inflight.draining:
+                return JSONResponse(
+                    {"status": "draining", "inflight": inflight.count}, 503
+                )
+            return JSONResponse({"status": "ok", "inflight": inflight.count})
+
+        self.route(path)(health)
+        inflight.exempt.add(path)
+
     def asgi(self) -> ASGICallable:
         return self.entry
 
@@ -81,16 +265,92 @@ NoReqRetRespCallable = typing.Callable[[], typing.Awaitable[Response]]
 ReqRetRespCallable = typing.Callable[[Request], typing.Awaitable[Response]]
 
 
+def options_adapter(
+    handler: ASGICallable, options: RequestOptions
+) -> ASGICallable:
+    async def asgi(scope: Scope, receive: Receive, send: Send) -> None:
+        scope["route_options"] = options
+        await handler(scope, receive, send)
+
+    return asgi
+
+
+def disconnect_adapter(
+    handler: ASGICallable, on_disconnect: str, metrics: Metrics
+) -> ASGICallable:
+    """Watches receive for http.disconnect while the handler runs.
+
+    On disconnect the handler is either cancelled or can check the
+    request.disconnected flag.
+    """
+    if on_disconnect not in ("cancel", "flag"):
+        raise ValueError(f"unknown on_disconnect mode '{on_disconnect}'")
+    cancel = on_disconnect == "cancel"
+
+    async def asgi(scope: Scope, receive: Receive, send: Send) -> None:
+        queue: "asyncio.Queue[Message]" = asyncio.Queue()
+        disconnected = scope["disconnected"] = asyncio.Event()
+        sent = asyncio.Event()
+        task = asyncio.ensure_future(
+            handler(scope, queue.get, send_and_flag(send, sent))
+        )
+
+        async def watch() -> None:
+            await pump_until_disconnect(receive, queue)
+            # servers send http.disconnect once the response completes
+            if sent.is_set() or task.done():
+                return
+            disconnected.set()
+            metrics.incr("requests_disconnected")
+            if cancel:
+                task.cancel()
+
+        watcher = asyncio.ensure_future(watch())
+        try:
+            await task
+        except asyncio.CancelledError:
+            if not (cancel and disconnected.is_set()):
+                raise
+            metrics.incr("handlers_cancelled")
+        finally:
+            watcher.cancel()
+
+    return asgi
+
+
+def send_and_flag(send: Send, sent: asyncio.Event) -> Send:
+    """Sets sent once the final response body is sent."""
+
+    async def wrapper(message: Message) -> None:
+        await send(message)
+        if message["type"] == "http.response.body" and not message.get(
+            "more_body", False
+        ):
+            sent.set()
+
+    return wrapper
+
+
+async def pump_until_disconnect(
+    receive: Receive, queue: "asyncio.Queue[Message]"
+) -> None:
+    while True:
+        message = await receive()
+        queue.put_nowait(message)
+        if message["type"] == "http.disconnect":
+            break
+
+
 def w_req_adapter(handler: WReqCallable) -> ASGICallable:
     async def asgi(scope: Scope, receive: Receive, send: Send) -> None:
-        await handler(Writer(send), Request(scope, receive))
+        await handler(Writer(send, scope), Request(scope, receive))
 
     return asgi
 
 
 def w_adapter(handler: WCallable) -> ASGICallable:
     async def asgi(scope: Scope, receive: Receive, send: Send) -> None:
-        await handler(Writer(send))
+        await handler(Writer(send, scope))
 
     return asgi
 
@@ -194,6 +454,108 @@ def strict_signatures() -> typing.List[
 signature_adapters.extend(strict_signatures())
 
 
+Resolver = typing.Tuple[bool, typing.Callable[[Request, Send], typing.Any]]
+
+# where parameters without a schema model are taken from, by name
+value_sources: typing.Dict[
+    typing.Any, typing.Callable[[Request], typing.Any]
+] = {
+    # exact match routes have no route params
+    None: lambda req: req.scope.get("route_params", {}),
+    QUERY: attrgetter("query_params"),
+    HEADER: attrgetter("headers"),
+}
+
+
+def param_resolver(
+    name: str, tp: typing.Any, default: typing.Any
+) -> typing.Optional[Resolver]:
+    if tp is Request:
+        return False, lambda req, send: req
+    if tp is Writer:
+        return False, lambda req, send: Writer(send, req.scope)
+    if isinstance(default, Resource):
+        return False, lambda req, send: default.value
+    if typing.get_origin(tp) is typing.Annotated:
+        tp, source = typing.get_args(tp)[:2]
+    else:
+        source = None
+    if is_model(tp):
+        return model_resolver(tp, source)
+    getter = value_sources.get(source)
+    if getter is None:
+        return None
+    key = name.replace("_", "-").encode() if source is HEADER else None
+    try:
+        load = compile_value(
+            name,
+            tp,
+            MISSING if default is inspect.Parameter.empty else default,
+            key,
+        )
+    except TypeError:
+        return None
+    return False, lambda req, send: load(getter(req))
+
+
+def model_resolver(tp: typing.Any, source: typing.Any) -> Resolver:
+    if source is QUERY:
+        load_query = compile_model(tp, query=True)
+        return False, lambda req, send: load_query(req.query_params)
+    load_body = compile_model(tp)
+
+    async def body(req: Request, send: Send) -> typing.Any:
+        try:
+            data = await req.json()
+        except ValueError:
+            raise HTTPError(400) from None
+        return load_body(data)
+
+    return True, body
+
+
+def params_adapter(
+    handler: AnyAsyncCallable,
+) -> typing.Optional[ASGICallable]:
+    """Adapts handler which parameters are resolved from the request.
+
+    Request and Writer are passed as is, resources by default value,
+    schema models are loaded from JSON body or query, other parameters
+    are taken by name from route params, query (Query[T]) or headers
+    (Header[T]) and converted to the annotated type. Responses are sent
+    unless a Writer is used.
+    """
+    hints = typing.get_type_hints(handler, include_extras=True)
+    resolvers: typing.List[Resolver] = []
+    for name, p in inspect.signature(handler).parameters.items():
+        resolver = param_resolver(name, hints.get(name), p.default)
+        if resolver is None:
+            return None
+        resolvers.append(resolver)
+    streams = Writer in hints.values()
+
+    async def asgi(scope: Scope, receive: Receive, send: Send) -> None:
+        req = Request(scope, receive)
+        args = []
+        errors: typing.Dict[str, str] = {}
+        for is_async, resolve in resolvers:
+            try:
+                args.append(
+                    (await resolve(req, send))
+                    if is_async
+                    else resolve(req, send)
+                )
+            except ValidationError as ex:
+                errors.update(ex.errors)
+        if errors:
+            raise ValidationError(errors)
+        res = await handler(*args)
+        if not streams:
+            await res(scope, receive, send)
+
+    return asgi
+
+
 @register_asgi_adapter
 def handler_adapter_by_signature(
     handler: AnyAsyncCallable,
@@ -202,4 +564,6 @@ def handler_adapter_by_signature(
     for signature, asgi_adapter in signature_adapters:
         if signature == s:
             return asgi_adapter(handler)
+    if s.parameters:
+        return params_adapter(handler)
     return None
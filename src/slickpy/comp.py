@@ -36,4 +36,26 @@ except ImportError:  # pragma: nocover
         raise AssertionError("The 'ujson' package must be installed.")
 
 
-__all__ = ("get_running_loop", "ujson_dumps", "ujson_loads")
+try:
+    from brotli import (
+        Decompressor as BrotliDecompressor,
+        error as BrotliError,
+    )
+except ImportError:  # pragma: nocover
+    BrotliDecompressor = None
+    BrotliError = None
+
+try:
+    import uvloop
+except ImportError:  # pragma: nocover
+    uvloop = None
+
+
+__all__ = (
+    "BrotliDecompressor",
+    "BrotliError",
+    "get_running_loop",
+    "ujson_dumps",
+    "ujson_loads",
+    "uvloop",
+)
@@ -0,0 +1,147 @@
+import typing
+import zlib
+
+from slickpy.comp import BrotliDecompressor, BrotliError
+from slickpy.typing import HTTPError
+
+# decompressed output is produced in pieces of at most this size
+BLOCK_SIZE = 64 * 1024
+# the compression ratio is not checked for small bodies
+RATIO_GRACE_SIZE = 1024 * 1024
+# brotli before 1.1 cannot limit output of a call, so br is refused
+BROTLI_SUPPORTED = hasattr(BrotliDecompressor, "can_accept_more_data")
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+# errors of corrupted data, answered with 400
+ERRORS: typing.Tuple[typing.Type[Exception], ...] = (zlib.error, ValueError)
+if BrotliError is not None:
+    ERRORS += (BrotliError,)
+
+
+class ZlibDecompressor(object):
+    def __init__(self, wbits: int) -> None:
+        self.wbits = wbits
+        self.d = zlib.decompressobj(wbits)
+        self.started = False
+
+    def decompress(self, data: bytes) -> typing.Iterator[bytes]:
+        if not self.started:
+            self.started = True
+            try:
+                out = self.d.decompress(data, BLOCK_SIZE)
+            except zlib.error:
+                if self.wbits != zlib.MAX_WBITS:
+                    raise
+                # some clients send raw deflate stream without zlib header
+                self.d = zlib.decompressobj(-zlib.MAX_WBITS)
+                out = self.d.decompress(data, BLOCK_SIZE)
+            yield out
+            data = self.next_input()
+        while data:
+            yield self.d.decompress(data, BLOCK_SIZE)
+            data = self.next_input()
+
+    def next_input(self) -> bytes:
+        d = self.d
+        if d.eof and d.unused_data and self.wbits == GZIP_WBITS:
+            # a gzip body may consist of several members
+            self.d = zlib.decompressobj(self.wbits)
+            return d.unused_data
+        return d.unconsumed_tail
+
+    def flush(self) -> bytes:
+        out = self.d.flush()
+        if self.started and not self.d.eof:
+            raise ValueError("truncated stream")
+        return out
+
+
+class BrotliStreamDecompressor(object):
+    def __init__(self) -> None:
+        self.d = BrotliDecompressor()
+        self.started = False
+
+    def decompress(self, data: bytes) -> typing.Iterator[bytes]:
+        self.started = True
+        d = self.d
+        out = d.process(data, output_buffer_limit=BLOCK_SIZE)
+        while out or not d.can_accept_more_data():
+            yield out
+            out = d.process(b"", output_buffer_limit=BLOCK_SIZE)
+
+    def flush(self) -> bytes:
+        if self.started and not self.d.is_finished():
+            raise ValueError("truncated stream")
+        return b""
+
+
+Decompressor = typing.Union["ZlibDecompressor", "BrotliStreamDecompressor"]
+
+
+def create_decompressor(encoding: bytes) -> Decompressor:
+    if encoding in (b"gzip", b"x-gzip"):
+        return ZlibDecompressor(16 + zlib.MAX_WBITS)
+    if encoding == b"deflate":
+        return ZlibDecompressor(zlib.MAX_WBITS)
+    if encoding == b"br" and BROTLI_SUPPORTED:
+        return BrotliStreamDecompressor()
+    raise HTTPError(415)
+
+
+def decompress_chunks(
+    chunks: typing.AsyncIterator[bytes],
+    content_encoding: bytes,
+    max_size: typing.Optional[int] = None,
+    max_ratio: typing.Optional[int] = None,
+) -> typing.AsyncIterator[bytes]:
+    """Decodes chunks per content encoding header, e.g. ``gzip, br``.
+
+    Raises HTTPError 415 for unsupported encoding, 400 for corrupted
+    data and 413 when decompressed size or ratio exceeds the limits.
+    """
+    for encoding in reversed(content_encoding.lower().split(b",")):
+        encoding = encoding.strip()
+        if encoding and encoding != b"identity":
+            chunks = decompress(
+                chunks, create_decompressor(encoding), max_size, max_ratio
+            )
+    return chunks
+
+
+async def decompress(
+    chunks: typing.AsyncIterator[bytes],
+    d: Decompressor,
+    max_size: typing.Optional[int],
+    max_ratio: typing.Optional[int],
+) -> typing.AsyncIterator[bytes]:
+    received = 0
+    size = 0
+    try:
+        async for chunk in chunks:
+            received += len(chunk)
+            for out in d.decompress(chunk):
+                size += len(out)
+                check_limits(size, received, max_size, max_ratio)
+                if out:
+                    yield out
+        out = d.flush()
+    except ERRORS as ex:
+        raise HTTPError(400) from ex
+    if out:
+        check_limits(size + len(out), received, max_size, max_ratio)
+        yield out
+
+
+def check_limits(
+    size: int,
+    received: int,
+    max_size: typing.Optional[int],
+    max_ratio: typing.Optional[int],
+) -> None:
+    if max_size is not None and size > max_size:
+        raise HTTPError(413)
+    if (
+        max_ratio is not None
+        and size > RATIO_GRACE_SIZE
+        and size > received * max_ratio
+    ):
+        raise HTTPError(413)
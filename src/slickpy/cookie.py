@@ -1,9 +1,33 @@
 import typing
-from http.cookies import _quote
+from functools import lru_cache
+from http.cookies import _quote, _unquote
 from time import gmtime, strftime
+from types import MappingProxyType
 
 _join = "".join
 
+empty_cookies: typing.Mapping[str, str] = MappingProxyType({})
+
+
+@lru_cache(maxsize=1024)
+def parse_cookie(header: bytes) -> typing.Mapping[str, str]:
+    """Parses a cookie request header per RFC 6265.
+
+    The result is read-only since it is shared by all requests that
+    send byte-identical cookie header.
+    """
+    cookies: typing.Dict[str, str] = {}
+    for pair in header.decode("latin-1").split(";"):
+        name, sep, value = pair.partition("=")
+        if not sep:
+            continue
+        name = name.strip()
+        # the user agent sends more specific cookies first
+        if not name or name in cookies:
+            continue
+        cookies[name] = _unquote(value.strip())
+    return MappingProxyType(cookies)
+
 
 def set_cookie(  # noqa: CFQ002
     name: str,
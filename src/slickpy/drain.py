@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import time
+import typing
+
+from slickpy.metrics import Metrics
+
+
+class InFlight(object):
+    """Counts requests and streams in flight.
+
+    Once draining, new work is refused and drain waits until in-flight
+    work completes or drain timeout passes. Exempt paths, e.g. health
+    checks, are neither refused nor counted.
+    """
+
+    def __init__(
+        self,
+        metrics: typing.Optional[Metrics] = None,
+        *,
+        drain_timeout: float = 30.0,
+    ) -> None:
+        self.logger = logging.getLogger("slickpy.drain")
+        self.metrics = Metrics() if metrics is None else metrics
+        self.drain_timeout = drain_timeout
+        self.count = 0
+        self.draining = False
+        self.exempt: typing.Set[str] = set()
+        self.idle: typing.Optional[asyncio.Event] = None
+
+    def enter(self) -> None:
+        self.count += 1
+
+    def exit(self) -> None:
+        self.count -= 1
+        if not self.count and self.idle is not None:
+            self.idle.set()
+
+    async def drain(self) -> bool:
+        """Stops admitting work, returns False if the deadline passed."""
+        self.draining = True
+        if not self.count:
+            return True
+        started = time.perf_counter()
+        self.idle = asyncio.Event()
+        try:
+            await asyncio.wait_for(self.idle.wait(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            self.metrics.incr("requests_abandoned", self.count)
+            self.logger.warning(
+                "drain timed out with %d in flight", self.count
+            )
+            return False
+        finally:
+            self.idle = None
+            self.metrics.observe("drain", time.perf_counter() - started)
+        return True
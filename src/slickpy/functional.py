@@ -2,7 +2,7 @@ import asyncio
 import typing
 from urllib.parse import unquote, urljoin, urlsplit
 
-from slickpy.typing import ASGICallable, Headers, Message
+from slickpy.typing import ASGICallable, Headers, Message, Receive
 
 default_scope: typing.Dict[str, typing.Any] = {
     "type": "http",
@@ -44,6 +44,20 @@ class ASGIClient(object):
         *,
         method: str = "GET",
         headers: typing.Optional[Headers] = None,
+        body: typing.Optional[bytes] = None,
+    ) -> Response:
+        loop = asyncio.get_event_loop()
+        return loop.run_until_complete(
+            self.fetch(url, method=method, headers=headers, body=body)
+        )
+
+    async def fetch(
+        self,
+        url: str = "/",
+        *,
+        method: str = "GET",
+        headers: typing.Optional[Headers] = None,
+        body: typing.Optional[bytes] = None,
     ) -> Response:
         url = urljoin(self.base_url, url)
         scheme, netloc, path, query, _ = urlsplit(url)
@@ -60,8 +74,7 @@ class ASGIClient(object):
         scope["query_string"] = query.encode()
         scope["method"] = method
         scope["server"] = (host, port)
-        if headers is None:
-            headers = []
+        headers = list(headers) if headers else []
         headers.append((b"host", netloc.encode()))
         headers.append(
             (
@@ -69,11 +82,14 @@ class ASGIClient(object):
                 b"ASGI Client",
             )
         )
+        if body is not None:
+            headers.append(
+                (b"content-length", str(len(body)).encode("latin-1"))
+            )
         scope["headers"] = headers
         res = Response()
-
-        async def receive() -> Message:
-            raise NotImplementedError("receive is not implemented")
+        finished = asyncio.Event()
+        receive = make_receive(body, finished)
 
         async def send(message: Message) -> None:
             if message["type"] == "http.response.start":
@@ -84,8 +100,25 @@ class ASGIClient(object):
                 chunk: typing.Optional[bytes] = message.get("body")
                 if chunk is not None:
                     res.chunks.append(chunk)
+                if not message.get("more_body", False):
+                    finished.set()
 
-        loop = asyncio.get_event_loop()
-        loop.run_until_complete(self.app(scope, receive, send))
-
+        await self.app(scope, receive, send)
         return res
+
+
+def make_receive(
+    body: typing.Optional[bytes], finished: asyncio.Event
+) -> Receive:
+    """Delivers the body, http.disconnect once the response is sent."""
+    pending: typing.Optional[bytes] = body or b""
+
+    async def receive() -> Message:
+        nonlocal pending
+        if pending is None:
+            await finished.wait()
+            return {"type": "http.disconnect"}
+        chunk, pending = pending, None
+        return {"type": "http.request", "body": chunk}
+
+    return receive
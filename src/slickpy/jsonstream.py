@@ -0,0 +1,280 @@
+import codecs
+import re
+import typing
+from json import JSONDecoder
+
+from slickpy.typing import HTTPError
+
+raw_decode = JSONDecoder().raw_decode
+# a whole string or any char but ones of numbers, literals, separators
+STRUCTURE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[^-+.0-9a-zA-Z,: \t\n\r]')
+STRING_END = re.compile(r'["\\]')
+NUMBER_END = re.compile(r"[^-+.0-9eE]")
+LITERAL_END = re.compile(r"[^a-z]")
+
+Items = typing.List[typing.Any]
+State = typing.Callable[[str, int, Items, bool], int]
+
+
+class ValueScanner(object):
+    """Finds the end of a JSON value split across chunks.
+
+    Chunks are kept and scanned once, so the value is decoded once it
+    is complete. A char that cannot appear in the value ends the scan
+    early, decoding reports the error.
+    """
+
+    def __init__(self) -> None:
+        self.parts: typing.List[str] = []
+        self.size = 0
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.scalar: typing.Optional[typing.Pattern[str]] = None
+
+    def scan(self, text: str, pos: int = 0) -> bool:
+        """Returns True if the value ends or is invalid."""
+        if not self.parts and not self.start(text[pos]):
+            return True
+        self.parts.append(text[pos:] if pos else text)
+        self.size += len(text) - pos
+        if self.scalar is not None:
+            if self.scalar.search(text, pos) is not None:
+                return True
+            return self.scalar is LITERAL_END and self.size > 5
+        n = len(text)
+        while pos < n:
+            if self.escaped:
+                self.escaped = False
+                pos += 1
+            elif self.in_string:
+                pos = self.scan_string(text, pos)
+            else:
+                pos = self.scan_structure(text, pos)
+            if pos < 0:
+                return True
+        return False
+
+    def start(self, c: str) -> bool:
+        if c in "tfn":
+            self.scalar = LITERAL_END
+        elif c in "-0123456789":
+            self.scalar = NUMBER_END
+        elif c not in '"[{':
+            return False
+        return True
+
+    def scan_string(self, text: str, pos: int) -> int:
+        """Returns position after the string, -1 if the value ended."""
+        m = STRING_END.search(text, pos)
+        if m is None:
+            return len(text)
+        if m.group() == "\\":
+            self.escaped = True
+        else:
+            self.in_string = False
+            if not self.depth:
+                return -1
+        return m.end()
+
+    def scan_structure(self, text: str, pos: int) -> int:
+        """Returns position after the next bracket, -1 if value ended."""
+        m = STRUCTURE.search(text, pos)
+        if m is None:
+            return len(text)
+        c = m.group()
+        if c[0] == '"':
+            if len(c) == 1:
+                # the string continues in the next chunk
+                self.in_string = True
+            elif not self.depth:
+                return -1
+        elif c in "[{":
+            self.depth += 1
+        elif c in "]}":
+            self.depth -= 1
+            if not self.depth:
+                return -1
+        else:
+            return -1
+        return m.end()
+
+
+class ItemsParser(object):
+    """Incrementally parses elements of a JSON array.
+
+    The array is either the document itself or is found by following
+    object keys in path. Anything after the array is ignored. An
+    element split across chunks is buffered up to max_item_size, over
+    that HTTPError(413) is raised.
+    """
+
+    def __init__(
+        self,
+        path: typing.Sequence[str] = (),
+        max_item_size: typing.Optional[int] = None,
+    ) -> None:
+        self.path = path
+        self.max_item_size = max_item_size
+        self.depth = 0
+        self.buf = ""
+        self.pending: typing.Optional[ValueScanner] = None
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.state: typing.Optional[State] = self._value
+
+    def feed(self, data: bytes, final: bool = False) -> Items:
+        items: Items = []
+        if self.state is None:
+            return items
+        text = self.decoder.decode(data, final)
+        pending = self.pending
+        if pending is None:
+            buf = self.buf + text
+        elif pending.scan(text) or final:
+            self.pending = None
+            buf = "".join(pending.parts)
+        else:
+            self.check_size(pending.size)
+            return items
+        pos = 0
+        while self.state is not None:
+            pos = skip_ws(buf, pos)
+            end = -1 if pos == len(buf) else self.state(buf, pos, items, final)
+            if end < 0:
+                if final:
+                    raise ValueError("unexpected end of JSON document")
+                break
+            pos = end
+        if self.pending is not None:
+            self.check_size(self.pending.size)
+            self.buf = ""
+        else:
+            self.buf = buf[pos:] if self.state is not None else ""
+        return items
+
+    def check_size(self, size: int) -> None:
+        if self.max_item_size is not None and size > self.max_item_size:
+            raise HTTPError(413)
+
+    def decode(
+        self, buf: str, pos: int, final: bool
+    ) -> typing.Tuple[typing.Any, int]:
+        try:
+            value, end = raw_decode(buf, pos)
+        except ValueError:
+            if final or self.scan(buf, pos):
+                raise
+            return None, -1
+        # a number might continue in the next chunk
+        if (
+            not final
+            and (end == len(buf) or buf[end] in ".eE+-")
+            and not self.scan(buf, pos)
+        ):
+            return None, -1
+        return value, end
+
+    def scan(self, buf: str, pos: int) -> bool:
+        """Returns True if the value at pos is complete, else buffers it."""
+        scanner = ValueScanner()
+        if scanner.scan(buf, pos):
+            return True
+        self.pending = scanner
+        return False
+
+    def _value(self, buf: str, pos: int, items: Items, final: bool) -> int:
+        if self.depth == len(self.path):
+            expect(buf, pos, "[")
+            self.state = self._first_item
+        else:
+            expect(buf, pos, "{")
+            self.state = self._first_key
+        return pos + 1
+
+    def _first_key(self, buf: str, pos: int, items: Items, final: bool) -> int:
+        if buf[pos] == "}":
+            self.state = None
+            return pos + 1
+        return self._key(buf, pos, items, final)
+
+    def _key(self, buf: str, pos: int, items: Items, final: bool) -> int:
+        expect(buf, pos, '"')
+        key, end = self.decode(buf, pos, final)
+        if end < 0:
+            return -1
+        end = skip_ws(buf, end)
+        if end == len(buf):
+            return -1
+        expect(buf, end, ":")
+        if key == self.path[self.depth]:
+            self.depth += 1
+            self.state = self._value
+        else:
+            self.state = self._skip
+        return end + 1
+
+    def _skip(self, buf: str, pos: int, items: Items, final: bool) -> int:
+        _, end = self.decode(buf, pos, final)
+        if end >= 0:
+            self.state = self._after_member
+        return end
+
+    def _after_member(
+        self, buf: str, pos: int, items: Items, final: bool
+    ) -> int:
+        if buf[pos] == "}":
+            self.state = None
+        else:
+            expect(buf, pos, ",")
+            self.state = self._key
+        return pos + 1
+
+    def _first_item(
+        self, buf: str, pos: int, items: Items, final: bool
+    ) -> int:
+        if buf[pos] == "]":
+            self.state = None
+            return pos + 1
+        return self._item(buf, pos, items, final)
+
+    def _item(self, buf: str, pos: int, items: Items, final: bool) -> int:
+        item, end = self.decode(buf, pos, final)
+        if end >= 0:
+            items.append(item)
+            self.state = self._after_item
+        return end
+
+    def _after_item(
+        self, buf: str, pos: int, items: Items, final: bool
+    ) -> int:
+        if buf[pos] == "]":
+            self.state = None
+        else:
+            expect(buf, pos, ",")
+            self.state = self._item
+        return pos + 1
+
+
+def skip_ws(buf: str, pos: int) -> int:
+    n = len(buf)
+    while pos < n and buf[pos] in " \t\n\r":
+        pos += 1
+    return pos
+
+
+def expect(buf: str, pos: int, c: str) -> None:
+    if buf[pos] != c:
+        raise ValueError(f"expected {c!r}, got {buf[pos]!r} at {pos}")
+
+
+async def parse_json_items(
+    chunks: typing.AsyncIterator[bytes],
+    path: typing.Sequence[str] = (),
+    max_item_size: typing.Optional[int] = None,
+) -> typing.AsyncIterator[typing.Any]:
+    parser = ItemsParser(path, max_item_size)
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.feed(b"", True):
+        yield item
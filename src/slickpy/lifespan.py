@@ -1,52 +1,154 @@
+import asyncio
 import logging
+import time
 import typing
 
+from slickpy.drain import InFlight
 from slickpy.typing import LifespanSubscriber, Receive, Scope, Send
 
 
 class Topic(object):
+    """Subscribers of an event, notified in waves.
+
+    Subscribers of a wave run concurrently, a subscriber runs in a wave
+    after all subscribers it depends on.
+    """
+
     def __init__(self) -> None:
         self.subscribers: typing.List[LifespanSubscriber] = []
+        self.dependencies: typing.Dict[
+            LifespanSubscriber, typing.Sequence[LifespanSubscriber]
+        ] = {}
+        self.timeouts: typing.Dict[LifespanSubscriber, float] = {}
+        self.timings: typing.Dict[str, float] = {}
 
-    def add(self, subscriber: LifespanSubscriber) -> None:
+    def add(
+        self,
+        subscriber: LifespanSubscriber,
+        after: typing.Sequence[LifespanSubscriber] = (),
+        timeout: typing.Optional[float] = None,
+    ) -> None:
         self.subscribers.append(subscriber)
+        # the sequence is read at notify, so it can be extended later
+        self.dependencies[subscriber] = after
+        if timeout is not None:
+            self.timeouts[subscriber] = timeout
+
+    def waves(self) -> typing.List[typing.List[LifespanSubscriber]]:
+        dependencies = self.dependencies
+        for subscriber, after in dependencies.items():
+            for s in after:
+                if s not in self.subscribers:
+                    raise ValueError(
+                        f"{name_of(subscriber)} depends on "
+                        f"unknown {name_of(s)}"
+                    )
+        waves = []
+        done: typing.Set[LifespanSubscriber] = set()
+        pending = self.subscribers
+        while pending:
+            wave = [
+                s for s in pending if done.issuperset(dependencies.get(s, ()))
+            ]
+            if not wave:
+                raise ValueError(
+                    "circular dependency between "
+                    + ", ".join(name_of(s) for s in pending)
+                )
+            waves.append(wave)
+            done.update(wave)
+            pending = [s for s in pending if s not in done]
+        return waves
 
     async def notify(self) -> None:
-        for subscriber in self.subscribers:
-            await subscriber()
+        self.timings = {}
+        for wave in self.waves():
+            if len(wave) == 1:
+                await self.run(wave[0])
+                continue
+            results = await asyncio.gather(
+                *[self.run(s) for s in wave], return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+
+    async def run(self, subscriber: LifespanSubscriber) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(subscriber(), self.timeouts.get(subscriber))
+        finally:
+            self.timings[name_of(subscriber)] = time.perf_counter() - started
+
+
+def name_of(subscriber: LifespanSubscriber) -> str:
+    return getattr(subscriber, "__qualname__", repr(subscriber))
 
 
 class Lifespan(object):
-    def __init__(self) -> None:
+    def __init__(self, inflight: typing.Optional[InFlight] = None) -> None:
         self.logger = logging.getLogger("slickpy.lifespan")
+        # shutdown subscribers run after in-flight work is drained
+        self.inflight = inflight
         self.topics: typing.Dict[str, Topic] = {}
+        # per worker state, passed by server to each request scope
+        self.state: typing.Optional[typing.MutableMapping[str, typing.Any]] = (
+            None
+        )
 
-    def add(self, event: str, subscriber: LifespanSubscriber) -> None:
+    def add(
+        self,
+        event: str,
+        subscriber: LifespanSubscriber,
+        after: typing.Sequence[LifespanSubscriber] = (),
+        timeout: typing.Optional[float] = None,
+    ) -> None:
         topic = self.topics.get(event)
         if not topic:
             topic = Topic()
             self.topics[event] = topic
-        topic.add(subscriber)
+        topic.add(subscriber, after, timeout)
 
     async def notify(self, event: str) -> None:
         topic = self.topics.get(event)
         if topic:
             await topic.notify()
 
+    def report(self, event: str) -> None:
+        topic = self.topics.get(event)
+        if topic and topic.timings:
+            self.logger.info(
+                "%s took %s",
+                event,
+                ", ".join(
+                    f"{name} {seconds:.3f}s"
+                    for name, seconds in sorted(
+                        topic.timings.items(), key=lambda i: -i[1]
+                    )
+                ),
+            )
+
     async def __call__(
         self, scope: Scope, receive: Receive, send: Send
     ) -> None:
+        self.state = scope.get("state")
         active = True
         while active:
             message = await receive()
             event = message["type"]
             event_complete = event + ".complete"
+            if self.inflight is not None:
+                if event == "lifespan.startup":
+                    self.inflight.draining = False
+                elif event == "lifespan.shutdown":
+                    await self.inflight.drain()
             if event == "lifespan.shutdown":
                 active = False
             try:
                 await self.notify(event)
                 await self.notify(event_complete)
                 self.logger.info(event_complete)
+                self.report(event)
             except Exception as ex:
                 # TODO: logging
                 event_failed = event + ".failed"
@@ -0,0 +1,36 @@
+import typing
+
+
+class Timing(object):
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def __repr__(self) -> str:
+        return f"Timing(count={self.count}, total={self.total:.3f})"
+
+
+class Metrics(object):
+    """Counters and timings collected by the application."""
+
+    def __init__(self) -> None:
+        self.counters: typing.Dict[str, int] = {}
+        self.timings: typing.Dict[str, Timing] = {}
+
+    def incr(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        t = self.timings.get(name)
+        if t is None:
+            t = self.timings[name] = Timing()
+        t.count += 1
+        t.total += seconds
+        if seconds > t.max:
+            t.max = seconds
+
+    def __getitem__(self, name: str) -> int:
+        return self.counters.get(name, 0)
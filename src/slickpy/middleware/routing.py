@@ -1,12 +1,25 @@
+import typing
+
+from slickpy.drain import InFlight
+from slickpy.response import JSONResponse
 from slickpy.router import Router
-from slickpy.typing import ASGICallable, Receive, Scope, Send
+from slickpy.tasks import TaskQueue
+from slickpy.typing import ASGICallable, HTTPError, Receive, Scope, Send
 
 
 class RoutingMiddleware(object):
-    def __init__(self, router: Router, lifespan: ASGICallable):
+    def __init__(
+        self,
+        router: Router,
+        lifespan: ASGICallable,
+        tasks: typing.Optional[TaskQueue] = None,
+        inflight: typing.Optional[InFlight] = None,
+    ):
         self.exact_matches = router.exact_matches
         self.regex_matches = router.regex_matches
         self.lifespan = lifespan
+        self.tasks = TaskQueue() if tasks is None else tasks
+        self.inflight = InFlight() if inflight is None else inflight
 
     async def __call__(
         self, scope: Scope, receive: Receive, send: Send
@@ -14,26 +27,55 @@ class RoutingMiddleware(object):
         if scope["type"] == "lifespan":
             await self.lifespan(scope, receive, send)
             return
+        inflight = self.inflight
+        if scope["path"] in inflight.exempt:
+            await self.dispatch(scope, receive, send)
+            return
+        if inflight.draining:
+            inflight.metrics.incr("requests_refused")
+            await refuse(scope, send)
+            return
+        inflight.enter()
+        try:
+            await self.dispatch(scope, receive, send)
+        finally:
+            inflight.exit()
+
+    async def dispatch(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
         path = scope["path"]
         route = self.exact_matches.get(path)
-        if route:
-            handler = route.get(scope["method"])
-            if handler:
-                await handler(scope, receive, send)
-            else:
-                await handle_http_status(send, 405)
-            return
-        for regex, route in self.regex_matches:
-            m = regex.match(path)
-            if m:
-                handler = route.get(scope["method"])
-                if handler:
+        if not route:
+            for regex, route in self.regex_matches:
+                m = regex.match(path)
+                if m:
                     scope["route_params"] = m.groupdict()
-                    await handler(scope, receive, send)
-                else:
-                    await handle_http_status(send, 405)
+                    break
+            else:
+                await handle_http_status(send, 404)
                 return
-        await handle_http_status(send, 404)
+        handler = route.get(scope["method"])
+        if not handler:
+            await handle_http_status(send, 405)
+            return
+        await handle(handler, scope, receive, send)
+        deferred = scope.get("deferred")
+        if deferred:
+            self.tasks.put(deferred)
+
+
+async def handle(
+    handler: ASGICallable, scope: Scope, receive: Receive, send: Send
+) -> None:
+    try:
+        await handler(scope, receive, send)
+    except HTTPError as ex:
+        if ex.detail is None:
+            await handle_http_status(send, ex.status_code)
+        else:
+            res = JSONResponse(ex.detail, ex.status_code)
+            await res(scope, receive, send)
 
 
 async def handle_http_status(send: Send, code: int) -> None:
@@ -45,3 +87,20 @@ async def handle_http_status(send: Send, code: int) -> None:
         }
     )
     await send({"type": "http.response.body"})
+
+
+async def refuse(scope: Scope, send: Send) -> None:
+    if scope["type"] == "websocket":
+        await send({"type": "websocket.close", "code": 1001})
+        return
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-length", b"0"),
+                (b"connection", b"close"),
+            ],
+        }
+    )
+    await send({"type": "http.response.body"})
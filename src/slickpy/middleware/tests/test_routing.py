@@ -2,7 +2,8 @@ import unittest
 
 from slickpy import App
 from slickpy.functional import ASGIClient
-from slickpy.typing import ASGICallable, Receive, Scope, Send
+from slickpy.response import TextResponse
+from slickpy.typing import ASGICallable, HTTPError, Receive, Scope, Send
 
 
 class RoutingMiddlewareTestCase(unittest.TestCase):
@@ -62,3 +63,21 @@ class RoutingMiddlewareTestCase(unittest.TestCase):
 
             self.assertEqual(res.status_code, 404)
             self.assertEqual(res.text, "")
+
+    def test_http_error(self) -> None:
+        app = App()
+
+        @app.route("/")
+        async def a() -> TextResponse:
+            raise HTTPError(403)
+
+        @app.route(r"^/(?P<locale>en|de|uk)/welcome$")
+        async def b() -> TextResponse:
+            raise HTTPError(403)
+
+        client = ASGIClient(app.asgi())
+        for pattern in ["/", "/uk/welcome"]:
+            res = client.go(pattern)
+
+            self.assertEqual(res.status_code, 403)
+            self.assertEqual(res.text, "")
@@ -1,4 +1,8 @@
+import hashlib
+import os
+import sys
 import typing
+from collections import deque
 from tempfile import SpooledTemporaryFile
 
 try:
@@ -7,22 +11,126 @@ except ImportError:  # pragma: nocover
     parse_options_header = None
 
 from slickpy.comp import get_running_loop
-from slickpy.typing import FormParams, MultipartFile, MultipartFiles
+from slickpy.typing import (
+    FormParams,
+    HTTPError,
+    MultipartFile,
+    MultipartFiles,
+    RequestOptions,
+    default_options,
+)
+
+
+class UploadStage(object):
+    """Processes upload data as it is written, e.g. to compute digest.
+
+    The result is available as ``MultipartFile.info[name]``.
+    """
+
+    name = ""
+
+    def update(self, chunk: bytes) -> None:
+        raise NotImplementedError()  # pragma: nocover
+
+    def result(self) -> typing.Any:
+        raise NotImplementedError()  # pragma: nocover
+
+
+class HashStage(UploadStage):
+    def __init__(self, algorithm: str = "sha256") -> None:
+        self.name = algorithm
+        self.hash = hashlib.new(algorithm)
+
+    def update(self, chunk: bytes) -> None:
+        self.hash.update(chunk)
+
+    def result(self) -> str:
+        return self.hash.hexdigest()
+
+
+SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"\x1f\x8b", "application/gzip"),
+)
+
+
+class SniffStage(UploadStage):
+    """Detects content type by the leading bytes of data."""
+
+    name = "sniffed_type"
+    prefix_size = 16
+
+    def __init__(self) -> None:
+        self.prefix = b""
+
+    def update(self, chunk: bytes) -> None:
+        if len(self.prefix) < self.prefix_size:
+            self.prefix = (self.prefix + chunk)[: self.prefix_size]
+
+    def result(self) -> typing.Optional[str]:
+        prefix = self.prefix
+        for signature, content_type in SIGNATURES:
+            if prefix.startswith(signature):
+                return content_type
+        if prefix[:4] == b"RIFF" and prefix[8:12] == b"WEBP":
+            return "image/webp"
+        return None
 
 
 class MultipartFileWriter(object):
     roll_size = 1024 * 1024
+    # pending writes of rolled files are batched up to this size
+    flush_size = 256 * 1024
 
-    def __init__(self, name: str, content_type: str) -> None:
+    def __init__(
+        self,
+        name: str,
+        content_type: str,
+        roll_size: typing.Optional[int] = None,
+        spool_dir: typing.Optional[str] = None,
+        memfd: bool = False,
+        stages: typing.Sequence[typing.Callable[[], UploadStage]] = (),
+    ) -> None:
         self.name = name
         self.content_type = content_type
         self.size = 0
-        self.file = SpooledTemporaryFile(max_size=self.roll_size)
+        self.stages = [factory() for factory in stages]
+        if roll_size is not None:
+            self.roll_size = roll_size
+        self.file: typing.IO[bytes]
+        if memfd and hasattr(os, "memfd_create"):
+            # an anonymous in-memory file never rolls over to disk
+            self.roll_size = sys.maxsize
+            self.file = open(os.memfd_create("slickpy-upload"), "w+b")
+        else:
+            self.file = SpooledTemporaryFile(
+                max_size=self.roll_size, dir=spool_dir
+            )
+
+    @classmethod
+    def from_options(
+        cls, name: str, content_type: str, options: RequestOptions
+    ) -> "MultipartFileWriter":
+        return cls(
+            name,
+            content_type,
+            options.spool_size,
+            options.spool_dir,
+            options.spool_memfd,
+            options.upload_stages,
+        )
 
     def would_roll(self, size: int) -> bool:
         return self.size + size >= self.roll_size
 
     def write(self, chunk: bytes) -> int:
+        for stage in self.stages:
+            stage.update(chunk)
         ws = self.file.write(chunk)
         self.size += ws
         return ws
@@ -30,104 +138,347 @@ class MultipartFileWriter(object):
     def seek(self) -> int:
         return self.file.seek(0)
 
+    def multipart_file(self) -> MultipartFile:
+        """Returns the written file, all pending writes must be done."""
+        return MultipartFile(
+            self.name,
+            self.content_type,
+            self.would_roll(0),
+            self.file,
+            self.size,
+            {stage.name: stage.result() for stage in self.stages},
+        )
+
 
 Operations = typing.List[
     typing.Tuple[MultipartFileWriter, typing.Optional[bytes]]
 ]
+Headers = typing.List[typing.Tuple[bytes, bytes]]
+Event = typing.Tuple[int, typing.Any]
 
+# kinds of events emitted by PartsParser
+HEADERS = 0
+DATA = 1
+END = 2
 
-async def parse_multipart(  # noqa: C901, CCR001
-    content_type_header: bytes, chunks: typing.AsyncIterator[bytes]
-) -> typing.Tuple[FormParams, MultipartFiles]:
-    assert (
-        parse_options_header is not None
-    ), "The 'python-multipart' package must be installed."
-    content_type, params = parse_options_header(content_type_header)
-    header_field = b""
-    header_value = b""
-    content_disposition = b""
-    field_name = ""
-    field_value = b""
-    mfw: typing.Optional[MultipartFileWriter] = None
 
-    io_pending: Operations = []
-    form: typing.List[typing.Tuple[str, str]] = []
-    files: typing.List[typing.Tuple[str, MultipartFile]] = []
+class PartsParser(object):
+    """Turns multipart body chunks into part events.
+
+    A part starts with (HEADERS, headers), followed by zero or more
+    (DATA, bytes) and ends with (END, None).
+    """
 
-    def callback(  # noqa: CCR001
+    def __init__(self, content_type_header: bytes) -> None:
+        assert (
+            parse_options_header is not None
+        ), "The 'python-multipart' package must be installed."
+        _, params = parse_options_header(content_type_header)
+        self.events: typing.List[Event] = []
+        self.headers: Headers = []
+        self.header_field = bytearray()
+        self.header_value = bytearray()
+        self.parser = MultipartParser(params.get(b"boundary"))
+        self.parser.callback = self.callback
+
+    def feed(self, chunk: bytes) -> typing.List[Event]:
+        self.parser.write(chunk)
+        events = self.events
+        self.events = []
+        return events
+
+    def callback(
+        self,
         name: str,
         data: typing.Optional[bytes] = None,
         start: typing.Optional[int] = None,
         end: typing.Optional[int] = None,
     ) -> None:
-        nonlocal header_field, header_value, content_disposition, content_type
-        nonlocal field_name, field_value, mfw
-        if name == "header_field":
-            header_field += data[start:end]  # type: ignore[index]
+        if name == "part_data":
+            self.events.append((DATA, data[start:end]))  # type: ignore
+        elif name == "header_field":
+            self.header_field += data[start:end]  # type: ignore[index]
         elif name == "header_value":
-            header_value += data[start:end]  # type: ignore[index]
+            self.header_value += data[start:end]  # type: ignore[index]
         elif name == "header_end":
-            f = header_field.lower()
-            if f == b"content-disposition":
-                content_disposition = header_value
-            elif f == b"content-type":
-                content_type = header_value
-            header_field = b""
-            header_value = b""
+            self.headers.append(
+                (bytes(self.header_field).lower(), bytes(self.header_value))
+            )
+            self.header_field.clear()
+            self.header_value.clear()
         elif name == "headers_finished":
-            disposition, options = parse_options_header(content_disposition)
-            field_name = options[b"name"].decode("utf-8")
-            field_value = b""
-            if b"filename" in options:
-                mfw = MultipartFileWriter(
-                    options[b"filename"].decode("utf-8"),
-                    content_type.decode("utf-8"),
-                )
-            else:
-                mfw = None
-        elif name == "part_data":
-            if mfw:
-                chunk = data[start:end]  # type: ignore[index]
-                if mfw.would_roll(len(chunk)):
-                    io_pending.append((mfw, chunk))
-                else:
-                    mfw.write(chunk)
-            else:
-                field_value += data[start:end]  # type: ignore[index]
+            self.events.append((HEADERS, self.headers))
+            self.headers = []
         elif name == "part_end":
-            if mfw:
-                rolled = mfw.would_roll(0)
-                if rolled:
-                    io_pending.append((mfw, None))
-                else:
-                    mfw.seek()
-                files.append(
-                    (
-                        field_name,
-                        MultipartFile(
-                            mfw.name, mfw.content_type, rolled, mfw.file
-                        ),
-                    )
-                )
+            self.events.append((END, None))
+
+
+def part_info(
+    headers: Headers,
+) -> typing.Tuple[str, typing.Optional[str], str]:
+    """Returns field name, file name and content type of a part."""
+    content_disposition = b""
+    content_type = b"text/plain"
+    for name, value in headers:
+        if name == b"content-disposition":
+            content_disposition = value
+        elif name == b"content-type":
+            content_type = value
+    _, options = parse_options_header(content_disposition)
+    filename = options.get(b"filename")
+    return (
+        options.get(b"name", b"").decode("utf-8"),
+        None if filename is None else filename.decode("utf-8"),
+        content_type.decode("utf-8"),
+    )
+
+
+class UploadPolicy(object):
+    """Enforces per route limits on parts while they are received.
+
+    Too many parts or too large part raise HTTPError(413), a file of
+    not allowed content type raises HTTPError(415).
+    """
+
+    def __init__(self, options: RequestOptions) -> None:
+        self.max_parts = options.max_parts
+        self.max_file_size = options.max_file_size
+        self.max_field_size = options.max_form_field_size
+        self.allowed_file_types = options.allowed_file_types
+        self.parts = 0
+
+    def begin(
+        self, filename: typing.Optional[str], content_type: str
+    ) -> typing.Optional[int]:
+        """Checks a new part, returns its size limit."""
+        self.parts += 1
+        if self.max_parts is not None and self.parts > self.max_parts:
+            raise HTTPError(413)
+        if filename is None:
+            return self.max_field_size
+        allowed = self.allowed_file_types
+        if allowed is not None:
+            t = content_type.split(";", 1)[0].strip().lower()
+            if t not in allowed and t.split("/", 1)[0] + "/*" not in allowed:
+                raise HTTPError(415)
+        return self.max_file_size
+
+
+class MultipartPart(object):
+    """A part of multipart body which data is read as it is received."""
+
+    def __init__(
+        self,
+        headers: Headers,
+        reader: "PartsReader",
+        max_size: typing.Optional[int] = None,
+    ) -> None:
+        self.headers = headers
+        self.name, self.filename, self.content_type = part_info(headers)
+        self.size = 0
+        self._reader = reader
+        self._max_size = max_size
+        self._done = False
+
+    async def chunks(self) -> typing.AsyncIterator[bytes]:
+        max_size = self._max_size
+        while not self._done:
+            event = await self._reader.next_event()
+            if event is None:
+                raise HTTPError(400)
+            kind, data = event
+            if kind == END:
+                self._done = True
             else:
-                form.append((field_name, field_value.decode("utf-8")))
+                self.size += len(data)
+                if max_size is not None and self.size > max_size:
+                    raise HTTPError(413)
+                yield data
+
+    async def read(self) -> bytes:
+        data = bytearray()
+        async for chunk in self.chunks():
+            data += chunk
+        return bytes(data)
+
+
+class PartsReader(object):
+    def __init__(
+        self,
+        content_type_header: bytes,
+        chunks: typing.AsyncIterator[bytes],
+        options: RequestOptions = default_options,
+    ) -> None:
+        self.parser = PartsParser(content_type_header)
+        self.policy = UploadPolicy(options)
+        self.chunks = chunks.__aiter__()
+        self.events: typing.Deque[Event] = deque()
+
+    async def next_event(self) -> typing.Optional[Event]:
+        events = self.events
+        while not events:
+            try:
+                chunk = await self.chunks.__anext__()
+            except StopAsyncIteration:
+                return None
+            events.extend(self.parser.feed(chunk))
+        return events.popleft()
+
+    async def parts(self) -> typing.AsyncIterator[MultipartPart]:
+        while True:
+            event = await self.next_event()
+            if event is None:
+                return
+            kind, headers = event
+            if kind != HEADERS:  # pragma: nocover
+                raise HTTPError(400)
+            part = MultipartPart(headers, self)
+            part._max_size = self.policy.begin(
+                part.filename, part.content_type
+            )
+            yield part
+            # skip data the handler has not read
+            async for _ in part.chunks():
+                pass
+
 
-    parser = MultipartParser(params.get(b"boundary"))
-    parser.callback = callback
+def parse_parts(
+    content_type_header: bytes,
+    chunks: typing.AsyncIterator[bytes],
+    options: RequestOptions = default_options,
+) -> typing.AsyncIterator[MultipartPart]:
+    return PartsReader(content_type_header, chunks, options).parts()
 
-    loop = get_running_loop()
-    async for chunk in chunks:
-        parser.write(chunk)
-        if io_pending:
-            await loop.run_in_executor(None, flush_pending_io, io_pending)
-            io_pending.clear()
 
-    return FormParams(form), MultipartFiles(files)
+class FormBuilder(object):
+    """Collects form fields and spools files from part events."""
+
+    def __init__(self, options: RequestOptions) -> None:
+        self.options = options
+        self.form: typing.List[typing.Tuple[str, str]] = []
+        self.files: typing.List[typing.Tuple[str, MultipartFileWriter]] = []
+        self.io_pending: Operations = []
+        self.io_pending_size = 0
+        self.policy = UploadPolicy(options)
+        self.field_name = ""
+        self.field_value = bytearray()
+        self.part_size = 0
+        self.max_part_size: typing.Optional[int] = None
+        self.mfw: typing.Optional[MultipartFileWriter] = None
+
+    def feed(self, events: typing.List[Event]) -> None:
+        for kind, value in events:
+            if kind == DATA:
+                self.data(value)
+            elif kind == HEADERS:
+                self.begin(value)
+            else:
+                self.end()
+
+    def begin(self, headers: Headers) -> None:
+        self.field_name, filename, content_type = part_info(headers)
+        self.max_part_size = self.policy.begin(filename, content_type)
+        self.part_size = 0
+        if filename is None:
+            self.mfw = None
+        else:
+            self.mfw = MultipartFileWriter.from_options(
+                filename, content_type, self.options
+            )
+
+    def data(self, chunk: bytes) -> None:
+        self.part_size += len(chunk)
+        if self.max_part_size is not None:
+            if self.part_size > self.max_part_size:
+                raise HTTPError(413)
+        mfw = self.mfw
+        if mfw is None:
+            self.field_value += chunk
+            return
+        io_pending = self.io_pending
+        # once a write is pending, the rest follows it to keep the order
+        if (io_pending and io_pending[-1][0] is mfw) or mfw.would_roll(
+            len(chunk)
+        ):
+            io_pending.append((mfw, chunk))
+            self.io_pending_size += len(chunk)
+        else:
+            mfw.write(chunk)
+
+    def end(self) -> None:
+        mfw = self.mfw
+        if mfw is None:
+            self.form.append(
+                (self.field_name, self.field_value.decode("utf-8"))
+            )
+            self.field_value.clear()
+            return
+        if mfw.would_roll(0) or (
+            self.io_pending and self.io_pending[-1][0] is mfw
+        ):
+            self.io_pending.append((mfw, None))
+        else:
+            mfw.seek()
+        self.files.append((self.field_name, mfw))
+
+    async def flush(self) -> None:
+        io_pending = self.io_pending
+        await get_running_loop().run_in_executor(
+            MultipartFile.executor, flush_pending_io, io_pending[:]
+        )
+        io_pending.clear()
+        self.io_pending_size = 0
+
+    def cleanup(self) -> None:
+        """Closes spooled files, the rolled ones are removed by OS."""
+        for _, mfw in self.files:
+            mfw.file.close()
+        if self.mfw is not None:
+            self.mfw.file.close()
+
+
+async def parse_multipart(
+    content_type_header: bytes,
+    chunks: typing.AsyncIterator[bytes],
+    options: RequestOptions = default_options,
+) -> typing.Tuple[FormParams, MultipartFiles]:
+    parser = PartsParser(content_type_header)
+    builder = FormBuilder(options)
+    flush_size = MultipartFileWriter.flush_size
+    try:
+        async for chunk in chunks:
+            builder.feed(parser.feed(chunk))
+            if builder.io_pending_size >= flush_size:
+                await builder.flush()
+        if builder.io_pending:
+            await builder.flush()
+    except BaseException:
+        builder.cleanup()
+        raise
+
+    return FormParams(builder.form), MultipartFiles(
+        [(name, mfw.multipart_file()) for name, mfw in builder.files]
+    )
 
 
 def flush_pending_io(operations: Operations) -> None:
-    for mf, data in operations:
+    """Writes consecutive chunks of the same file at once."""
+    i = 0
+    n = len(operations)
+    while i < n:
+        mfw, data = operations[i]
+        j = i + 1
         if data is None:
-            mf.seek()
+            mfw.seek()
         else:
-            mf.write(data)
+            while (
+                j < n
+                and operations[j][0] is mfw
+                and operations[j][1] is not None
+            ):
+                j += 1
+            if j - i > 1:
+                mfw.write(b"".join([d or b"" for _, d in operations[i:j]]))
+            else:
+                mfw.write(data)
+        i = j
@@ -0,0 +1,228 @@
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+import typing
+
+from slickpy.server import load_app, run
+from slickpy.typing import ASGICallable
+
+
+def bind_socket(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    *,
+    uds: typing.Optional[str] = None,
+    reuse_port: bool = False,
+    backlog: int = 2048,
+) -> socket.socket:
+    """Binds a listening socket, with SO_REUSEPORT if reuse_port."""
+    if uds:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if os.path.exists(uds):
+            os.unlink(uds)
+        sock.bind(uds)
+    else:
+        family = socket.AF_INET6 if ":" in host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+def private_memory(pid: int) -> int:
+    """Returns resident memory not shared with other processes, in bytes.
+
+    Pages shared copy-on-write with the master are not counted, 0 if
+    unknown, e.g. there is no procfs.
+    """
+    total = 0
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                    total += int(line.split()[1]) << 10
+    except (OSError, IndexError, ValueError):
+        return 0
+    return total
+
+
+class Prefork(object):
+    """Forks workers that serve the app loaded once in the master.
+
+    The master freezes the garbage collector before fork, so imported
+    modules and compiled routes stay shared copy-on-write. Each worker
+    binds its own SO_REUSEPORT socket if supported, otherwise all share
+    the socket bound by the master. Workers that exit are respawned,
+    ones over max_memory are replaced.
+    """
+
+    def __init__(
+        self,
+        app: ASGICallable,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        *,
+        workers: typing.Optional[int] = None,
+        uds: typing.Optional[str] = None,
+        reuse_port: bool = hasattr(socket, "SO_REUSEPORT"),
+        max_memory: typing.Optional[int] = None,
+        check_interval: float = 1.0,
+        stop_timeout: float = 60.0,
+        **options: typing.Any,
+    ) -> None:
+        self.logger = logging.getLogger("slickpy.prefork")
+        self.app = app
+        self.host = host
+        self.port = port
+        self.uds = uds
+        self.reuse_port = reuse_port and not uds
+        self.max_memory = max_memory
+        self.check_interval = check_interval
+        self.stop_timeout = stop_timeout
+        self.options = options
+        self.count = workers or os.cpu_count() or 1
+        self.sock: typing.Optional[socket.socket] = None
+        self.workers: typing.Dict[int, float] = {}
+        self.retired: typing.Set[int] = set()
+        self.stopping = False
+
+    def start(self) -> None:
+        if not self.reuse_port:
+            self.sock = bind_socket(self.host, self.port, uds=self.uds)
+        gc.freeze()
+        for _ in range(self.count):
+            self.spawn()
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return pid
+        code = 0
+        try:
+            self.work()
+        except BaseException:
+            self.logger.exception("worker %d failed", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+
+    def work(self) -> None:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, signal.SIG_DFL)
+        gc.enable()
+        sock = self.sock
+        if sock is None:
+            sock = bind_socket(self.host, self.port, reuse_port=True)
+        run(self.app, sock=sock, **self.options)
+
+    def reap(self) -> None:
+        """Collects exited workers and respawns them unless stopping."""
+        while self.workers:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if not pid:
+                break
+            started = self.workers.pop(pid, None)
+            if started is None:
+                continue
+            if pid in self.retired:
+                self.retired.discard(pid)
+                continue
+            if not self.stopping:
+                self.logger.warning(
+                    "worker %d exited with %d after %.1fs, respawning",
+                    pid,
+                    os.waitstatus_to_exitcode(status),
+                    time.monotonic() - started,
+                )
+                self.spawn()
+
+    def check_memory(self) -> None:
+        """Replaces workers which private memory is over max_memory."""
+        max_memory = self.max_memory
+        if not max_memory:
+            return
+        for pid in list(self.workers):
+            if pid in self.retired:
+                continue
+            used = private_memory(pid)
+            if used > max_memory:
+                self.logger.info(
+                    "worker %d uses %d MiB, restarting", pid, used >> 20
+                )
+                # the replacement starts before the old one drains
+                self.spawn()
+                self.retired.add(pid)
+                os.kill(pid, signal.SIGTERM)
+
+    def stop(self) -> None:
+        """Terminates workers gracefully, kills them after stop timeout."""
+        self.stopping = True
+        for pid in self.workers:
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.stop_timeout
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        for pid in self.workers:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.clear()
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def run(self) -> None:
+        """Runs workers until SIGINT or SIGTERM is received."""
+
+        def stop(signum: int, frame: typing.Any) -> None:
+            self.stopping = True
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+        self.start()
+        self.logger.info("started %d workers", self.count)
+        try:
+            while not self.stopping:
+                self.reap()
+                self.check_memory()
+                time.sleep(self.check_interval)
+        finally:
+            self.stop()
+
+
+def main(args: typing.Optional[typing.Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m slickpy.prefork",
+        description="Runs an ASGI app in pre-forked workers.",
+    )
+    parser.add_argument("app", help="module:attribute, e.g. app:main")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--uds", help="bind to a Unix domain socket")
+    parser.add_argument("--workers", type=int, help="defaults to CPU count")
+    parser.add_argument(
+        "--max-memory", type=int, help="restart workers over MiB"
+    )
+    ns = parser.parse_args(args)
+    logging.basicConfig(level=logging.INFO)
+    Prefork(
+        load_app(ns.app),
+        ns.host,
+        ns.port,
+        workers=ns.workers,
+        uds=ns.uds,
+        max_memory=ns.max_memory << 20 if ns.max_memory else None,
+    ).run()
+
+
+if __name__ == "__main__":  # pragma: nocover
+    main()
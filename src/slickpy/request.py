@@ -1,21 +1,39 @@
 import typing
-from urllib.parse import parse_qsl
 
-from slickpy.comp import ujson_loads
-from slickpy.multipart import parse_multipart
+from slickpy.comp import get_running_loop, ujson_loads
+from slickpy.compression import decompress_chunks
+from slickpy.cookie import empty_cookies, parse_cookie
+from slickpy.jsonstream import parse_json_items
+from slickpy.multipart import (
+    MultipartFileWriter,
+    MultipartPart,
+    flush_pending_io,
+    parse_multipart,
+    parse_parts,
+)
+from slickpy.tasks import defer
 from slickpy.typing import (
     FormParams,
+    HTTPError,
+    MultipartFile,
     MultipartFiles,
     QueryParams,
     Receive,
+    RequestHeaders,
+    RequestOptions,
     Scope,
+    default_options,
 )
+from slickpy.urlencoded import QueryCache, parse_query, parse_urlencoded
+
+empty_query_params = QueryParams([])
 
 
 class Request(object):
     __slots__ = (
         "scope",
         "_body",
+        "_content_length",
         "_cookies",
         "_files",
         "_form",
@@ -25,6 +43,8 @@ class Request(object):
         "_receive",
     )
 
+    query_cache: typing.ClassVar[typing.Optional[QueryCache]] = None
+
     def __init__(self, scope: Scope, receive: Receive):
         self.scope = scope
         self._receive = receive
@@ -40,62 +60,146 @@ class Request(object):
     @property
     def query_params(self) -> QueryParams:
         if not hasattr(self, "_query_params"):
-            pairs = parse_qsl(self.scope["query_string"].decode("latin-1"))
-            self._query_params = QueryParams(pairs)
+            qs = self.scope["query_string"]
+            if not qs:
+                self._query_params = empty_query_params
+            elif self.query_cache is not None:
+                self._query_params = self.query_cache.get(qs)
+            else:
+                self._query_params = QueryParams(parse_query(qs))
         return self._query_params
 
+    def defer(
+        self,
+        fn: typing.Callable[..., typing.Awaitable[typing.Any]],
+        *args: typing.Any,
+    ) -> None:
+        """Runs fn(*args) in background after the response is sent."""
+        defer(self.scope, fn, *args)
+
+    @property
+    def disconnected(self) -> bool:
+        """Set once the client has gone, if the route watches for it."""
+        event = self.scope.get("disconnected")
+        return event is not None and event.is_set()
+
+    @property
+    def options(self) -> RequestOptions:
+        return self.scope.get(  # type: ignore[no-any-return]
+            "route_options", default_options
+        )
+
     @property
-    def headers(self) -> typing.Mapping[bytes, bytes]:
+    def headers(self) -> RequestHeaders:
         if not hasattr(self, "_headers"):
-            self._headers = dict(self.scope["headers"])
+            self._headers = RequestHeaders(self.scope["headers"])
         return self._headers
 
+    @property
+    def content_type(self) -> bytes:
+        return self.headers.get(b"content-type") or b""
+
+    @property
+    def content_length(self) -> typing.Optional[int]:
+        if not hasattr(self, "_content_length"):
+            value = self.headers.get(b"content-length")
+            if value is None:
+                self._content_length = None
+            elif value.isdigit():
+                self._content_length = int(value)
+            else:
+                raise HTTPError(400)
+        return self._content_length
+
     @property
     def cookies(self) -> typing.Mapping[str, str]:
         if not hasattr(self, "_cookies"):
-            cookie = self.headers.get(b"cookie")
+            cookie = b"; ".join(self.headers.getlist(b"cookie"))
             if cookie:
-                self._cookies: typing.Mapping[str, str] = dict(
-                    [
-                        # TODO: unquote
-                        pair.split("=", 1)
-                        for pair in cookie.decode("latin-1").split("; ")
-                    ]
-                )
+                self._cookies = parse_cookie(cookie)
             else:
-                self._cookies = {}
+                self._cookies = empty_cookies
         return self._cookies
 
-    async def chunks(self) -> typing.AsyncIterator[bytes]:
-        while True:
-            message = await self._receive()
-            if message["type"] == "http.request":
-                chunk = message.get("body")
-                if chunk:
-                    yield chunk
-                if not message.get("more_body"):
-                    break
-            elif message["type"] == "http.disconnect":
-                raise RuntimeError("http disconnect")
-            else:
-                raise NotImplementedError(
-                    f"unexpected message type '{message['type']}'"
+    @property
+    def content_encoding(self) -> bytes:
+        return self.headers.get(b"content-encoding") or b""
+
+    def chunks(self) -> typing.AsyncIterator[bytes]:
+        """Yields body chunks, decoded per content encoding if enabled."""
+        options = self.options
+        chunks = receive_chunks(self._receive)
+        max_size = options.max_body_size
+        if max_size is not None:
+            length = self.content_length
+            if length is not None and length > max_size:
+                raise HTTPError(413)
+            chunks = limit_chunks(chunks, max_size)
+        if options.decompress:
+            content_encoding = self.content_encoding
+            if content_encoding:
+                chunks = decompress_chunks(
+                    chunks,
+                    content_encoding,
+                    max_size,
+                    options.max_compression_ratio,
                 )
+        return chunks
 
-    async def body(self) -> bytes:
+    async def body(self) -> typing.Union[bytes, bytearray]:
         if not hasattr(self, "_body"):
-            self._body = b"".join([chunk async for chunk in self.chunks()])
+            length = self.content_length
+            if length and not (
+                self.options.decompress and self.content_encoding
+            ):
+                self._body = await read_exactly(self.chunks(), length)
+            else:
+                self._body = b"".join([chunk async for chunk in self.chunks()])
         return self._body
 
+    async def body_file(self) -> MultipartFile:
+        """Spools the body, rolls over to disk above the spool size."""
+        mfw = MultipartFileWriter.from_options(
+            "", self.content_type.decode("latin-1"), self.options
+        )
+        loop = get_running_loop()
+        executor = MultipartFile.executor
+        flush_size = MultipartFileWriter.flush_size
+        pending = bytearray()
+        async for chunk in self.chunks():
+            if pending or mfw.would_roll(len(chunk)):
+                pending += chunk
+                if len(pending) >= flush_size:
+                    await loop.run_in_executor(
+                        executor, mfw.write, bytes(pending)
+                    )
+                    pending.clear()
+            else:
+                mfw.write(chunk)
+        if mfw.would_roll(len(pending)):
+            await loop.run_in_executor(
+                executor,
+                flush_pending_io,
+                [(mfw, bytes(pending)), (mfw, None)],
+            )
+        else:
+            mfw.seek()
+        return mfw.multipart_file()
+
     async def form(self) -> FormParams:
         if not hasattr(self, "_form"):
-            content_type = self.headers.get(b"content-type", b"")
+            content_type = self.content_type
             if b"/x" in content_type:
-                pairs = parse_qsl((await self.body()).decode("utf-8"))
+                options = self.options
+                pairs = await parse_urlencoded(
+                    self.chunks(),
+                    options.max_form_fields,
+                    options.max_form_field_size,
+                )
                 self._form = FormParams(pairs)
             elif b"/f" in content_type:
                 form, files = await parse_multipart(
-                    content_type, self.chunks()
+                    content_type, self.chunks(), self.options
                 )
                 self._form = form
                 self._files = files
@@ -105,10 +209,10 @@ class Request(object):
 
     async def files(self) -> MultipartFiles:
         if not hasattr(self, "_files"):
-            content_type = self.headers.get(b"content-type", b"")
+            content_type = self.content_type
             if b"/f" in content_type:
                 form, files = await parse_multipart(
-                    content_type, self.chunks()
+                    content_type, self.chunks(), self.options
                 )
                 self._form = form
                 self._files = files
@@ -116,7 +220,80 @@ class Request(object):
                 self._files = MultipartFiles([])
         return self._files
 
+    def parts(self) -> typing.AsyncIterator[MultipartPart]:
+        """Yields parts of multipart body as soon as headers are parsed.
+
+        The part data is streamed with ``part.chunks()``, data that is
+        not read is skipped when the next part is requested.
+        """
+        content_type = self.content_type
+        if b"/f" not in content_type:
+            raise HTTPError(415)
+        return parse_parts(content_type, self.chunks(), self.options)
+
     async def json(self) -> typing.Any:
         if not hasattr(self, "_json"):
             self._json = ujson_loads(await self.body())
         return self._json
+
+    def json_items(self, *path: str) -> typing.AsyncIterator[typing.Any]:
+        """Yields elements of a JSON array as the body is received.
+
+        The array is the body itself or is found by following object
+        keys in path, e.g. ``req.json_items("data", "items")``. An
+        element over max_json_item_size option raises HTTPError(413).
+        """
+        return parse_json_items(
+            self.chunks(), path, self.options.max_json_item_size
+        )
+
+
+async def receive_chunks(receive: Receive) -> typing.AsyncIterator[bytes]:
+    while True:
+        message = await receive()
+        if message["type"] == "http.request":
+            chunk = message.get("body")
+            if chunk:
+                yield chunk
+            if not message.get("more_body"):
+                break
+        elif message["type"] == "http.disconnect":
+            raise RuntimeError("http disconnect")
+        else:
+            raise NotImplementedError(
+                f"unexpected message type '{message['type']}'"
+            )
+
+
+async def limit_chunks(
+    chunks: typing.AsyncIterator[bytes], max_size: int
+) -> typing.AsyncIterator[bytes]:
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > max_size:
+            raise HTTPError(413)
+        yield chunk
+
+
+async def read_exactly(
+    chunks: typing.AsyncIterator[bytes], length: int
+) -> typing.Union[bytes, bytearray]:
+    buf: typing.Optional[bytearray] = None
+    view = memoryview(b"")
+    pos = 0
+    async for chunk in chunks:
+        end = pos + len(chunk)
+        if end > length:
+            raise HTTPError(400)
+        if buf is None:
+            if end == length:
+                # the entire body has been received in a single chunk
+                return chunk
+            buf = bytearray(length)
+            view = memoryview(buf)
+        view[pos:end] = chunk
+        pos = end
+    if buf is None or pos != length:
+        raise HTTPError(400)
+    return buf
@@ -0,0 +1,62 @@
+import typing
+
+from slickpy.typing import LifespanSubscriber
+
+T = typing.TypeVar("T")
+
+ResourceFactory = typing.Callable[[], typing.AsyncIterator[T]]
+
+
+class Resource(typing.Generic[T]):
+    """A handle of app scoped resource, e.g. a database pool.
+
+    The factory is an async generator that yields the resource once,
+    the code after yield releases it. The value is set at lifespan
+    startup and is released at lifespan shutdown.
+    """
+
+    def __init__(self, name: str, factory: ResourceFactory[T]) -> None:
+        self.name = name
+        self.factory = factory
+        # lifespan subscribers, referenced by dependent resources
+        self.startup: LifespanSubscriber = self.start
+        self.shutdown: LifespanSubscriber = self.stop
+        self._gen: typing.Optional[typing.AsyncIterator[T]] = None
+        self._value: typing.Optional[T] = None
+
+    def __repr__(self) -> str:
+        return f"Resource({self.name!r})"
+
+    @property
+    def value(self) -> T:
+        if self._gen is None:
+            raise RuntimeError(f"resource {self.name} is not started")
+        return self._value  # type: ignore[return-value]
+
+    def inject(self) -> T:
+        """Marks handler parameter default to be resolved to the value."""
+        return typing.cast(T, self)
+
+    async def start(
+        self,
+        state: typing.Optional[typing.MutableMapping[str, typing.Any]] = None,
+    ) -> None:
+        """Creates the value, which is also stored in lifespan state."""
+        gen = self.factory()
+        self._value = value = await gen.__anext__()
+        self._gen = gen
+        if state is not None:
+            state[self.name] = value
+
+    async def stop(self) -> None:
+        gen = self._gen
+        if gen is None:
+            return
+        self._gen = None
+        self._value = None
+        try:
+            await gen.__anext__()
+        except StopAsyncIteration:
+            pass
+        else:
+            raise RuntimeError(f"resource {self.name} must yield once")
@@ -3,8 +3,11 @@ from base64 import b64encode
 from hashlib import sha1
 
 from slickpy.comp import ujson_dumps
+from slickpy.tasks import Task, defer
 from slickpy.typing import Headers, Receive, Scope, Send
 
+TR = typing.TypeVar("TR", bound="Response")
+
 
 def make_etag(body: bytes) -> bytes:
     length = len(body)
@@ -17,13 +20,24 @@ def make_etag(body: bytes) -> bytes:
 
 
 class Writer(object):
-    __slots__ = ("_send", "headers", "headersSent")
+    __slots__ = ("_send", "_scope", "headers", "headersSent")
 
-    def __init__(self, send: Send):
+    def __init__(self, send: Send, scope: typing.Optional[Scope] = None):
         self._send = send
+        self._scope = scope
         self.headers: Headers = []
         self.headersSent = False
 
+    def defer(
+        self,
+        fn: typing.Callable[..., typing.Awaitable[typing.Any]],
+        *args: typing.Any,
+    ) -> None:
+        """Runs fn(*args) in background after the response is sent."""
+        if self._scope is None:
+            raise RuntimeError("writer is not bound to request scope")
+        defer(self._scope, fn, *args)
+
     async def status(self, code: int) -> None:
         """Sends an HTTP response header with provided status code."""
         self.headersSent = True
@@ -62,10 +76,22 @@ class Writer(object):
 
 
 class Response(object):
-    __slots__ = ("status_code", "headers", "body")
+    __slots__ = ("status_code", "headers", "body", "deferred")
     status_code: int
     headers: Headers
     body: bytes
+    deferred: typing.List[Task]
+
+    def defer(
+        self: TR,
+        fn: typing.Callable[..., typing.Awaitable[typing.Any]],
+        *args: typing.Any,
+    ) -> TR:
+        """Runs fn(*args) in background after the response is sent."""
+        if not hasattr(self, "deferred"):
+            self.deferred = []
+        self.deferred.append((fn, args))
+        return self
 
     async def __call__(
         self, scope: Scope, receive: Receive, send: Send
@@ -73,6 +99,10 @@ class Response(object):
         status_code = self.status_code
         headers = self.headers
         body = self.body
+        # tasks belong to this request, a prebuilt response is reused
+        deferred = getattr(self, "deferred", ())
+        if deferred:
+            del self.deferred
         method = scope["method"]
         no_body = method == "HEAD"
         if status_code == 200 and (no_body or method == "GET"):
@@ -97,6 +127,8 @@ class Response(object):
             await send({"type": "http.response.body"})
         else:
             await send({"type": "http.response.body", "body": body})
+        for fn, args in deferred:
+            defer(scope, fn, *args)
 
 
 class BinaryResponse(Response):
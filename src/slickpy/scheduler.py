@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import random
+import time
+import typing
+
+from slickpy.comp import get_running_loop
+from slickpy.metrics import Metrics
+
+JobCallable = typing.Callable[[], typing.Awaitable[None]]
+
+logger = logging.getLogger("slickpy.scheduler")
+
+
+class Job(object):
+    """Runs fn every seconds, the schedule does not drift.
+
+    A run starts up to jitter seconds late. Unless overlap is set, a
+    run that takes longer than the interval skips the missed runs.
+    """
+
+    def __init__(
+        self,
+        fn: JobCallable,
+        seconds: float,
+        jitter: float = 0.0,
+        overlap: bool = False,
+        metrics: typing.Optional[Metrics] = None,
+    ) -> None:
+        if seconds <= 0:
+            raise ValueError("seconds must be positive")
+        self.fn = fn
+        self.name = "jobs." + getattr(fn, "__qualname__", repr(fn))
+        self.seconds = seconds
+        self.jitter = jitter
+        self.overlap = overlap
+        self.metrics = Metrics() if metrics is None else metrics
+
+    async def run(self) -> None:
+        started = time.perf_counter()
+        try:
+            await self.fn()
+        except Exception:
+            self.metrics.incr(self.name + ".failed")
+            logger.exception("%s failed", self.name)
+        finally:
+            self.metrics.observe(self.name, time.perf_counter() - started)
+
+    async def schedule(self) -> None:
+        loop = get_running_loop()
+        seconds = self.seconds
+        running: typing.Set["asyncio.Future[None]"] = set()
+        next_at = loop.time()
+        try:
+            while True:
+                delay = next_at - loop.time()
+                if self.jitter:
+                    delay += random.uniform(0, self.jitter)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if self.overlap:
+                    task = asyncio.ensure_future(self.run())
+                    running.add(task)
+                    task.add_done_callback(running.discard)
+                else:
+                    await self.run()
+                next_at += seconds
+                late = loop.time() - next_at
+                if late > 0:
+                    skipped = int(late // seconds) + 1
+                    self.metrics.incr(self.name + ".skipped", skipped)
+                    next_at += skipped * seconds
+        finally:
+            for run in running:
+                run.cancel()
+
+
+class Scheduler(object):
+    """Runs jobs from lifespan startup complete until shutdown."""
+
+    def __init__(self) -> None:
+        self.jobs: typing.List[Job] = []
+        self.tasks: typing.List["asyncio.Future[None]"] = []
+
+    def add(self, job: Job) -> None:
+        self.jobs.append(job)
+
+    async def start(self) -> None:
+        self.tasks = [asyncio.ensure_future(j.schedule()) for j in self.jobs]
+
+    async def stop(self) -> None:
+        tasks = self.tasks
+        self.tasks = []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
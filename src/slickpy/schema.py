@@ -0,0 +1,340 @@
+import dataclasses
+import sys
+import types
+import typing
+from functools import lru_cache
+
+from slickpy.typing import HTTPError
+
+T = typing.TypeVar("T")
+
+Errors = typing.Dict[str, str]
+Converter = typing.Callable[[typing.Any, Errors, str], typing.Any]
+Loader = typing.Callable[[typing.Any], typing.Any]
+
+MISSING: typing.Any = object()
+OMIT: typing.Any = object()
+NoneType = type(None)
+if sys.version_info >= (3, 10):
+    # X | Y creates types.UnionType, not typing.Union
+    UNIONS = frozenset((typing.Union, types.UnionType))
+else:  # pragma: nocover
+    UNIONS = frozenset((typing.Union,))
+
+
+class ValidationError(HTTPError):
+    def __init__(self, errors: Errors) -> None:
+        super().__init__(400, {"errors": errors})
+        self.errors = errors
+
+
+class Source(object):
+    """Marks where a handler parameter is taken from."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"Source({self.name!r})"
+
+
+BODY = Source("body")
+QUERY = Source("query")
+HEADER = Source("header")
+
+Body = typing.Annotated[T, BODY]
+Query = typing.Annotated[T, QUERY]
+Header = typing.Annotated[T, HEADER]
+
+
+def is_model(tp: typing.Any) -> bool:
+    return isinstance(tp, type) and (
+        dataclasses.is_dataclass(tp)
+        or (issubclass(tp, dict) and hasattr(tp, "__required_keys__"))
+    )
+
+
+@lru_cache(maxsize=None)
+def compile_model(tp: typing.Type[T], query: bool = False) -> Loader:
+    """Compiles a loader that validates and converts data into tp.
+
+    The data is either a decoded JSON object or, if query is set,
+    QueryParams. The loader raises ValidationError with all errors.
+    """
+    if not is_model(tp):
+        raise TypeError(f"{tp!r} is not a dataclass or TypedDict")
+    conv = model_converter(tp, query)
+
+    def load(data: typing.Any) -> typing.Any:
+        errors: Errors = {}
+        value = conv(data, errors, "")
+        if errors:
+            raise ValidationError(errors)
+        return value
+
+    return load
+
+
+def compile_value(
+    name: str,
+    tp: typing.Any,
+    default: typing.Any = MISSING,
+    key: typing.Any = None,
+) -> Loader:
+    """Compiles a loader of a single value by key from mapping.
+
+    The mapping is route params, QueryParams or RequestHeaders, bytes
+    values are decoded as latin-1. A list type takes all values.
+    """
+    conv = compile_converter(tp, query=True)
+    if key is None:
+        key = name
+    if default is MISSING and optional(tp):
+        default = None
+    many = typing.get_origin(tp) is list
+    binary = isinstance(key, bytes)
+
+    def load(data: typing.Any) -> typing.Any:
+        value = data.getlist(key) if many else data.get(key)
+        if not value:
+            if default is MISSING:
+                raise ValidationError({name: "is required"})
+            return default
+        if binary:
+            value = (
+                [v.decode("latin-1") for v in value]
+                if many
+                else value.decode("latin-1")
+            )
+        errors: Errors = {}
+        value = conv(value, errors, name)
+        if errors:
+            raise ValidationError(errors)
+        return value
+
+    return load
+
+
+def compile_converter(tp: typing.Any, query: bool) -> Converter:
+    if tp is typing.Any:
+        return any_converter
+    if is_model(tp) and not query:
+        return model_converter(tp, query)
+    origin = typing.get_origin(tp)
+    args = typing.get_args(tp)
+    if origin in UNIONS and len(args) == 2 and NoneType in args:
+        return optional_converter(
+            compile_converter(args[args[0] is NoneType], query)
+        )
+    if origin is list:
+        return list_converter(args[0] if args else typing.Any, query)
+    if tp in SCALARS:
+        return (query_converters if query else json_converters)[tp]
+    raise TypeError(f"unsupported type {tp!r}")
+
+
+def any_converter(value: typing.Any, errors: Errors, path: str) -> typing.Any:
+    return value
+
+
+def optional_converter(conv: Converter) -> Converter:
+    def optional(value: typing.Any, errors: Errors, path: str) -> typing.Any:
+        return None if value is None else conv(value, errors, path)
+
+    return optional
+
+
+def list_converter(item_tp: typing.Any, query: bool) -> Converter:
+    conv = compile_converter(item_tp, query)
+    # scalar items are type checked in place without copying the list
+    exact = None if query or item_tp is float else SCALARS.get(item_tp)
+
+    def list_(value: typing.Any, errors: Errors, path: str) -> typing.Any:
+        if type(value) is not list:
+            errors[path] = "must be an array"
+            return None
+        if exact is not None:
+            for item in value:
+                if type(item) is not item_tp:
+                    break
+            else:
+                return value
+        return [
+            conv(item, errors, f"{path}[{i}]") for i, item in enumerate(value)
+        ]
+
+    return list_
+
+
+SCALARS: typing.Dict[typing.Any, str] = {
+    str: "a string",
+    int: "an integer",
+    float: "a number",
+    bool: "a boolean",
+}
+
+
+def json_converter(tp: typing.Any) -> Converter:
+    message = "must be " + SCALARS[tp]
+
+    def conv(value: typing.Any, errors: Errors, path: str) -> typing.Any:
+        if type(value) is tp:
+            return value
+        if tp is float and type(value) is int:
+            return float(value)
+        errors[path] = message
+        return None
+
+    return conv
+
+
+def query_converter(tp: typing.Any) -> Converter:
+    message = "must be " + SCALARS[tp]
+
+    def conv(value: typing.Any, errors: Errors, path: str) -> typing.Any:
+        try:
+            return tp(value)
+        except ValueError:
+            errors[path] = message
+            return None
+
+    return conv
+
+
+BOOLEANS = {
+    "1": True,
+    "true": True,
+    "on": True,
+    "yes": True,
+    "0": False,
+    "false": False,
+    "off": False,
+    "no": False,
+}
+
+
+def query_bool(value: typing.Any, errors: Errors, path: str) -> typing.Any:
+    b = BOOLEANS.get(value.lower())
+    if b is None:
+        errors[path] = "must be a boolean"
+    return b
+
+
+json_converters = {tp: json_converter(tp) for tp in SCALARS}
+query_converters = {tp: query_converter(tp) for tp in SCALARS}
+query_converters[str] = any_converter
+query_converters[bool] = query_bool
+
+
+# region: model code generation
+
+
+class Field(object):
+    __slots__ = ("name", "tp", "default", "factory", "init")
+
+    def __init__(
+        self,
+        name: str,
+        tp: typing.Any,
+        default: typing.Any = MISSING,
+        factory: typing.Any = MISSING,
+        init: bool = True,
+    ) -> None:
+        self.name = name
+        self.tp = tp
+        self.default = default
+        self.factory = factory
+        self.init = init
+
+
+def model_fields(tp: typing.Any) -> typing.List[Field]:
+    hints = typing.get_type_hints(tp)
+    if dataclasses.is_dataclass(tp):
+        return [
+            Field(
+                f.name,
+                hints[f.name],
+                none_if_missing(f.default),
+                none_if_missing(f.default_factory),
+                f.init,
+            )
+            for f in dataclasses.fields(tp)
+        ]
+    return [
+        Field(name, t, MISSING if name in tp.__required_keys__ else OMIT)
+        for name, t in hints.items()
+    ]
+
+
+def model_converter(tp: typing.Any, query: bool) -> Converter:
+    fields = [f for f in model_fields(tp) if f.init]
+    ns: typing.Dict[str, typing.Any] = {"MISSING": MISSING, "cls": tp}
+    lines = ["def load(data, errors, path):"]
+    if not query:
+        lines += [
+            "    if type(data) is not dict:",
+            "        errors[path] = 'must be an object'",
+            "        return None",
+        ]
+    lines += ["    n = len(errors)", "    p = path + '.' if path else ''"]
+    for i, f in enumerate(fields):
+        lines += field_lines(i, f, query, ns)
+    lines.append("    if len(errors) != n:")
+    lines.append("        return None")
+    if dataclasses.is_dataclass(tp):
+        args = ", ".join(f"{f.name}=f{i}" for i, f in enumerate(fields))
+        lines.append(f"    return cls({args})")
+    else:
+        lines.append("    obj = {}")
+        for i, f in enumerate(fields):
+            if f.default is OMIT:
+                lines.append(f"    if f{i} is not MISSING:")
+                lines.append(f"        obj[{f.name!r}] = f{i}")
+            else:
+                lines.append(f"    obj[{f.name!r}] = f{i}")
+        lines.append("    return obj")
+    exec("\n".join(lines), ns)
+    return ns["load"]  # type: ignore[no-any-return]
+
+
+def field_lines(
+    i: int, f: Field, query: bool, ns: typing.Dict[str, typing.Any]
+) -> typing.List[str]:
+    name = repr(f.name)
+    if query and typing.get_origin(f.tp) is list:
+        lines = [f"    v = data.getlist({name}) or MISSING"]
+    else:
+        lines = [f"    v = data.get({name}, MISSING)"]
+    lines.append("    if v is MISSING:")
+    if f.factory is not MISSING:
+        ns[f"factory{i}"] = f.factory
+        lines.append(f"        v = factory{i}()")
+    elif f.default is OMIT:
+        lines.append("        pass")
+    elif f.default is not MISSING or optional(f.tp):
+        ns[f"default{i}"] = None if f.default is MISSING else f.default
+        lines.append(f"        v = default{i}")
+    else:
+        lines.append(f"        errors[p + {name}] = 'is required'")
+    if not query and f.tp in (str, int, bool):
+        # inline the most common checks
+        lines.append(f"    elif type(v) is not {f.tp.__name__}:")
+        lines.append(f"        errors[p + {name}] = 'must be {SCALARS[f.tp]}'")
+    elif not (query and f.tp is str):
+        ns[f"conv{i}"] = compile_converter(f.tp, query)
+        lines.append("    else:")
+        lines.append(f"        v = conv{i}(v, errors, p + {name})")
+    lines.append(f"    f{i} = v")
+    return lines
+
+
+def none_if_missing(value: typing.Any) -> typing.Any:
+    return MISSING if value is dataclasses.MISSING else value
+
+
+def optional(tp: typing.Any) -> bool:
+    return typing.get_origin(tp) in UNIONS and NoneType in (
+        typing.get_args(tp)
+    )
@@ -0,0 +1,749 @@
+import argparse
+import asyncio
+import importlib
+import logging
+import re
+import signal
+import socket
+import typing
+from collections import deque
+from http import HTTPStatus
+from urllib.parse import unquote
+
+from slickpy.comp import get_running_loop, uvloop
+from slickpy.typing import ASGICallable, Headers, Message, Scope
+
+logger = logging.getLogger("slickpy.server")
+
+ASGI = {"version": "3.0", "spec_version": "2.3"}
+MAX_HEAD_SIZE = 64 * 1024
+# request body buffered before reading from the socket is paused
+HIGH_WATER = 256 * 1024
+MAX_PIPELINE = 16
+CHUNK_SIZE = re.compile(rb"[0-9A-Fa-f]{1,16}")
+
+STATUS_LINES: typing.Dict[int, bytes] = {
+    s.value: f"HTTP/1.1 {s.value} {s.phrase}\r\n".encode("latin-1")
+    for s in HTTPStatus
+}
+NO_BODY_STATUS = frozenset((204, 304))
+
+# raw header names as sent by clients mapped to interned lowercase
+HEADER_NAMES: typing.Dict[bytes, bytes] = {}
+for name in (
+    b"accept",
+    b"accept-encoding",
+    b"accept-language",
+    b"authorization",
+    b"cache-control",
+    b"connection",
+    b"content-length",
+    b"content-type",
+    b"cookie",
+    b"expect",
+    b"host",
+    b"if-modified-since",
+    b"if-none-match",
+    b"origin",
+    b"pragma",
+    b"referer",
+    b"transfer-encoding",
+    b"upgrade-insecure-requests",
+    b"user-agent",
+    b"x-forwarded-for",
+    b"x-forwarded-proto",
+    b"x-real-ip",
+    b"x-request-id",
+):
+    HEADER_NAMES[name] = HEADER_NAMES[name.title()] = name
+
+
+def parse_head(
+    head: bytes,
+) -> typing.Tuple[str, bytes, bytes, Headers]:
+    """Parses request line and headers, raises ValueError if invalid."""
+    lines = head.split(b"\r\n")
+    method, target, version = lines[0].split(b" ")
+    if version != b"HTTP/1.1" and version != b"HTTP/1.0":
+        raise ValueError(f"unsupported version {version!r}")
+    headers: Headers = []
+    append = headers.append
+    get = HEADER_NAMES.get
+    for line in lines[1:]:
+        name, sep, value = line.partition(b":")
+        if not sep or not name or name[-1] in b" \t":
+            raise ValueError(f"invalid header {line!r}")
+        append((get(name) or name.lower(), value.strip()))
+    return method.decode("ascii"), target, version, headers
+
+
+def connection(value: bytes, keep_alive: bool) -> bool:
+    tokens = [t.strip() for t in value.lower().split(b",")]
+    if b"close" in tokens:
+        return False
+    return keep_alive or b"keep-alive" in tokens
+
+
+def content_length(value: bytes) -> int:
+    if not value.isdigit():
+        raise ValueError(f"invalid content length {value!r}")
+    return int(value)
+
+
+def transfer_encoding(value: bytes) -> "ChunkedReader":
+    if value.lower() != b"chunked":
+        raise ValueError(f"unsupported transfer encoding {value!r}")
+    return ChunkedReader()
+
+
+def status_line(status: int) -> bytes:
+    line = STATUS_LINES.get(status)
+    if line is None:
+        line = b"HTTP/1.1 %d \r\n" % status
+    return line
+
+
+class ChunkedReader(object):
+    """Decodes chunked transfer encoding of a request body."""
+
+    __slots__ = ("size", "trailers")
+
+    def __init__(self) -> None:
+        # -1 expects size line, -2 expects CRLF after chunk data
+        self.size = -1
+        self.trailers = False
+
+    def feed(self, buf: bytearray) -> typing.Tuple[bytes, bool]:
+        """Consumes buf, returns decoded data and whether body is done."""
+        out: typing.List[bytes] = []
+        while True:
+            if self.size > 0:
+                if not buf:
+                    break
+                n = min(self.size, len(buf))
+                out.append(bytes(buf[:n]))
+                del buf[:n]
+                self.size -= n
+                if not self.size:
+                    self.size = -2
+                continue
+            i = buf.find(b"\r\n")
+            if i < 0:
+                if len(buf) > 4096:
+                    raise ValueError("chunk line is too long")
+                break
+            line = bytes(buf[:i])
+            del buf[: i + 2]
+            if self.line(line):
+                return b"".join(out), True
+        return b"".join(out), False
+
+    def line(self, line: bytes) -> bool:
+        if self.size == -2:
+            if line:
+                raise ValueError("missing chunk terminator")
+            self.size = -1
+        elif self.trailers:
+            return not line
+        else:
+            value = line.split(b";", 1)[0]
+            if not CHUNK_SIZE.fullmatch(value):
+                raise ValueError(f"invalid chunk size {value!r}")
+            size = int(value, 16)
+            if size:
+                self.size = size
+            else:
+                self.trailers = True
+        return False
+
+
+class Cycle(object):
+    """A single request and response exchange on a connection."""
+
+    def __init__(
+        self,
+        protocol: "HTTPProtocol",
+        scope: Scope,
+        keep_alive: bool,
+        has_body: bool,
+        expect_continue: bool,
+    ) -> None:
+        self.protocol = protocol
+        self.scope = scope
+        self.keep_alive = keep_alive
+        self.expect_continue = expect_continue
+        self.chunks: typing.List[bytes] = []
+        self.buffered = 0
+        self.complete = not has_body
+        self.delivered = False
+        self.disconnected = False
+        self.waiter: typing.Optional["asyncio.Future[None]"] = None
+        self.status = 0
+        self.headers: Headers = []
+        self.started = False
+        self.head_sent = False
+        self.chunked = False
+        self.no_body = scope["method"] == "HEAD"
+        self.finished = False
+
+    def feed(self, data: bytes, complete: bool) -> None:
+        if data:
+            self.chunks.append(data)
+            self.buffered += len(data)
+        self.complete = complete
+        self.wake()
+
+    def disconnect(self) -> None:
+        self.disconnected = True
+        self.wake()
+
+    def wake(self) -> None:
+        waiter = self.waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def receive(self) -> Message:
+        while not self.disconnected:
+            if not self.delivered:
+                if self.chunks or self.complete:
+                    return self.take()
+                if self.expect_continue:
+                    self.expect_continue = False
+                    if not self.head_sent:
+                        self.protocol.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            elif self.finished:
+                break
+            self.waiter = self.protocol.loop.create_future()
+            try:
+                await self.waiter
+            finally:
+                self.waiter = None
+        return {"type": "http.disconnect"}
+
+    def take(self) -> Message:
+        chunks = self.chunks
+        body = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+        chunks.clear()
+        self.buffered = 0
+        self.delivered = self.complete
+        self.protocol.resume_reading()
+        return {
+            "type": "http.request",
+            "body": body,
+            "more_body": not self.complete,
+        }
+
+    async def send(self, message: Message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            if self.started:
+                raise RuntimeError("response has already started")
+            self.started = True
+            self.status = message["status"]
+            self.headers = message.get("headers") or []
+        elif kind == "http.response.body":
+            if not self.started or self.finished:
+                raise RuntimeError("unexpected http.response.body")
+            await self.write(
+                message.get("body", b""), message.get("more_body", False)
+            )
+        else:
+            raise RuntimeError(f"unexpected message type '{kind}'")
+
+    async def write(self, body: bytes, more: bool) -> None:
+        protocol = self.protocol
+        head = b"" if self.head_sent else self.head(body, more)
+        if self.no_body:
+            body = b""
+        elif self.chunked:
+            if body:
+                body = b"%x\r\n%b\r\n" % (len(body), body)
+            if not more:
+                body += b"0\r\n\r\n"
+        # the head and a prebuilt body usually go in a single write
+        if head:
+            protocol.write(head + body if len(body) < 65536 else head)
+            if len(body) >= 65536:
+                protocol.write(body)
+        elif body:
+            protocol.write(body)
+        if not more:
+            self.finished = True
+            self.wake()
+        await protocol.drain()
+
+    def head(self, body: bytes, more: bool) -> bytes:
+        self.head_sent = True
+        status = self.status
+        parts = [status_line(status)]
+        length = False
+        for name, value in self.headers:
+            if name == b"content-length":
+                length = True
+            parts += (name, b": ", value, b"\r\n")
+        if status in NO_BODY_STATUS or status < 200:
+            self.no_body = True
+        elif not length:
+            if not more:
+                parts.append(b"content-length: %d\r\n" % len(body))
+            elif self.scope["http_version"] == "1.0":
+                # HTTP/1.0 has no chunked encoding, the body ends on close
+                self.keep_alive = False
+            else:
+                self.chunked = True
+                parts.append(b"transfer-encoding: chunked\r\n")
+        if not self.keep_alive:
+            parts.append(b"connection: close\r\n")
+        parts.append(b"\r\n")
+        return b"".join(parts)
+
+
+class HTTPProtocol(asyncio.Protocol):
+    """HTTP/1.1 connection with keep-alive and pipelining.
+
+    Pipelined requests are parsed ahead and handled one at a time, so
+    responses are written in order.
+    """
+
+    def __init__(
+        self,
+        app: ASGICallable,
+        state: typing.Dict[str, typing.Any],
+        connections: typing.Set["HTTPProtocol"],
+        keepalive_timeout: float = 5.0,
+    ) -> None:
+        self.app = app
+        self.state = state
+        self.connections = connections
+        self.keepalive_timeout = keepalive_timeout
+        self.loop = get_running_loop()
+        self.transport: typing.Optional[asyncio.Transport] = None
+        self.server: typing.Optional[typing.Tuple[str, int]] = None
+        self.client: typing.Optional[typing.Tuple[str, int]] = None
+        self.buf = bytearray()
+        self.pipeline: typing.Deque[Cycle] = deque()
+        self.cycle: typing.Optional[Cycle] = None
+        self.reading: typing.Optional[Cycle] = None
+        self.remaining = 0
+        self.chunked: typing.Optional[ChunkedReader] = None
+        self.closed = False
+        self.closing = False
+        self.read_paused = False
+        self.writable = asyncio.Event()
+        self.writable.set()
+        self.timer: typing.Optional[asyncio.TimerHandle] = None
+
+    # region: asyncio.Protocol
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = typing.cast(asyncio.Transport, transport)
+        self.server = address(transport.get_extra_info("sockname"))
+        self.client = address(transport.get_extra_info("peername"))
+        self.connections.add(self)
+        self.idle()
+
+    def connection_lost(self, exc: typing.Optional[Exception]) -> None:
+        self.closed = True
+        self.connections.discard(self)
+        self.cancel_timer()
+        if self.cycle is not None:
+            self.cycle.disconnect()
+        self.pipeline.clear()
+        self.writable.set()
+
+    def data_received(self, data: bytes) -> None:
+        if self.closing:
+            return
+        self.buf += data
+        try:
+            self.parse()
+        except ValueError as ex:
+            logger.debug("bad request: %s", ex)
+            self.bad_request()
+        # the idle timer also limits the time to read a request head
+        if self.cycle is not None or self.reading is not None:
+            self.cancel_timer()
+
+    def pause_writing(self) -> None:
+        self.writable.clear()
+
+    def resume_writing(self) -> None:
+        self.writable.set()
+
+    # region: parsing
+
+    def parse(self) -> None:
+        while self.buf and not self.closing:
+            if self.reading is not None:
+                if not self.read_body(self.reading):
+                    break
+            elif not self.read_head():
+                break
+
+    def read_head(self) -> bool:
+        buf = self.buf
+        i = buf.find(b"\r\n\r\n")
+        if i < 0:
+            if len(buf) > MAX_HEAD_SIZE:
+                raise ValueError("request head is too large")
+            return False
+        head = bytes(buf[:i])
+        del buf[: i + 4]
+        self.pipeline.append(self.new_cycle(head))
+        if self.cycle is None:
+            self.run_next()
+        elif len(self.pipeline) > MAX_PIPELINE:
+            self.pause_reading()
+        return True
+
+    def new_cycle(self, head: bytes) -> Cycle:
+        method, target, version, headers = parse_head(head)
+        keep_alive = version == b"HTTP/1.1"
+        length: typing.Optional[int] = None
+        expect_continue = False
+        for name, value in headers:
+            if name == b"connection":
+                keep_alive = connection(value, keep_alive)
+            elif name == b"content-length":
+                # the app must not see a different length than framed
+                n = content_length(value)
+                if length is not None and n != length:
+                    raise ValueError("conflicting content lengths")
+                length = n
+            elif name == b"transfer-encoding":
+                self.chunked = transfer_encoding(value)
+            elif name == b"expect":
+                expect_continue = value.lower() == b"100-continue"
+        if length is not None and self.chunked is not None:
+            raise ValueError("both content length and transfer encoding")
+        has_body = bool(length) or self.chunked is not None
+        cycle = Cycle(
+            self,
+            self.new_scope(method, target, version, headers),
+            keep_alive,
+            has_body,
+            expect_continue,
+        )
+        if has_body:
+            self.reading = cycle
+            self.remaining = length or 0
+        return cycle
+
+    def new_scope(
+        self, method: str, target: bytes, version: bytes, headers: Headers
+    ) -> Scope:
+        raw_path, _, query_string = target.partition(b"?")
+        path = raw_path.decode("latin-1")
+        if "%" in path:
+            path = unquote(path)
+        return {
+            "type": "http",
+            "asgi": ASGI,
+            "http_version": "1.1" if version == b"HTTP/1.1" else "1.0",
+            "server": self.server,
+            "client": self.client,
+            "scheme": "http",
+            "method": method,
+            "root_path": "",
+            "path": path,
+            "raw_path": raw_path,
+            "query_string": query_string,
+            "headers": headers,
+            "state": self.state.copy(),
+        }
+
+    def read_body(self, cycle: Cycle) -> bool:
+        buf = self.buf
+        if self.chunked is not None:
+            data, done = self.chunked.feed(buf)
+        else:
+            data = bytes(buf[: self.remaining])
+            del buf[: len(data)]
+            self.remaining -= len(data)
+            done = not self.remaining
+        cycle.feed(data, done)
+        if done:
+            self.reading = None
+            self.chunked = None
+        elif cycle.buffered > HIGH_WATER:
+            self.pause_reading()
+        return done
+
+    # region: handling
+
+    def run_next(self) -> None:
+        if self.pipeline and not self.closing:
+            cycle = self.cycle = self.pipeline.popleft()
+            self.loop.create_task(self.run(cycle))
+            if len(self.pipeline) <= MAX_PIPELINE:
+                self.resume_reading()
+            return
+        self.cycle = None
+        if self.closing and self.transport is not None:
+            self.transport.close()
+        else:
+            self.resume_reading()
+            self.idle()
+
+    async def run(self, cycle: Cycle) -> None:
+        try:
+            await self.app(cycle.scope, cycle.receive, cycle.send)
+        except Exception:
+            logger.exception("error handling request")
+        if not cycle.finished:
+            cycle.keep_alive = False
+            if not cycle.head_sent and not self.closed:
+                self.error(500)
+        if not cycle.keep_alive or self.reading is cycle:
+            self.closing = True
+        self.run_next()
+
+    def error(self, status: int) -> None:
+        self.closing = True
+        self.write(
+            status_line(status)
+            + b"content-length: 0\r\nconnection: close\r\n\r\n"
+        )
+
+    def bad_request(self) -> None:
+        reading = self.reading
+        self.buf.clear()
+        self.pipeline.clear()
+        self.reading = None
+        self.chunked = None
+        if self.cycle is None:
+            self.error(400)
+            self.run_next()
+        elif reading is self.cycle:
+            # the handler waits for a body that never completes
+            if not reading.head_sent:
+                self.error(400)
+            self.abort()
+        else:
+            # the response in progress completes before closing
+            self.closing = True
+
+    def abort(self) -> None:
+        self.closing = self.closed = True
+        if self.cycle is not None:
+            self.cycle.disconnect()
+        if self.transport is not None:
+            self.transport.close()
+
+    def shutdown(self) -> None:
+        """Closes the connection once the current response completes."""
+        self.closing = True
+        self.pipeline.clear()
+        if self.cycle is None and self.transport is not None:
+            self.transport.close()
+
+    # region: transport
+
+    def write(self, data: bytes) -> None:
+        if not self.closed and self.transport is not None:
+            self.transport.write(data)
+
+    async def drain(self) -> None:
+        if not self.writable.is_set():
+            await self.writable.wait()
+
+    def pause_reading(self) -> None:
+        if not self.read_paused and self.transport is not None:
+            self.read_paused = True
+            self.transport.pause_reading()
+
+    def resume_reading(self) -> None:
+        if self.read_paused and not self.closed:
+            self.read_paused = False
+            if self.transport is not None:
+                self.transport.resume_reading()
+            if self.buf:
+                self.loop.call_soon(self.data_received, b"")
+
+    def idle(self) -> None:
+        self.cancel_timer()
+        self.timer = self.loop.call_later(
+            self.keepalive_timeout, self.shutdown
+        )
+
+    def cancel_timer(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+
+def address(info: typing.Any) -> typing.Optional[typing.Tuple[str, int]]:
+    # unix sockets have no host and port
+    if isinstance(info, tuple):
+        return info[0], info[1]
+    return None
+
+
+class LifespanCycle(object):
+    """Sends lifespan events to the app and waits for replies."""
+
+    def __init__(
+        self, app: ASGICallable, state: typing.Dict[str, typing.Any]
+    ) -> None:
+        self.app = app
+        self.state = state
+        # queues are bound to the running loop, see startup
+        self.events: "typing.Optional[asyncio.Queue[Message]]" = None
+        self.replies: "typing.Optional[asyncio.Queue[Message]]" = None
+        self.supported = True
+        self.task: typing.Optional["asyncio.Future[None]"] = None
+
+    async def startup(self) -> None:
+        self.events = asyncio.Queue()
+        self.replies = asyncio.Queue()
+        self.task = asyncio.ensure_future(self.main())
+        await self.call("lifespan.startup")
+
+    async def shutdown(self) -> None:
+        await self.call("lifespan.shutdown")
+        if self.task is not None:
+            await self.task
+
+    async def main(self) -> None:
+        events, replies = self.events, self.replies
+        assert events is not None and replies is not None
+        scope = {"type": "lifespan", "asgi": ASGI, "state": self.state}
+        try:
+            await self.app(scope, events.get, replies.put)
+        except Exception:
+            logger.debug("lifespan is not supported", exc_info=True)
+            self.supported = False
+            replies.put_nowait({"type": "lifespan.unsupported"})
+
+    async def call(self, event: str) -> None:
+        events, replies = self.events, self.replies
+        if not self.supported or events is None or replies is None:
+            return
+        events.put_nowait({"type": event})
+        reply = await replies.get()
+        if reply["type"] == event + ".failed":
+            raise RuntimeError(reply.get("message") or f"{event} failed")
+
+
+class Server(object):
+    """Serves ASGI app over HTTP/1.1 on TCP or Unix domain socket.
+
+    The app lifespan is run around serving, connections are closed
+    once in-flight responses complete on stop. Websockets are not
+    supported.
+    """
+
+    def __init__(
+        self,
+        app: ASGICallable,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        *,
+        uds: typing.Optional[str] = None,
+        sock: typing.Optional[socket.socket] = None,
+        backlog: int = 2048,
+        keepalive_timeout: float = 5.0,
+    ) -> None:
+        self.app = app
+        self.host = host
+        self.port = port
+        self.uds = uds
+        self.sock = sock
+        self.backlog = backlog
+        self.keepalive_timeout = keepalive_timeout
+        self.state: typing.Dict[str, typing.Any] = {}
+        self.lifespan = LifespanCycle(app, self.state)
+        self.connections: typing.Set[HTTPProtocol] = set()
+        self.server: typing.Optional[asyncio.Server] = None
+
+    def protocol(self) -> HTTPProtocol:
+        return HTTPProtocol(
+            self.app, self.state, self.connections, self.keepalive_timeout
+        )
+
+    async def start(self) -> None:
+        await self.lifespan.startup()
+        loop = get_running_loop()
+        if self.sock is not None:
+            self.server = await loop.create_server(
+                self.protocol, sock=self.sock, backlog=self.backlog
+            )
+        elif self.uds:
+            self.server = await loop.create_unix_server(
+                self.protocol, self.uds, backlog=self.backlog
+            )
+        else:
+            self.server = await loop.create_server(
+                self.protocol, self.host, self.port, backlog=self.backlog
+            )
+        for s in self.server.sockets:
+            logger.info("listening on %s", s.getsockname())
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+        for c in list(self.connections):
+            c.shutdown()
+        # the app drains in-flight requests on lifespan shutdown
+        await self.lifespan.shutdown()
+        for c in list(self.connections):
+            if c.transport is not None:
+                c.transport.abort()
+        if self.server is not None:
+            await self.server.wait_closed()
+            self.server = None
+
+    async def serve(self) -> None:
+        """Serves until SIGINT or SIGTERM is received."""
+        stop = asyncio.Event()
+        loop = get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):  # pragma: nocover
+                pass
+        await self.start()
+        try:
+            await stop.wait()
+        finally:
+            await self.stop()
+
+
+def run(
+    app: ASGICallable,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    **options: typing.Any,
+) -> None:
+    """Runs server on uvloop if it is installed."""
+    server = Server(app, host, port, **options)
+    if uvloop is not None:
+        uvloop.run(server.serve())
+    else:
+        asyncio.run(server.serve())
+
+
+def load_app(path: str) -> ASGICallable:
+    """Imports module:attribute, an App or ASGI callable."""
+    module, _, attr = path.partition(":")
+    app = getattr(importlib.import_module(module), attr or "main")
+    if hasattr(app, "asgi"):
+        app = app.asgi()
+    return typing.cast(ASGICallable, app)
+
+
+def main(args: typing.Optional[typing.Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m slickpy.server", description="Runs an ASGI app."
+    )
+    parser.add_argument("app", help="module:attribute, e.g. app:main")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--uds", help="bind to a Unix domain socket")
+    ns = parser.parse_args(args)
+    logging.basicConfig(level=logging.INFO)
+    run(load_app(ns.app), ns.host, ns.port, uds=ns.uds)
+
+
+if __name__ == "__main__":  # pragma: nocover
+    main()
@@ -0,0 +1,231 @@
+import mmap
+import multiprocessing
+import multiprocessing.synchronize
+import struct
+import time
+import typing
+from hashlib import blake2b
+
+from slickpy.resource import Resource
+
+if typing.TYPE_CHECKING:  # pragma: nocover
+    from slickpy.application import App
+
+# seq, ref, key length, value length, key hash, expires
+SLOT = struct.Struct("<IBxHIQd4x")
+SEQ = struct.Struct("<I")
+RETRIES = 16
+
+
+def key_hash(key: bytes) -> int:
+    """Hashes key the same way in every process, 0 marks empty slot."""
+    h = int.from_bytes(blake2b(key, digest_size=8).digest(), "little")
+    return h or 1
+
+
+class ShmCache(object):
+    """A fixed-size hash table of byte values in shared memory.
+
+    The cache must be created before workers are forked. A key maps to
+    a bucket of ways slots, reads are lock-free and retry while the
+    slot sequence changes, writers take the lock of the bucket stripe.
+    A full bucket evicts by CLOCK, entries read since are kept. A write
+    is skipped if the lock is not taken within lock timeout, e.g. a
+    worker killed while holding it.
+    """
+
+    def __init__(
+        self,
+        slots: int = 4096,
+        slot_size: int = 512,
+        *,
+        ways: int = 8,
+        stripes: int = 64,
+        lock_timeout: float = 0.01,
+    ) -> None:
+        if not 0 < ways < 256:
+            raise ValueError("ways must be between 1 and 255")
+        if slot_size <= SLOT.size:
+            raise ValueError(f"slot size must be greater than {SLOT.size}")
+        self.ways = ways
+        self.slot_size = slot_size
+        self.max_size = slot_size - SLOT.size
+        self.buckets = -(-slots // ways)
+        self.bucket_size = ways * slot_size
+        # a byte per bucket keeps the position of CLOCK hand
+        self.hands = 0
+        self.table = self.hands + self.buckets
+        self.mm = mmap.mmap(-1, self.table + self.buckets * self.bucket_size)
+        self.locks = [multiprocessing.Lock() for _ in range(stripes)]
+        self.lock_timeout = lock_timeout
+        self.hits = 0
+        self.misses = 0
+        self.lock_timeouts = 0
+
+    def get(
+        self, key: bytes, default: typing.Optional[bytes] = None
+    ) -> typing.Optional[bytes]:
+        h = key_hash(key)
+        start = self.table + (h % self.buckets) * self.bucket_size
+        for off in range(start, start + self.bucket_size, self.slot_size):
+            value = self.read(off, h, key)
+            if value is not None:
+                self.hits += 1
+                return value
+        self.misses += 1
+        return default
+
+    def read(self, off: int, h: int, key: bytes) -> typing.Optional[bytes]:
+        mm = self.mm
+        for _ in range(RETRIES):
+            seq, ref, klen, vlen, slot_hash, expires = SLOT.unpack_from(
+                mm, off
+            )
+            if slot_hash != h:
+                return None
+            if seq & 1:
+                continue
+            start = off + SLOT.size
+            end = start + klen + vlen
+            data = mm[start:end]
+            if SEQ.unpack_from(mm, off)[0] != seq:
+                continue
+            if data[:klen] != key or (expires and expires < time.monotonic()):
+                return None
+            if not ref:
+                mm[off + 4] = 1
+            return data[klen:]
+        return None
+
+    def set(
+        self, key: bytes, value: bytes, ttl: typing.Optional[float] = None
+    ) -> bool:
+        """Stores value, returns False if it does not fit in a slot."""
+        if len(key) + len(value) > self.max_size:
+            return False
+        h = key_hash(key)
+        bucket = h % self.buckets
+        expires = time.monotonic() + ttl if ttl else 0.0
+        lock = self.acquire(bucket)
+        if lock is None:
+            return False
+        try:
+            off = self.find(bucket, h, key)
+            if off < 0:
+                off = self.evict(bucket)
+            self.write(off, h, key, value, expires)
+        finally:
+            lock.release()
+        return True
+
+    def delete(self, key: bytes) -> bool:
+        h = key_hash(key)
+        bucket = h % self.buckets
+        lock = self.acquire(bucket)
+        if lock is None:
+            return False
+        try:
+            off = self.find(bucket, h, key)
+            if off < 0 or SLOT.unpack_from(self.mm, off)[4] != h:
+                return False
+            self.write(off, 0, b"", b"", 0.0)
+        finally:
+            lock.release()
+        return True
+
+    def clear(self) -> bool:
+        """Empties the cache, returns False if a bucket was skipped."""
+        cleared = True
+        for bucket in range(self.buckets):
+            lock = self.acquire(bucket)
+            if lock is None:
+                cleared = False
+                continue
+            try:
+                start = self.table + bucket * self.bucket_size
+                for off in range(
+                    start, start + self.bucket_size, self.slot_size
+                ):
+                    self.write(off, 0, b"", b"", 0.0)
+            finally:
+                lock.release()
+        self.hits = self.misses = 0
+        return cleared
+
+    def close(self) -> None:
+        self.mm.close()
+
+    def acquire(
+        self, bucket: int
+    ) -> typing.Optional[multiprocessing.synchronize.Lock]:
+        """Returns the locked stripe of bucket, None on timeout."""
+        lock = self.locks[bucket % len(self.locks)]
+        if lock.acquire(timeout=self.lock_timeout):
+            return lock
+        self.lock_timeouts += 1
+        return None
+
+    def find(self, bucket: int, h: int, key: bytes) -> int:
+        """Returns offset of the key slot, else a free one or -1."""
+        mm = self.mm
+        free = -1
+        now = time.monotonic()
+        start = self.table + bucket * self.bucket_size
+        for off in range(start, start + self.bucket_size, self.slot_size):
+            _, _, klen, _, slot_hash, expires = SLOT.unpack_from(mm, off)
+            if slot_hash == h:
+                key_start = off + SLOT.size
+                key_end = key_start + klen
+                if mm[key_start:key_end] == key:
+                    return off
+            if free < 0 and (not slot_hash or 0 < expires < now):
+                free = off
+        return free
+
+    def evict(self, bucket: int) -> int:
+        mm = self.mm
+        ways = self.ways
+        start = self.table + bucket * self.bucket_size
+        hand = mm[self.hands + bucket]
+        for i in range(ways + 1):
+            slot = (hand + i) % ways
+            off = start + slot * self.slot_size
+            if mm[off + 4]:
+                mm[off + 4] = 0
+                continue
+            break
+        mm[self.hands + bucket] = (slot + 1) % ways
+        return off
+
+    def write(
+        self, off: int, h: int, key: bytes, value: bytes, expires: float
+    ) -> None:
+        mm = self.mm
+        # an odd sequence tells readers the slot is being written
+        seq = SEQ.unpack_from(mm, off)[0] + 1
+        klen = len(key)
+        SLOT.pack_into(mm, off, seq, 0, klen, len(value), h, expires)
+        start = off + SLOT.size
+        end = start + klen
+        mm[start:end] = key
+        start = end
+        end += len(value)
+        mm[start:end] = value
+        SEQ.pack_into(mm, off, (seq + 1) & 0xFFFFFFFF)
+
+
+def shared_cache(
+    app: "App", name: str = "cache", **options: typing.Any
+) -> Resource[ShmCache]:
+    """Creates cache shared by workers and registers it as app resource.
+
+    Call it while the app is built, so the cache is created before
+    workers are forked. Inject it with ``cache: ShmCache = r.inject()``.
+    """
+    cache = ShmCache(**options)
+
+    async def factory() -> typing.AsyncIterator[ShmCache]:
+        yield cache
+
+    factory.__name__ = factory.__qualname__ = name
+    return app.resource()(factory)
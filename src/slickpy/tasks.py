@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import typing
+
+from slickpy.metrics import Metrics
+from slickpy.typing import Scope
+
+Task = typing.Tuple[
+    typing.Callable[..., typing.Awaitable[typing.Any]],
+    typing.Tuple[typing.Any, ...],
+]
+
+
+def defer(
+    scope: Scope,
+    fn: typing.Callable[..., typing.Awaitable[typing.Any]],
+    *args: typing.Any,
+) -> None:
+    """Schedules fn(*args) to run in background after the response."""
+    deferred = scope.get("deferred")
+    if deferred is None:
+        scope["deferred"] = deferred = []
+    deferred.append((fn, args))
+
+
+class TaskQueue(object):
+    """A bounded queue of background tasks run by a pool of workers.
+
+    When the queue is full a new task is dropped, or the oldest one if
+    policy is "drop_oldest". Workers are started with the first task.
+    """
+
+    def __init__(
+        self,
+        metrics: typing.Optional[Metrics] = None,
+        *,
+        maxsize: int = 1000,
+        concurrency: int = 8,
+        policy: str = "drop_new",
+        drain_timeout: float = 10.0,
+    ) -> None:
+        if policy not in ("drop_new", "drop_oldest"):
+            raise ValueError(f"unknown policy '{policy}'")
+        self.logger = logging.getLogger("slickpy.tasks")
+        self.metrics = Metrics() if metrics is None else metrics
+        self.maxsize = maxsize
+        self.concurrency = concurrency
+        self.policy = policy
+        self.drain_timeout = drain_timeout
+        self.running = 0
+        self.queue: typing.Optional["asyncio.Queue[Task]"] = None
+        self.workers: typing.List["asyncio.Future[None]"] = []
+
+    def __len__(self) -> int:
+        return 0 if self.queue is None else self.queue.qsize()
+
+    def put(self, tasks: typing.Iterable[Task]) -> None:
+        queue = self.queue
+        if queue is None:
+            queue = self.queue = asyncio.Queue(self.maxsize)
+            self.workers = [
+                asyncio.ensure_future(self.work())
+                for _ in range(self.concurrency)
+            ]
+        metrics = self.metrics
+        for task in tasks:
+            if queue.full():
+                metrics.incr("tasks_dropped")
+                if self.policy == "drop_new":
+                    continue
+                queue.get_nowait()
+                queue.task_done()
+            queue.put_nowait(task)
+            metrics.incr("tasks_deferred")
+
+    async def work(self) -> None:
+        queue = self.queue
+        assert queue is not None
+        metrics = self.metrics
+        while True:
+            fn, args = await queue.get()
+            self.running += 1
+            try:
+                await fn(*args)
+            except Exception:
+                metrics.incr("tasks_failed")
+                self.logger.exception("background task %r failed", fn)
+            else:
+                metrics.incr("tasks_done")
+            finally:
+                self.running -= 1
+                queue.task_done()
+
+    async def drain(self) -> None:
+        """Waits for queued tasks up to drain timeout, cancels the rest."""
+        queue = self.queue
+        if queue is None:
+            return
+        try:
+            await asyncio.wait_for(queue.join(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            abandoned = queue.qsize() + self.running
+            self.metrics.incr("tasks_abandoned", abandoned)
+            self.logger.warning("abandoned %d background tasks", abandoned)
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.queue = None
+        self.workers = []
@@ -1,9 +1,12 @@
 import asyncio
+import dataclasses
+import typing
 import unittest
 
 from slickpy import App, Request, Writer
 from slickpy.functional import ASGIClient
 from slickpy.response import BinaryResponse, JSONResponse, TextResponse
+from slickpy.schema import Header, Query
 from slickpy.typing import ASGICallable, Message, Receive, Scope, Send
 
 app = App()
@@ -197,6 +200,9 @@ class AppTestCase(unittest.TestCase):
         async def send(m: Message) -> None:
             sent_events.append(m["type"])
 
+        # the shared app is drained by shutdown
+        self.addCleanup(setattr, app.inflight, "draining", False)
+
         loop = asyncio.get_event_loop()
         loop.run_until_complete(
             app.asgi()({"type": "lifespan"}, receive, send)
@@ -219,6 +225,232 @@ class AppTestCase(unittest.TestCase):
             ],
         )
 
+    def test_drain(self) -> None:
+        main = App()
+        main.health()
+        release = asyncio.Event()
+        events = []
+
+        @main.route("/slow")
+        async def slow() -> TextResponse:
+            await release.wait()
+            events.append("slow")
+            return TextResponse("")
+
+        @main.on("lifespan.shutdown")
+        async def shutdown() -> None:
+            events.append("shutdown")
+
+        async def receive() -> Message:
+            return {"type": "lifespan.shutdown"}
+
+        async def run() -> None:
+            client = ASGIClient(main.asgi())
+            res = await client.fetch("/health")
+            self.assertEqual(res.status_code, 200)
+            pending = asyncio.ensure_future(client.fetch("/slow"))
+            await asyncio.sleep(0)
+            self.assertEqual(main.inflight.count, 1)
+            lifespan = asyncio.ensure_future(
+                main.asgi()({"type": "lifespan"}, receive, noop_send)
+            )
+            await asyncio.sleep(0)
+            self.assertTrue(main.draining)
+            res = await client.fetch("/health")
+            self.assertEqual(res.status_code, 503)
+            self.assertEqual(res.text, '{"status":"draining","inflight":1}')
+            res = await client.fetch("/slow")
+            self.assertEqual(res.status_code, 503)
+            self.assertIn((b"connection", b"close"), res.headers or [])
+            release.set()
+            res = await pending
+            self.assertEqual(res.status_code, 200)
+            await lifespan
+
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(run())
+        self.assertEqual(events, ["slow", "shutdown"])
+        self.assertEqual(main.metrics["requests_refused"], 1)
+
+    def test_resource(self) -> None:
+        main = App()
+        calls = []
+
+        @main.resource()
+        async def config() -> typing.AsyncIterator[typing.Dict[str, str]]:
+            calls.append("config")
+            yield {"dsn": "db://"}
+            calls.append("config closed")
+
+        @main.resource(after=(config,))
+        async def db() -> typing.AsyncIterator[str]:
+            calls.append("db")
+            yield "pool " + config.value["dsn"]
+            calls.append("db closed")
+
+        @main.route("/")
+        async def root(pool: str = db.inject()) -> TextResponse:
+            return TextResponse(pool)
+
+        client = ASGIClient(main.asgi())
+        self.assertRaises(RuntimeError, client.go)
+        state: typing.Dict[str, typing.Any] = {}
+        main.lifespan.state = state
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(main.lifespan.notify("lifespan.startup"))
+        self.assertEqual(state["db"], "pool db://")
+        calls.append(client.go().text)
+        loop.run_until_complete(main.lifespan.notify("lifespan.shutdown"))
+        self.assertEqual(
+            calls,
+            ["config", "db", "pool db://", "db closed", "config closed"],
+        )
+
+    def test_shutdown_order(self) -> None:
+        main = App()
+        calls = []
+
+        @main.on("lifespan.shutdown")
+        async def flush() -> None:
+            calls.append("flush")
+
+        @main.resource()
+        async def config() -> typing.AsyncIterator[None]:
+            yield None
+            calls.append("config closed")
+
+        @main.every(10)
+        async def refresh() -> None:
+            pass  # pragma: nocover
+
+        @main.resource(after=(config,))
+        async def db() -> typing.AsyncIterator[None]:
+            yield None
+            calls.append("db closed")
+
+        @main.on("lifespan.shutdown", after=[flush])
+        async def report() -> None:
+            calls.append("report")
+
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(main.lifespan.notify("lifespan.startup"))
+        loop.run_until_complete(main.lifespan.notify("lifespan.shutdown"))
+        self.assertEqual(sorted(calls[:2]), ["db closed", "flush"])
+        self.assertEqual(sorted(calls[2:]), ["config closed", "report"])
+        # subscribers run once background tasks and jobs are stopped
+        self.assertEqual(
+            main.lifespan.topics["lifespan.shutdown"].waves(),
+            [
+                [main.tasks.drain, main.scheduler.stop],
+                [flush, db.shutdown],
+                [config.shutdown, report],
+            ],
+        )
+
+    def test_defer(self) -> None:
+        main = App()
+        calls = []
+
+        async def audit(name: str) -> None:
+            calls.append(name)
+
+        @main.route("/request")
+        async def request(req: Request) -> TextResponse:
+            req.defer(audit, "request")
+            return TextResponse("")
+
+        @main.route("/writer")
+        async def writer(w: Writer) -> None:
+            w.defer(audit, "writer")
+            await w.end()
+
+        @main.route("/response")
+        async def response() -> TextResponse:
+            return TextResponse("").defer(audit, "response")
+
+        ok = TextResponse("ok")
+
+        @main.route("/reused")
+        async def reused() -> TextResponse:
+            return ok.defer(audit, "reused")
+
+        client = ASGIClient(main.asgi())
+        for path in ("/request", "/writer", "/response", "/reused", "/reused"):
+            self.assertEqual(client.go(path).status_code, 200)
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(main.lifespan.notify("lifespan.shutdown"))
+        self.assertEqual(
+            calls, ["request", "writer", "response", "reused", "reused"]
+        )
+        self.assertEqual(main.metrics["tasks_done"], 5)
+        self.assertRaises(RuntimeError, Writer(noop_send).defer, audit)
+
+    def test_every(self) -> None:
+        main = App()
+        calls = []
+
+        @main.every(10)
+        async def refresh() -> None:
+            calls.append("refresh")
+
+        async def run() -> None:
+            await main.lifespan.notify("lifespan.startup.complete")
+            await asyncio.sleep(0)
+            await main.lifespan.notify("lifespan.shutdown")
+
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(run())
+        self.assertEqual(calls, ["refresh"])
+        self.assertEqual(main.scheduler.tasks, [])
+        self.assertEqual(
+            main.metrics.timings["jobs." + refresh.__qualname__].count, 1
+        )
+
+    def test_warmup(self) -> None:
+        main = App()
+        calls = []
+
+        @main.route("/")
+        async def root(req: Request) -> TextResponse:
+            calls.append(req.headers[b"x-warmup"])
+            return TextResponse("")
+
+        @main.route("/fail")
+        async def fail() -> TextResponse:
+            raise ValueError()
+
+        @main.route("/error")
+        async def error() -> TextResponse:
+            return TextResponse("", 500)
+
+        @main.route("/watched", methods=("POST",), on_disconnect="cancel")
+        async def watched(req: Request) -> TextResponse:
+            calls.append(bytes(await req.body()))
+            await asyncio.sleep(0.01)
+            return TextResponse("")
+
+        @main.route("/flagged", on_disconnect="flag")
+        async def flagged(req: Request) -> TextResponse:
+            calls.append(bytes(await req.body()))
+            return TextResponse("")
+
+        main.warmup("/", headers=[(b"x-warmup", b"1")], times=2)
+        main.warmup("/fail")
+        main.warmup("/error")
+        main.warmup("/watched", method="POST", body=b"data")
+        main.warmup("/flagged")
+        loop = asyncio.get_event_loop()
+        with self.assertLogs("slickpy.warmup") as cm:
+            loop.run_until_complete(
+                main.lifespan.notify("lifespan.startup.complete")
+            )
+        self.assertEqual(calls, [b"1", b"1", b"data", b""])
+        self.assertEqual(main.metrics["requests_disconnected"], 0)
+        self.assertEqual(main.metrics["handlers_cancelled"], 0)
+        self.assertEqual(len(cm.output), 3)
+        self.assertIn("warm-up took GET / ", cm.output[-1])
+        self.assertEqual(main.metrics.timings["warmup.GET /"].count, 1)
+
     def test_middleware(self) -> None:
         main = App()
         calls = []
@@ -244,8 +476,177 @@ class AppTestCase(unittest.TestCase):
         self.assertEqual(res.text, "root")
         self.assertEqual(calls, ["init", "before", "after"])
 
+    def test_max_body_size(self) -> None:
+        main = App(max_body_size=5)
+
+        @main.route("/", methods=("POST",))
+        async def root(req: Request) -> BinaryResponse:
+            return BinaryResponse(bytes(await req.body()))
+
+        @main.route("/large", methods=("POST",), max_body_size=20)
+        async def large(req: Request) -> BinaryResponse:
+            return BinaryResponse(bytes(await req.body()))
+
+        client = ASGIClient(main.asgi())
+        res = client.go("/", method="POST", body=b"Hello")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.text, "Hello")
+        res = client.go("/", method="POST", body=b"Hello, world!")
+        self.assertEqual(res.status_code, 413)
+        res = client.go("/large", method="POST", body=b"Hello, world!")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.text, "Hello, world!")
+
+    def test_schema_models(self) -> None:
+        @dataclasses.dataclass
+        class Greeting:
+            message: str
+
+        @dataclasses.dataclass
+        class Paging:
+            page: int = 1
+
+        main = App()
+
+        @main.route("/", methods=("POST",))
+        async def root(
+            req: Request, g: Greeting, p: Query[Paging]
+        ) -> JSONResponse:
+            return JSONResponse(
+                {"method": req.method, "message": g.message, "page": p.page}
+            )
+
+        client = ASGIClient(main.asgi())
+        res = client.go("/?page=2", method="POST", body=b'{"message":"hi"}')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res.body, b'{"method":"POST","message":"hi","page":2}'
+        )
+        res = client.go("/?page=x", method="POST", body=b"{}")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(
+            res.body,
+            b'{"errors":{"message":"is required",'
+            b'"page":"must be an integer"}}',
+        )
+        res = client.go("/", method="POST", body=b"{")
+        self.assertEqual(res.status_code, 400)
+
+    def test_params(self) -> None:
+        main = App()
+
+        @main.route(r"^/items/(?P<id>\w+)$")
+        async def item(
+            id: int,
+            q: Query[str],
+            tags: Query[typing.List[str]],
+            page: Query[int] = 1,
+            x_token: Header[typing.Optional[str]] = None,
+        ) -> JSONResponse:
+            return JSONResponse([id, q, tags, page, x_token])
+
+        @main.route(r"^/stream/(?P<name>\w+)$")
+        async def stream(w: Writer, name: str) -> None:
+            await w.end(name.encode())
+
+        @main.route("/hello")
+        async def hello(name: str = "world") -> TextResponse:
+            return TextResponse(f"Hello, {name}!")
+
+        client = ASGIClient(main.asgi())
+        res = client.go(
+            "/items/7?q=x&tags=a&tags=b", headers=[(b"x-token", b"secret")]
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.body, b'[7,"x",["a","b"],1,"secret"]')
+        res = client.go("/items/x?page=y")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(
+            res.body,
+            b'{"errors":{"id":"must be an integer","q":"is required",'
+            b'"tags":"is required","page":"must be an integer"}}',
+        )
+        res = client.go("/stream/hello")
+        self.assertEqual(res.text, "hello")
+        res = client.go("/hello")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.text, "Hello, world!")
+
+    def test_on_disconnect(self) -> None:
+        main = App()
+        calls = []
+
+        @main.route("/cancel", on_disconnect="cancel")
+        async def cancel() -> TextResponse:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                calls.append("cancelled")
+                raise
+            return TextResponse("")  # pragma: nocover
+
+        @main.route("/flag", on_disconnect="flag")
+        async def flag(req: Request) -> TextResponse:
+            await req.body()
+            while not req.disconnected:
+                await asyncio.sleep(0)
+            calls.append("disconnected")
+            return TextResponse("")
+
+        loop = asyncio.get_event_loop()
+        for path in ("/cancel", "/flag"):
+            task = loop.run_until_complete(disconnect_after_start(main, path))
+            self.assertFalse(task.done())
+            loop.run_until_complete(task)
+        self.assertEqual(calls, ["cancelled", "disconnected"])
+        self.assertEqual(main.metrics["requests_disconnected"], 2)
+        self.assertEqual(main.metrics["handlers_cancelled"], 1)
+
+    def test_on_disconnect_after_response(self) -> None:
+        main = App()
+
+        @main.route("/flag", on_disconnect="flag")
+        async def flag(req: Request) -> TextResponse:
+            return TextResponse("")
+
+        async def receive() -> Message:
+            if sent:
+                return {"type": "http.disconnect"}
+            await asyncio.sleep(0)
+            return {"type": "http.request", "body": b""}
+
+        async def send(message: Message) -> None:
+            sent.append(message)
+
+        loop = asyncio.get_event_loop()
+        for _ in range(5):
+            sent: typing.List[Message] = []
+            scope: typing.Dict[str, typing.Any] = {
+                "type": "http",
+                "method": "GET",
+                "path": "/flag",
+                "headers": [],
+            }
+            loop.run_until_complete(main.asgi()(scope, receive, send))
+            loop.run_until_complete(asyncio.sleep(0.01))
+            self.assertFalse(scope["disconnected"].is_set())
+        self.assertEqual(main.metrics["requests_disconnected"], 0)
+
+    def test_unknown_on_disconnect(self) -> None:
+        async def root() -> TextResponse:
+            pass  # pragma: nocover
+
+        main = App()
+        self.assertRaises(
+            ValueError, lambda: main.route("/", on_disconnect="x")(root)
+        )
+
+    def test_unknown_route_option(self) -> None:
+        main = App()
+        self.assertRaises(TypeError, lambda: main.route("/", unknown=1))
+
     def test_unknown_asgi_adapter(self) -> None:
-        async def root(f: float) -> None:  # pragma: nocover
+        async def root(f: complex) -> None:  # pragma: nocover
             pass
 
         main = App()
@@ -287,3 +688,30 @@ class AppTestCase(unittest.TestCase):
 
         self.assertEqual(dispatched_events, ["shutdown", "shutdown.failed"])
         self.assertEqual(sent_events, ["lifespan.shutdown.failed"])
+
+
+async def disconnect_after_start(
+    app: App, path: str
+) -> "asyncio.Future[None]":
+    """Starts a request, the client disconnects once the task is returned."""
+    gone = asyncio.Event()
+    messages: typing.List[Message] = [{"type": "http.request", "body": b""}]
+
+    async def receive() -> Message:
+        if messages:
+            return messages.pop()
+        await gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+    task = asyncio.ensure_future(app.asgi()(scope, receive, send))
+    await asyncio.sleep(0.01)
+    gone.set()
+    return task
+
+
+async def noop_send(message: Message) -> None:
+    pass  # pragma: nocover
@@ -0,0 +1,116 @@
+import asyncio
+import gzip
+import typing
+import unittest
+import zlib
+
+from slickpy.compression import (
+    BLOCK_SIZE,
+    BROTLI_SUPPORTED,
+    BrotliStreamDecompressor,
+    decompress_chunks,
+)
+from slickpy.typing import HTTPError
+
+
+async def iterate(
+    chunks: typing.Iterable[bytes],
+) -> typing.AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+def split(data: bytes, size: int) -> typing.List[bytes]:
+    return [data[i:][:size] for i in range(0, len(data), size)]
+
+
+def run(data: bytes, content_encoding: bytes, **kwargs: typing.Any) -> bytes:
+    async def read() -> bytes:
+        chunks = decompress_chunks(
+            iterate(split(data, 7)), content_encoding, **kwargs
+        )
+        return b"".join([chunk async for chunk in chunks])
+
+    loop = asyncio.get_event_loop()
+    return loop.run_until_complete(read())
+
+
+class DecompressChunksTestCase(unittest.TestCase):
+    data = b"hello world " * 100
+
+    def test_gzip(self) -> None:
+        self.assertEqual(run(gzip.compress(self.data), b"gzip"), self.data)
+
+    def test_deflate(self) -> None:
+        self.assertEqual(run(zlib.compress(self.data), b"deflate"), self.data)
+
+    def test_raw_deflate(self) -> None:
+        d = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        data = d.compress(self.data) + d.flush()
+        self.assertEqual(run(data, b"Deflate"), self.data)
+
+    def test_multiple(self) -> None:
+        data = zlib.compress(gzip.compress(self.data))
+        self.assertEqual(run(data, b"gzip, identity, deflate"), self.data)
+
+    def test_identity(self) -> None:
+        self.assertEqual(run(self.data, b"identity"), self.data)
+
+    def test_unsupported(self) -> None:
+        with self.assertRaises(HTTPError) as cm:
+            run(self.data, b"compress")
+        self.assertEqual(cm.exception.status_code, 415)
+
+    def test_corrupted(self) -> None:
+        with self.assertRaises(HTTPError) as cm:
+            run(b"x" + gzip.compress(self.data), b"gzip")
+        self.assertEqual(cm.exception.status_code, 400)
+
+    def test_truncated(self) -> None:
+        for data, encoding in [
+            (gzip.compress(self.data)[:-8], b"gzip"),
+            (zlib.compress(self.data)[:20], b"deflate"),
+        ]:
+            with self.assertRaises(HTTPError) as cm:
+                run(data, encoding)
+            self.assertEqual(cm.exception.status_code, 400)
+
+    def test_gzip_members(self) -> None:
+        data = gzip.compress(b"hello ") + gzip.compress(b"world")
+        self.assertEqual(run(data, b"gzip"), b"hello world")
+        with self.assertRaises(HTTPError) as cm:
+            run(data + gzip.compress(b"!")[:12], b"gzip")
+        self.assertEqual(cm.exception.status_code, 400)
+
+    def test_max_size(self) -> None:
+        data = gzip.compress(self.data)
+        self.assertEqual(run(data, b"gzip", max_size=1200), self.data)
+        with self.assertRaises(HTTPError) as cm:
+            run(data, b"gzip", max_size=1199)
+        self.assertEqual(cm.exception.status_code, 413)
+
+    def test_max_ratio(self) -> None:
+        data = gzip.compress(b"\0" * 4 * 1024 * 1024)
+        with self.assertRaises(HTTPError) as cm:
+            run(data, b"gzip", max_ratio=100)
+        self.assertEqual(cm.exception.status_code, 413)
+        self.assertEqual(len(run(data, b"gzip")), 4 * 1024 * 1024)
+
+    @unittest.skipUnless(BROTLI_SUPPORTED, "brotli >= 1.1 is not installed")
+    def test_brotli(self) -> None:
+        import brotli
+
+        self.assertEqual(run(brotli.compress(self.data), b"br"), self.data)
+        data = brotli.compress(b"\0" * 16 * 1024 * 1024)
+        sizes = [
+            len(out) for out in BrotliStreamDecompressor().decompress(data)
+        ]
+        self.assertEqual(sum(sizes), 16 * 1024 * 1024)
+        self.assertLessEqual(max(sizes), 2 * BLOCK_SIZE)
+        with self.assertRaises(HTTPError) as cm:
+            run(data, b"br", max_size=BLOCK_SIZE * 4)
+        self.assertEqual(cm.exception.status_code, 413)
+        for data in [b"corrupted", brotli.compress(self.data)[:-4]]:
+            with self.assertRaises(HTTPError) as cm:
+                run(data, b"br")
+            self.assertEqual(cm.exception.status_code, 400)
@@ -1,6 +1,7 @@
+import typing
 import unittest
 
-from slickpy.cookie import del_cookie, set_cookie
+from slickpy.cookie import del_cookie, parse_cookie, set_cookie
 
 set_test_cases = (
     (set_cookie("cookie-1", "one"), b"cookie-1=one"),
@@ -60,9 +61,34 @@ del_test_cases = (
     ),
 )
 
+parse_test_cases: typing.Tuple[
+    typing.Tuple[bytes, typing.Mapping[str, str]], ...
+] = (
+    (b"", {}),
+    (b"ID=1234", {"ID": "1234"}),
+    (b"ID=1234; PREF=abc", {"ID": "1234", "PREF": "abc"}),
+    (b"ID=1234;PREF=abc", {"ID": "1234", "PREF": "abc"}),
+    (b" ID = 1234 ;  PREF=abc ", {"ID": "1234", "PREF": "abc"}),
+    (b"ID=1234; ID=5678", {"ID": "1234"}),
+    (b"empty=", {"empty": ""}),
+    (b"eq=a=b", {"eq": "a=b"}),
+    (b'quoted="a b"', {"quoted": "a b"}),
+    (b'escaped="a\\"b\\073"', {"escaped": 'a"b;'}),
+    (b"malformed; =x; ID=1234;;", {"ID": "1234"}),
+)
+
 
 class CookieTestCase(unittest.TestCase):
     def test_cookie(self) -> None:
         for (header, actual), expected in set_test_cases + del_test_cases:
             self.assertEqual(header, b"set-cookie")
             self.assertEqual(actual, expected)
+
+    def test_parse_cookie(self) -> None:
+        for header, expected in parse_test_cases:
+            self.assertEqual(parse_cookie(header), expected, header)
+
+    def test_parse_cookie_cached(self) -> None:
+        cookies = parse_cookie(b"ID=1234; PREF=abc")
+        self.assertIs(parse_cookie(b"ID=1234; PREF=abc"), cookies)
+        self.assertFalse(isinstance(cookies, typing.MutableMapping))
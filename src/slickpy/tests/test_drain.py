@@ -0,0 +1,36 @@
+import asyncio
+import unittest
+
+from slickpy.drain import InFlight
+
+
+class InFlightTestCase(unittest.TestCase):
+    def test_drain_idle(self) -> None:
+        inflight = InFlight()
+        loop = asyncio.get_event_loop()
+        self.assertTrue(loop.run_until_complete(inflight.drain()))
+        self.assertTrue(inflight.draining)
+
+    def test_drain_waits(self) -> None:
+        inflight = InFlight()
+        inflight.enter()
+        inflight.enter()
+
+        async def run() -> bool:
+            loop.call_soon(inflight.exit)
+            loop.call_later(0.01, inflight.exit)
+            return await inflight.drain()
+
+        loop = asyncio.get_event_loop()
+        self.assertTrue(loop.run_until_complete(run()))
+        self.assertEqual(inflight.count, 0)
+        self.assertEqual(inflight.metrics.timings["drain"].count, 1)
+
+    def test_drain_timeout(self) -> None:
+        inflight = InFlight(drain_timeout=0.01)
+        inflight.enter()
+        loop = asyncio.get_event_loop()
+        with self.assertLogs("slickpy.drain"):
+            self.assertFalse(loop.run_until_complete(inflight.drain()))
+        self.assertEqual(inflight.metrics["requests_abandoned"], 1)
+        inflight.exit()
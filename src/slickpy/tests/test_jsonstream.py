@@ -0,0 +1,102 @@
+import asyncio
+import typing
+import unittest
+
+from slickpy.jsonstream import ItemsParser, parse_json_items
+from slickpy.typing import HTTPError
+
+
+def feed(
+    data: bytes, size: int, path: typing.Sequence[str] = ()
+) -> typing.List[typing.Any]:
+    parser = ItemsParser(path)
+    items = []
+    for i in range(0, len(data), size):
+        items.extend(parser.feed(data[i:][:size]))
+    items.extend(parser.feed(b"", True))
+    return items
+
+
+class ItemsParserTestCase(unittest.TestCase):
+    def test_array(self) -> None:
+        data = b' [1, -2.5e3,"a\\"]", {"x": [1, 2]},[] , null,true,12345]'
+        expected = [1, -2500.0, 'a"]', {"x": [1, 2]}, [], None, True, 12345]
+        for size in [1, 2, 3, 7, len(data)]:
+            self.assertEqual(feed(data, size), expected, size)
+
+    def test_empty(self) -> None:
+        for data in [b"[]", b" [ ] "]:
+            self.assertEqual(feed(data, 1), [])
+
+    def test_unicode(self) -> None:
+        data = '["привіт", "світ"]'.encode("utf-8")
+        self.assertEqual(feed(data, 1), ["привіт", "світ"])
+
+    def test_path(self) -> None:
+        data = (
+            b'{"total": 2, "meta": {"items": [0]}, '
+            b'"data": {"x": "}", "items": [{"id": 1}, {"id": 2}]}, "z": 1}'
+        )
+        for size in [1, 5, len(data)]:
+            self.assertEqual(
+                feed(data, size, ("data", "items")), [{"id": 1}, {"id": 2}]
+            )
+
+    def test_path_not_found(self) -> None:
+        self.assertEqual(feed(b'{"data": {}}', 1, ("data", "items")), [])
+        self.assertEqual(feed(b"{}", 1, ("data",)), [])
+
+    def test_invalid(self) -> None:
+        for data, path in [
+            (b"{}", ()),
+            (b"[1, 2", ()),
+            (b"[1 2]", ()),
+            (b"[1, x]", ()),
+            (b"[]", ("data",)),
+            (b'{"data" []}', ("data",)),
+            (b'{"data": [], 1}', ("x",)),
+            (b'{"data"', ("data",)),
+            (b"", ()),
+        ]:
+            self.assertRaises(ValueError, feed, data, 1, path)
+
+    def test_invalid_early(self) -> None:
+        for data in [b"[1, bogus", b'[{"a": 1}, [1 | 2', b"[nulll"]:
+            parser = ItemsParser()
+            self.assertRaises(ValueError, parser.feed, data + b"0" * 1024)
+
+    def test_split_item(self) -> None:
+        parser = ItemsParser()
+        self.assertEqual(parser.feed(b'[{"a": "\\'), [])
+        self.assertEqual(parser.feed(b'"'), [])
+        for _ in range(100):
+            self.assertEqual(parser.feed(b"], "), [])
+        self.assertEqual(parser.feed(b'", "b": [{"c": "]}"}'), [])
+        self.assertEqual(
+            parser.feed(b"]}, 1"),
+            [{"a": '"' + "], " * 100, "b": [{"c": "]}"}]}],
+        )
+        self.assertEqual(parser.feed(b"2]"), [12])
+        parser = ItemsParser()
+        self.assertEqual(parser.feed(b'["x", 1'), ["x"])
+        self.assertEqual(parser.feed(b'2, "a\\"b"]'), [12, 'a"b'])
+
+    def test_max_item_size(self) -> None:
+        parser = ItemsParser(max_item_size=16)
+        self.assertEqual(parser.feed(b'[{"a": 1}, "0123456789'), [{"a": 1}])
+        self.assertRaises(HTTPError, parser.feed, b"0123456789")
+        parser = ItemsParser(("data",), max_item_size=16)
+        self.assertRaises(HTTPError, parser.feed, b'{"x": [' + b"1, " * 8)
+
+
+class ParseJSONItemsTestCase(unittest.TestCase):
+    def test_parse_json_items(self) -> None:
+        async def chunks() -> typing.AsyncIterator[bytes]:
+            yield b'[{"id": 1}, {"i'
+            yield b'd": 2}]'
+
+        async def f() -> typing.List[typing.Any]:
+            return [item async for item in parse_json_items(chunks())]
+
+        loop = asyncio.get_event_loop()
+        self.assertEqual(loop.run_until_complete(f()), [{"id": 1}, {"id": 2}])
@@ -0,0 +1,86 @@
+import asyncio
+import typing
+import unittest
+
+from slickpy.lifespan import Lifespan, Topic
+
+
+def recorder(
+    calls: typing.List[str], name: str, delay: float = 0
+) -> typing.Callable[[], typing.Awaitable[None]]:
+    async def subscriber() -> None:
+        calls.append(name + ".start")
+        await asyncio.sleep(delay)
+        calls.append(name + ".end")
+
+    subscriber.__qualname__ = name
+    return subscriber
+
+
+class TopicTestCase(unittest.TestCase):
+    def test_waves(self) -> None:
+        calls: typing.List[str] = []
+        db = recorder(calls, "db", 0.01)
+        cache = recorder(calls, "cache")
+        warm = recorder(calls, "warm")
+        topic = Topic()
+        topic.add(warm, after=(db, cache))
+        topic.add(db)
+        topic.add(cache)
+
+        self.assertEqual(topic.waves(), [[db, cache], [warm]])
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(topic.notify())
+        self.assertEqual(
+            calls,
+            [
+                "db.start",
+                "cache.start",
+                "cache.end",
+                "db.end",
+                "warm.start",
+                "warm.end",
+            ],
+        )
+        self.assertEqual(sorted(topic.timings), ["cache", "db", "warm"])
+        self.assertGreaterEqual(topic.timings["db"], 0.01)
+
+    def test_invalid_dependencies(self) -> None:
+        calls: typing.List[str] = []
+        a = recorder(calls, "a")
+        b = recorder(calls, "b")
+        topic = Topic()
+        topic.add(a, after=(b,))
+        self.assertRaises(ValueError, topic.waves)
+        topic.add(b, after=(a,))
+        self.assertRaises(ValueError, topic.waves)
+
+    def test_timeout_and_failure(self) -> None:
+        calls: typing.List[str] = []
+        slow = recorder(calls, "slow", 1)
+        topic = Topic()
+        topic.add(slow, timeout=0.01)
+        loop = asyncio.get_event_loop()
+        self.assertRaises(
+            asyncio.TimeoutError, loop.run_until_complete, topic.notify()
+        )
+
+        async def fails() -> None:
+            raise ValueError()
+
+        topic = Topic()
+        topic.add(fails)
+        topic.add(recorder(calls, "ok"))
+        self.assertRaises(ValueError, loop.run_until_complete, topic.notify())
+        self.assertIn("ok.end", calls)
+
+
+class LifespanTestCase(unittest.TestCase):
+    def test_report(self) -> None:
+        lifespan = Lifespan()
+        lifespan.add("lifespan.startup", recorder([], "db"))
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(lifespan.notify("lifespan.startup"))
+        with self.assertLogs("slickpy.lifespan") as cm:
+            lifespan.report("lifespan.startup")
+        self.assertIn("lifespan.startup took db ", cm.output[0])
@@ -1,8 +1,19 @@
 import asyncio
+import hashlib
+import os
+import tempfile
 import typing
 import unittest
 
-from slickpy.multipart import parse_multipart
+from slickpy.multipart import (
+    HashStage,
+    MultipartFileWriter,
+    SniffStage,
+    flush_pending_io,
+    parse_multipart,
+    parse_parts,
+)
+from slickpy.typing import HTTPError, MultipartFile, RequestOptions
 
 content_type = b"multipart/form-data; boundary=---123"
 body_chunks = [
@@ -28,18 +39,19 @@ body_chunks = [
 ]
 
 
+async def input(
+    chunks: typing.Iterable[bytes],
+) -> typing.AsyncGenerator[bytes, None]:
+    it = chunks.__iter__()
+    try:
+        while True:
+            yield next(it)
+    except StopIteration:
+        pass
+
+
 class ParserTestCase(unittest.TestCase):
     def test_parse_multipart(self) -> None:
-        async def input(
-            chunks: typing.Iterable[bytes],
-        ) -> typing.AsyncGenerator[bytes, None]:
-            it = chunks.__iter__()
-            try:
-                while True:
-                    yield next(it)
-            except StopIteration:
-                pass
-
         loop = asyncio.get_event_loop()
         form, files = loop.run_until_complete(
             parse_multipart(content_type, input(body_chunks))
@@ -68,3 +80,181 @@ class ParserTestCase(unittest.TestCase):
         self.assertEqual(len(loop.run_until_complete(boo.read())), 1120010)
 
         loop.run_until_complete(files.close())
+
+    def test_parse_parts(self) -> None:
+        async def read() -> typing.List[typing.Tuple[str, str, str, str]]:
+            result = []
+            async for part in parse_parts(content_type, input(body_chunks)):
+                if part.name == "secret-foo":
+                    continue
+                result.append(
+                    (
+                        part.name,
+                        str(part.filename),
+                        part.content_type,
+                        str(len(await part.read())),
+                    )
+                )
+            return result
+
+        loop = asyncio.get_event_loop()
+        self.assertEqual(
+            loop.run_until_complete(read()),
+            [
+                ("title", "None", "text/plain", "10"),
+                ("description", "None", "text/plain", "9"),
+                ("secret-boo", "boo.txt", "text/html", "1120010"),
+            ],
+        )
+
+    def test_parse_parts_incomplete(self) -> None:
+        async def read() -> None:
+            async for part in parse_parts(
+                content_type, input(body_chunks[:3])
+            ):
+                await part.read()
+
+        loop = asyncio.get_event_loop()
+        with self.assertRaises(HTTPError) as cm:
+            loop.run_until_complete(read())
+        self.assertEqual(cm.exception.status_code, 400)
+
+    def test_parse_multipart_options(self) -> None:
+        loop = asyncio.get_event_loop()
+        with tempfile.TemporaryDirectory() as spool_dir:
+            options = RequestOptions(spool_size=100, spool_dir=spool_dir)
+            form, files = loop.run_until_complete(
+                parse_multipart(content_type, input(body_chunks), options)
+            )
+            self.assertEqual(
+                [f._rolled for f in files.values()], [False, True]
+            )
+            boo = files["secret-boo"]
+            self.assertEqual(len(loop.run_until_complete(boo.read())), 1120010)
+            loop.run_until_complete(files.close())
+
+
+class MultipartFileWriterTestCase(unittest.TestCase):
+    def test_flush_pending_io(self) -> None:
+        a = MultipartFileWriter("a", "text/plain", 1)
+        b = MultipartFileWriter("b", "text/plain", 1)
+        writes = []
+        write = a.file.write
+
+        def counting_write(chunk: bytes) -> int:
+            writes.append(chunk)
+            return write(chunk)
+
+        setattr(a.file, "write", counting_write)
+        flush_pending_io(
+            [(a, b"1"), (a, b"23"), (a, None), (b, b"4"), (b, None)]
+        )
+        self.assertEqual(writes, [b"123"])
+        self.assertEqual((a.size, b.size), (3, 1))
+        self.assertEqual(a.file.read(), b"123")
+        self.assertEqual(b.file.read(), b"4")
+
+    @unittest.skipUnless(hasattr(os, "memfd_create"), "requires memfd")
+    def test_memfd(self) -> None:
+        mfw = MultipartFileWriter("a", "text/plain", 1, memfd=True)
+        mfw.write(b"x" * 10)
+        self.assertFalse(mfw.would_roll(1024 * 1024))
+        mfw.seek()
+        self.assertEqual(mfw.file.read(), b"x" * 10)
+        mfw.file.close()
+
+    def test_stages(self) -> None:
+        loop = asyncio.get_event_loop()
+        options = RequestOptions(upload_stages=(HashStage, SniffStage))
+        form, files = loop.run_until_complete(
+            parse_multipart(content_type, input(body_chunks), options)
+        )
+        boo = files["secret-boo"]
+        data = b"(content of " + b"the uploaded file boo.txt)\r\n" * 40000
+        self.assertEqual(boo.size, 1120010)
+        self.assertEqual(
+            boo.info,
+            {
+                "sha256": hashlib.sha256(data[:-2]).hexdigest(),
+                "sniffed_type": None,
+            },
+        )
+        self.assertEqual(files["secret-foo"].size, 38)
+        loop.run_until_complete(files.close())
+
+    def test_sniff(self) -> None:
+        for data, expected in (
+            (b"\x89PNG\r\n\x1a\n...", "image/png"),
+            (b"RIFF\0\0\0\0WEBPVP8 ", "image/webp"),
+            (b"text", None),
+        ):
+            stage = SniffStage()
+            for b in data:
+                stage.update(bytes([b]))
+            self.assertEqual(stage.result(), expected)
+
+    def test_iterate_and_save(self) -> None:
+        loop = asyncio.get_event_loop()
+        form, files = loop.run_until_complete(
+            parse_multipart(content_type, input(body_chunks))
+        )
+
+        async def iterate(f: MultipartFile) -> typing.List[int]:
+            return [len(chunk) async for chunk in f]
+
+        boo = files["secret-boo"]
+        sizes = loop.run_until_complete(iterate(boo))
+        self.assertEqual(sum(sizes), 1120010)
+        self.assertEqual(len(sizes), 5)
+        with tempfile.TemporaryDirectory() as d:
+            for name, f in files.items():
+                path = os.path.join(d, name)
+                loop.run_until_complete(f.save(path))
+                self.assertEqual(os.path.getsize(path), f.size)
+            with open(os.path.join(d, "secret-foo"), "rb") as saved:
+                self.assertEqual(
+                    saved.read(), b"(content of the uploaded file foo.txt)"
+                )
+        loop.run_until_complete(files.close())
+
+    def test_policy(self) -> None:
+        loop = asyncio.get_event_loop()
+        for options, status_code in (
+            (RequestOptions(max_parts=3), 413),
+            (RequestOptions(max_file_size=1000), 413),
+            (RequestOptions(max_form_field_size=9), 413),
+            (RequestOptions(allowed_file_types=("text/plain",)), 415),
+            (RequestOptions(allowed_file_types=("image/*",)), 415),
+        ):
+            with self.assertRaises(HTTPError) as cm:
+                loop.run_until_complete(
+                    parse_multipart(content_type, input(body_chunks), options)
+                )
+            self.assertEqual(cm.exception.status_code, status_code)
+        options = RequestOptions(
+            max_parts=4,
+            max_file_size=1120010,
+            max_form_field_size=10,
+            allowed_file_types=("text/*",),
+        )
+        form, files = loop.run_until_complete(
+            parse_multipart(content_type, input(body_chunks), options)
+        )
+        self.assertEqual(len(files), 2)
+        loop.run_until_complete(files.close())
+
+    def test_parse_parts_policy(self) -> None:
+        async def read(options: RequestOptions) -> None:
+            async for part in parse_parts(
+                content_type, input(body_chunks), options
+            ):
+                await part.read()
+
+        loop = asyncio.get_event_loop()
+        for options in (
+            RequestOptions(max_parts=3),
+            RequestOptions(max_file_size=1000),
+        ):
+            with self.assertRaises(HTTPError) as cm:
+                loop.run_until_complete(read(options))
+            self.assertEqual(cm.exception.status_code, 413)
@@ -0,0 +1,75 @@
+import os
+import signal
+import socket
+import time
+import unittest
+import urllib.request
+
+from slickpy.prefork import Prefork, bind_socket, private_memory
+from slickpy.server import load_app
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return int(s.getsockname()[1])
+
+
+def get(port: int, timeout: float = 5.0) -> int:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/") as r:
+                return int(r.status)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+class PreforkTestCase(unittest.TestCase):
+    def test_bind_socket(self) -> None:
+        port = free_port()
+        a = bind_socket(port=port, reuse_port=True)
+        b = bind_socket(port=port, reuse_port=True)
+        self.assertEqual(a.getsockname(), b.getsockname())
+        a.close()
+        b.close()
+
+    def test_private_memory(self) -> None:
+        heap = b"x" * (64 << 20)
+        self.assertGreater(private_memory(os.getpid()), len(heap))
+        r, w = os.pipe()
+        pid = os.fork()
+        if not pid:
+            os.close(w)
+            os.read(r, 1)
+            os._exit(0)
+        os.close(r)
+        try:
+            # the heap is shared copy-on-write with the forked child
+            self.assertLess(private_memory(pid), len(heap) // 4)
+        finally:
+            os.close(w)
+            os.waitpid(pid, 0)
+        self.assertEqual(private_memory(-1), 0)
+
+    def test_respawn(self) -> None:
+        app = load_app("slickpy.tests.test_server:app")
+        for reuse_port in (True, False):
+            port = free_port()
+            p = Prefork(app, port=port, workers=2, reuse_port=reuse_port)
+            p.start()
+            try:
+                self.assertEqual(get(port), 200)
+                pid = next(iter(p.workers))
+                os.kill(pid, signal.SIGKILL)
+                with self.assertLogs("slickpy.prefork"):
+                    while pid in p.workers:
+                        time.sleep(0.01)
+                        p.reap()
+                self.assertEqual(len(p.workers), 2)
+                self.assertEqual(get(port), 200)
+            finally:
+                p.stop()
+            self.assertEqual(p.workers, {})
@@ -1,8 +1,11 @@
 import asyncio
+import gzip
+import typing
 import unittest
 
 from slickpy.request import Request
-from slickpy.typing import Message
+from slickpy.typing import HTTPError, Message, RequestOptions
+from slickpy.urlencoded import QueryCache
 
 
 async def noop_receive() -> Message:
@@ -29,16 +32,49 @@ class RequestTestCase(unittest.TestCase):
         self.assertTrue("msg" in req.query_params)
         self.assertFalse("x" in req.query_params)
 
+    def test_query_params_empty(self) -> None:
+        req = Request({"query_string": b""}, noop_receive)
+        self.assertEqual(len(req.query_params), 0)
+
+    def test_query_params_cache(self) -> None:
+        Request.query_cache = cache = QueryCache()
+        try:
+            for _ in range(2):
+                req = Request({"query_string": b"page=2"}, noop_receive)
+                self.assertEqual(req.query_params.page, "2")
+        finally:
+            Request.query_cache = None
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
     def test_headers(self) -> None:
         req = Request({"headers": [(b"host", b"localhost")]}, noop_receive)
         self.assertEqual(req.headers, {b"host": b"localhost"})
         self.assertEqual(req.headers[b"host"], b"localhost")
 
+    def test_content_type(self) -> None:
+        req = Request(
+            {"headers": [(b"content-type", b"text/plain")]}, noop_receive
+        )
+        self.assertEqual(req.content_type, b"text/plain")
+        req = Request({"headers": []}, noop_receive)
+        self.assertEqual(req.content_type, b"")
+
+    def test_content_length(self) -> None:
+        req = Request({"headers": [(b"content-length", b"15")]}, noop_receive)
+        self.assertEqual(req.content_length, 15)
+        req = Request({"headers": []}, noop_receive)
+        self.assertIsNone(req.content_length)
+
     def test_cookies(self) -> None:
         req = Request(
             {"headers": [(b"cookie", b"ID=1234; PREF=abc")]}, noop_receive
         )
         self.assertEqual(req.cookies, {"PREF": "abc", "ID": "1234"})
+        req = Request(
+            {"headers": [(b"cookie", b"ID=1234"), (b"cookie", b"PREF=abc")]},
+            noop_receive,
+        )
+        self.assertEqual(req.cookies, {"PREF": "abc", "ID": "1234"})
         req = Request({"headers": []}, noop_receive)
         self.assertEqual(req.cookies, {})
 
@@ -46,7 +82,7 @@ class RequestTestCase(unittest.TestCase):
         async def receive() -> Message:
             return {"type": "http.request", "body": b"Hello, world!"}
 
-        req = Request({}, receive)
+        req = Request({"headers": []}, receive)
 
         async def read() -> bytes:
             return b"".join([chunk async for chunk in req.chunks()])
@@ -70,12 +106,119 @@ class RequestTestCase(unittest.TestCase):
             except StopIteration:
                 return {"type": "http.request"}
 
-        req = Request({}, receive)
+        req = Request({"headers": []}, receive)
         loop = asyncio.get_event_loop()
         body = loop.run_until_complete(req.body())
 
         self.assertEqual(body, b"Hello, world!")
 
+    def test_body_content_length(self) -> None:
+        it = [b"Hello", b", ", b"world", b"!"].__iter__()
+
+        async def receive() -> Message:
+            chunk = next(it, b"")
+            return {
+                "type": "http.request",
+                "body": chunk,
+                "more_body": bool(chunk),
+            }
+
+        req = Request({"headers": [(b"content-length", b"13")]}, receive)
+        loop = asyncio.get_event_loop()
+        body = loop.run_until_complete(req.body())
+
+        self.assertEqual(body, b"Hello, world!")
+        self.assertIsInstance(body, bytearray)
+
+    def test_body_content_length_single_chunk(self) -> None:
+        chunk = b"Hello, world!"
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": chunk}
+
+        req = Request({"headers": [(b"content-length", b"13")]}, receive)
+        loop = asyncio.get_event_loop()
+
+        self.assertIs(loop.run_until_complete(req.body()), chunk)
+
+    def test_body_content_length_mismatch(self) -> None:
+        async def receive() -> Message:
+            return {"type": "http.request", "body": b"Hello, world!"}
+
+        loop = asyncio.get_event_loop()
+        for length in [b"12", b"14"]:
+            req = Request({"headers": [(b"content-length", length)]}, receive)
+            with self.assertRaises(HTTPError) as cm:
+                loop.run_until_complete(req.body())
+            self.assertEqual(cm.exception.status_code, 400)
+
+    def test_invalid_content_length(self) -> None:
+        req = Request({"headers": [(b"content-length", b"-1")]}, noop_receive)
+        with self.assertRaises(HTTPError) as cm:
+            req.content_length
+        self.assertEqual(cm.exception.status_code, 400)
+
+    def test_body_too_large(self) -> None:
+        req = Request(
+            {
+                "headers": [(b"content-length", b"13")],
+                "route_options": RequestOptions(max_body_size=12),
+            },
+            noop_receive,
+        )
+        loop = asyncio.get_event_loop()
+        with self.assertRaises(HTTPError) as cm:
+            loop.run_until_complete(req.body())
+        self.assertEqual(cm.exception.status_code, 413)
+
+    def test_body_too_large_streaming(self) -> None:
+        async def receive() -> Message:
+            return {
+                "type": "http.request",
+                "body": b"Hello",
+                "more_body": True,
+            }
+
+        req = Request(
+            {
+                "headers": [],
+                "route_options": RequestOptions(max_body_size=12),
+            },
+            receive,
+        )
+        loop = asyncio.get_event_loop()
+        with self.assertRaises(HTTPError) as cm:
+            loop.run_until_complete(req.body())
+        self.assertEqual(cm.exception.status_code, 413)
+
+    def test_body_file(self) -> None:
+        loop = asyncio.get_event_loop()
+        for spool_size, rolled in [(100, False), (10, True)]:
+            it = [b"Hello", b", ", b"world", b"!"].__iter__()
+
+            async def receive() -> Message:
+                chunk = next(it, b"")
+                return {
+                    "type": "http.request",
+                    "body": chunk,
+                    "more_body": bool(chunk),
+                }
+
+            req = Request(
+                {
+                    "headers": [(b"content-type", b"text/plain")],
+                    "route_options": RequestOptions(spool_size=spool_size),
+                },
+                receive,
+            )
+            f = loop.run_until_complete(req.body_file())
+            self.assertEqual(f.content_type, "text/plain")
+            self.assertEqual(f._rolled, rolled)
+            self.assertEqual(
+                loop.run_until_complete(f.read()), b"Hello, world!"
+            )
+            loop.run_until_complete(f.close())
+
     def test_body_empty(self) -> None:
         async def receive() -> Message:
             return {
@@ -83,7 +226,7 @@ class RequestTestCase(unittest.TestCase):
                 "body": "",
             }
 
-        req = Request({}, receive)
+        req = Request({"headers": []}, receive)
         loop = asyncio.get_event_loop()
         body = loop.run_until_complete(req.body())
 
@@ -93,7 +236,7 @@ class RequestTestCase(unittest.TestCase):
         async def receive() -> Message:
             return {"type": "http.disconnect"}
 
-        req = Request({}, receive)
+        req = Request({"headers": []}, receive)
         loop = asyncio.get_event_loop()
         self.assertRaises(
             RuntimeError, lambda: loop.run_until_complete(req.body())
@@ -103,7 +246,7 @@ class RequestTestCase(unittest.TestCase):
         async def receive() -> Message:
             return {"type": "abc"}
 
-        req = Request({}, receive)
+        req = Request({"headers": []}, receive)
         loop = asyncio.get_event_loop()
         self.assertRaises(
             NotImplementedError, lambda: loop.run_until_complete(req.body())
@@ -156,6 +299,25 @@ class RequestTestCase(unittest.TestCase):
         files = loop.run_until_complete(req.files())
         self.assertEqual(len(files), 0)
 
+    def test_form_urlencoded_max_fields(self) -> None:
+        async def receive() -> Message:
+            return {"type": "http.request", "body": b"a=1&b=2"}
+
+        req = Request(
+            {
+                "headers": [
+                    (b"content-type", b"application/x-www-form-urlencoded")
+                ],
+                "route_options": RequestOptions(max_form_fields=1),
+            },
+            receive,
+        )
+
+        loop = asyncio.get_event_loop()
+        with self.assertRaises(HTTPError) as cm:
+            loop.run_until_complete(req.form())
+        self.assertEqual(cm.exception.status_code, 413)
+
     def test_form_multipart(self) -> None:
         async def receive() -> Message:
             return {
@@ -218,7 +380,7 @@ class RequestTestCase(unittest.TestCase):
             }
 
         req = Request(
-            {},
+            {"headers": []},
             receive,
         )
 
@@ -226,3 +388,110 @@ class RequestTestCase(unittest.TestCase):
         data = loop.run_until_complete(req.json())
 
         self.assertEqual(data, {"msg": "hello"})
+
+    def test_json_items(self) -> None:
+        it = [b'{"data": [{"id": 1}, ', b'{"id": 2}]}'].__iter__()
+
+        async def receive() -> Message:
+            chunk = next(it, b"")
+            return {
+                "type": "http.request",
+                "body": chunk,
+                "more_body": bool(chunk),
+            }
+
+        req = Request({"headers": []}, receive)
+
+        async def items() -> typing.List[typing.Any]:
+            return [item async for item in req.json_items("data")]
+
+        loop = asyncio.get_event_loop()
+        self.assertEqual(
+            loop.run_until_complete(items()), [{"id": 1}, {"id": 2}]
+        )
+        it = [b'{"data": [{"id": 1}, {"id"', b": 2}]}"].__iter__()
+        req = Request(
+            {
+                "headers": [],
+                "route_options": RequestOptions(max_json_item_size=4),
+            },
+            receive,
+        )
+        with self.assertRaises(HTTPError) as cm:
+            loop.run_until_complete(items())
+        self.assertEqual(cm.exception.status_code, 413)
+
+    def test_body_gzip(self) -> None:
+        data = gzip.compress(b'{"msg": "hello"}')
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": data}
+
+        req = Request(
+            {
+                "headers": [
+                    (b"content-encoding", b"gzip"),
+                    (b"content-length", str(len(data)).encode()),
+                ]
+            },
+            receive,
+        )
+
+        loop = asyncio.get_event_loop()
+        self.assertEqual(req.content_encoding, b"gzip")
+        self.assertEqual(
+            loop.run_until_complete(req.body()), b'{"msg": "hello"}'
+        )
+
+    def test_body_decompress_disabled(self) -> None:
+        data = gzip.compress(b"hello")
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": data}
+
+        req = Request(
+            {
+                "headers": [(b"content-encoding", b"gzip")],
+                "route_options": RequestOptions(decompress=False),
+            },
+            receive,
+        )
+
+        loop = asyncio.get_event_loop()
+        self.assertEqual(loop.run_until_complete(req.body()), data)
+
+    def test_parts(self) -> None:
+        it = [
+            b"--1\r\n",
+            b'Content-Disposition: form-data; name="a"\r\n\r\n',
+            b"hello\r\n--1--",
+        ].__iter__()
+
+        async def receive() -> Message:
+            chunk = next(it, b"")
+            return {
+                "type": "http.request",
+                "body": chunk,
+                "more_body": bool(chunk),
+            }
+
+        req = Request(
+            {
+                "headers": [
+                    (b"content-type", b"multipart/form-data; boundary=1")
+                ]
+            },
+            receive,
+        )
+
+        async def read() -> typing.List[typing.Tuple[str, bytes]]:
+            return [
+                (part.name, await part.read()) async for part in req.parts()
+            ]
+
+        loop = asyncio.get_event_loop()
+        self.assertEqual(loop.run_until_complete(read()), [("a", b"hello")])
+        req = Request({"headers": []}, receive)
+        with self.assertRaises(HTTPError) as cm:
+            req.parts()
+        self.assertEqual(cm.exception.status_code, 415)
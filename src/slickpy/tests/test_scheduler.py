@@ -0,0 +1,67 @@
+import asyncio
+import typing
+import unittest
+
+from slickpy.metrics import Metrics
+from slickpy.scheduler import Job, Scheduler
+
+
+class JobTestCase(unittest.TestCase):
+    def test_schedule(self) -> None:
+        calls: typing.List[int] = []
+
+        async def refresh() -> None:
+            calls.append(len(calls))
+            if len(calls) == 2:
+                raise ValueError()
+
+        metrics = Metrics()
+        job = Job(refresh, 0.01, jitter=0.001, metrics=metrics)
+        self.assertEqual(job.name, f"jobs.{refresh.__qualname__}")
+        scheduler = Scheduler()
+        scheduler.add(job)
+
+        async def run() -> None:
+            await scheduler.start()
+            await asyncio.sleep(0.035)
+            await scheduler.stop()
+
+        loop = asyncio.get_event_loop()
+        with self.assertLogs("slickpy.scheduler"):
+            loop.run_until_complete(run())
+        self.assertGreaterEqual(len(calls), 3)
+        self.assertEqual(metrics[job.name + ".failed"], 1)
+        self.assertEqual(metrics.timings[job.name].count, len(calls))
+        self.assertEqual(scheduler.tasks, [])
+
+    def test_overlap(self) -> None:
+        started: typing.List[int] = []
+        finished: typing.List[int] = []
+
+        async def slow() -> None:
+            started.append(1)
+            await asyncio.sleep(0.02)
+            finished.append(1)
+
+        async def run(job: Job) -> None:
+            task = asyncio.ensure_future(job.schedule())
+            await asyncio.sleep(0.035)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        loop = asyncio.get_event_loop()
+        job = Job(slow, 0.01)
+        loop.run_until_complete(run(job))
+        self.assertLessEqual(len(started), 2)
+        self.assertGreaterEqual(job.metrics[job.name + ".skipped"], 1)
+        started.clear()
+        finished.clear()
+        loop.run_until_complete(run(Job(slow, 0.01, overlap=True)))
+        self.assertGreaterEqual(len(started), 3)
+        self.assertLess(len(finished), len(started))
+
+    def test_invalid(self) -> None:
+        async def noop() -> None:
+            pass  # pragma: nocover
+
+        self.assertRaises(ValueError, Job, noop, 0)
@@ -0,0 +1,213 @@
+import dataclasses
+import sys
+import typing
+import unittest
+
+from slickpy.schema import ValidationError, compile_model, compile_value
+from slickpy.typing import QueryParams, RequestHeaders
+
+
+@dataclasses.dataclass
+class Address:
+    city: str
+    zip: typing.Optional[str] = None
+
+
+@dataclasses.dataclass
+class User:
+    name: str
+    age: int
+    score: float = 0.0
+    active: bool = True
+    tags: typing.List[str] = dataclasses.field(default_factory=list)
+    address: typing.Optional[Address] = None
+    addresses: typing.List[Address] = dataclasses.field(default_factory=list)
+    extra: typing.Any = None
+
+
+class Item(typing.TypedDict, total=False):
+    id: int
+    note: str
+
+
+class Order(typing.TypedDict):
+    id: int
+    items: typing.List[Item]
+
+
+@dataclasses.dataclass
+class Paging:
+    page: int = 1
+    size: typing.Optional[int] = None
+    desc: bool = False
+    q: str = ""
+    ids: typing.List[int] = dataclasses.field(default_factory=list)
+
+
+class CompileModelTestCase(unittest.TestCase):
+    def test_dataclass(self) -> None:
+        load = compile_model(User)
+        self.assertIs(compile_model(User), load)
+        self.assertEqual(
+            load({"name": "John", "age": 42}), User(name="John", age=42)
+        )
+        self.assertEqual(
+            load(
+                {
+                    "name": "John",
+                    "age": 42,
+                    "score": 1,
+                    "active": False,
+                    "tags": ["a", "b"],
+                    "address": {"city": "Kyiv"},
+                    "addresses": [{"city": "Lviv", "zip": "79000"}],
+                    "extra": [1],
+                    "unknown": 1,
+                }
+            ),
+            User(
+                name="John",
+                age=42,
+                score=1.0,
+                active=False,
+                tags=["a", "b"],
+                address=Address("Kyiv"),
+                addresses=[Address("Lviv", "79000")],
+                extra=[1],
+            ),
+        )
+
+    def test_dataclass_errors(self) -> None:
+        load = compile_model(User)
+        with self.assertRaises(ValidationError) as cm:
+            load(
+                {
+                    "age": True,
+                    "score": "1",
+                    "active": 1,
+                    "tags": ["a", 1],
+                    "address": {"zip": 1},
+                    "addresses": [{"city": "Lviv"}, 1],
+                }
+            )
+        self.assertEqual(cm.exception.status_code, 400)
+        self.assertEqual(
+            cm.exception.errors,
+            {
+                "name": "is required",
+                "age": "must be an integer",
+                "score": "must be a number",
+                "active": "must be a boolean",
+                "tags[1]": "must be a string",
+                "address.city": "is required",
+                "address.zip": "must be a string",
+                "addresses[1]": "must be an object",
+            },
+        )
+        self.assertEqual(cm.exception.detail, {"errors": cm.exception.errors})
+        data: typing.Any
+        for data in (None, [], "x"):
+            with self.assertRaises(ValidationError) as cm:
+                load(data)
+            self.assertEqual(cm.exception.errors, {"": "must be an object"})
+        with self.assertRaises(ValidationError) as cm:
+            load({"name": "x", "age": 1, "tags": "a"})
+        self.assertEqual(cm.exception.errors, {"tags": "must be an array"})
+
+    def test_typed_dict(self) -> None:
+        load = compile_model(Order)
+        self.assertEqual(
+            load({"id": 1, "items": [{"id": 2}, {"note": "x"}, {}]}),
+            {"id": 1, "items": [{"id": 2}, {"note": "x"}, {}]},
+        )
+        with self.assertRaises(ValidationError) as cm:
+            load({"items": [{"id": "2"}]})
+        self.assertEqual(
+            cm.exception.errors,
+            {"id": "is required", "items[0].id": "must be an integer"},
+        )
+
+    def test_query(self) -> None:
+        load = compile_model(Paging, query=True)
+        self.assertEqual(load(QueryParams([])), Paging())
+        self.assertEqual(
+            load(
+                QueryParams(
+                    [
+                        ("page", "2"),
+                        ("size", "10"),
+                        ("desc", "Yes"),
+                        ("q", "x"),
+                        ("ids", "1"),
+                        ("ids", "2"),
+                    ]
+                )
+            ),
+            Paging(page=2, size=10, desc=True, q="x", ids=[1, 2]),
+        )
+        with self.assertRaises(ValidationError) as cm:
+            load(
+                QueryParams([("page", "x"), ("desc", "maybe"), ("ids", "1.5")])
+            )
+        self.assertEqual(
+            cm.exception.errors,
+            {
+                "page": "must be an integer",
+                "desc": "must be a boolean",
+                "ids[0]": "must be an integer",
+            },
+        )
+
+    def test_unsupported(self) -> None:
+        @dataclasses.dataclass
+        class Set:
+            items: typing.Set[int]
+
+        @dataclasses.dataclass
+        class Nested:
+            address: Address
+
+        self.assertRaises(TypeError, compile_model, int)
+        self.assertRaises(TypeError, compile_model, Set)
+        self.assertRaises(TypeError, compile_model, Nested, True)
+
+
+class CompileValueTestCase(unittest.TestCase):
+    def test_value(self) -> None:
+        load = compile_value("id", int)
+        self.assertEqual(load({"id": "1"}), 1)
+        for data, error in (
+            ({}, "is required"),
+            ({"id": "x"}, "must be an integer"),
+        ):
+            with self.assertRaises(ValidationError) as cm:
+                load(data)
+            self.assertEqual(cm.exception.errors, {"id": error})
+        self.assertIsNone(compile_value("id", typing.Optional[int])({}))
+        self.assertEqual(compile_value("id", int, 5)({}), 5)
+
+    @unittest.skipIf(sys.version_info < (3, 10), "requires X | Y unions")
+    def test_union_type(self) -> None:
+        @dataclasses.dataclass
+        class Filter:
+            size: int | None = None
+
+        load = compile_model(Filter, query=True)
+        self.assertEqual(load(QueryParams([])), Filter())
+        self.assertEqual(load(QueryParams([("size", "5")])), Filter(size=5))
+        self.assertIsNone(compile_value("id", int | None)({}))
+        self.assertEqual(compile_value("id", None | int)({"id": "1"}), 1)
+
+    def test_list(self) -> None:
+        load = compile_value("ids", typing.List[int], [])
+        self.assertEqual(
+            load(QueryParams([("ids", "1"), ("ids", "2")])), [1, 2]
+        )
+        self.assertEqual(load(QueryParams([])), [])
+
+    def test_header(self) -> None:
+        headers = RequestHeaders([(b"x-ids", b"1"), (b"x-ids", b"2")])
+        load = compile_value("x_ids", str, key=b"x-ids")
+        self.assertEqual(load(headers), "1")
+        load = compile_value("x_ids", typing.List[int], key=b"x-ids")
+        self.assertEqual(load(headers), [1, 2])
@@ -0,0 +1,341 @@
+import asyncio
+import os
+import signal
+import socket
+import tempfile
+import threading
+import time
+import typing
+import unittest
+import urllib.request
+
+from slickpy import App, Request, Writer
+from slickpy.response import TextResponse
+from slickpy.server import ChunkedReader, Server, parse_head, run
+
+app = App()
+events: typing.List[str] = []
+
+
+@app.on("lifespan.startup")
+async def startup() -> None:
+    events.append("startup")
+
+
+@app.on("lifespan.shutdown")
+async def shutdown() -> None:
+    events.append("shutdown")
+
+
+@app.route("/")
+async def welcome() -> TextResponse:
+    return TextResponse("Hello, world!")
+
+
+@app.route("/echo", methods=("POST",))
+async def echo(req: Request) -> TextResponse:
+    return TextResponse((await req.body()).decode())
+
+
+@app.route("/stream")
+async def stream(w: Writer) -> None:
+    await w.write(b"Hello")
+    await w.end(b", world!")
+
+
+@app.route("/fail")
+async def fail() -> TextResponse:
+    raise ValueError()
+
+
+async def connect(
+    server: Server,
+) -> typing.Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    assert server.server is not None
+    return await asyncio.open_connection(
+        *server.server.sockets[0].getsockname()[:2]
+    )
+
+
+async def exchange(
+    server: Server, data: bytes, until: bytes = b"\r\n\r\n", count: int = 1
+) -> bytes:
+    assert server.server is not None
+    sock = server.server.sockets[0]
+    if server.uds:
+        reader, writer = await asyncio.open_unix_connection(server.uds)
+    else:
+        reader, writer = await asyncio.open_connection(*sock.getsockname()[:2])
+    writer.write(data)
+    res = b""
+    while res.count(until) < count:
+        chunk = await reader.read(65536)
+        if not chunk:
+            break
+        res += chunk
+    writer.close()
+    return res
+
+
+def serve(
+    test: typing.Callable[[Server], typing.Awaitable[None]],
+    **options: typing.Any,
+) -> None:
+    async def run() -> None:
+        server = Server(app.asgi(), port=0, **options)
+        await server.start()
+        try:
+            await test(server)
+        finally:
+            await server.stop()
+
+    asyncio.get_event_loop().run_until_complete(run())
+
+
+class ParseTestCase(unittest.TestCase):
+    def test_parse_head(self) -> None:
+        method, target, version, headers = parse_head(
+            b"GET /?a=1 HTTP/1.1\r\nHost: localhost\r\nX-Custom:  v "
+        )
+        self.assertEqual(method, "GET")
+        self.assertEqual(target, b"/?a=1")
+        self.assertEqual(version, b"HTTP/1.1")
+        self.assertEqual(
+            headers, [(b"host", b"localhost"), (b"x-custom", b"v")]
+        )
+
+    def test_parse_head_invalid(self) -> None:
+        for head in [
+            b"GET / HTTP/2.0",
+            b"GET /",
+            b"GET / HTTP/1.1\r\nHost",
+            b"GET / HTTP/1.1\r\nHost : localhost",
+        ]:
+            self.assertRaises(ValueError, parse_head, head)
+
+    def test_chunked(self) -> None:
+        r = ChunkedReader()
+        buf = bytearray(b"5\r\nHel")
+        self.assertEqual(r.feed(buf), (b"Hel", False))
+        buf += b"lo\r\n8;ext=1\r\n, world!\r\n0\r\nX-Trailer: 1\r\n"
+        self.assertEqual(r.feed(buf), (b"lo, world!", False))
+        buf += b"\r\nGET"
+        self.assertEqual(r.feed(buf), (b"", True))
+        self.assertEqual(buf, b"GET")
+
+    def test_chunked_invalid(self) -> None:
+        for data in [
+            b"x\r\n",
+            b"-1\r\n",
+            b"1\r\naX\r\n",
+            b"0x5\r\n",
+            b" 5\r\n",
+            b"+5\r\n",
+            b"1_0\r\n",
+        ]:
+            self.assertRaises(
+                ValueError, ChunkedReader().feed, bytearray(data)
+            )
+
+
+class ServerTestCase(unittest.TestCase):
+    def test_keep_alive_pipelining(self) -> None:
+        async def test(server: Server) -> None:
+            res = await exchange(
+                server,
+                b"GET / HTTP/1.1\r\nHost: x\r\n\r\n"
+                b"GET /missing HTTP/1.1\r\nHost: x\r\n\r\n"
+                b"GET / HTTP/1.1\r\nHost: x\r\n\r\n",
+                b"HTTP/1.1 ",
+                3,
+            )
+            self.assertEqual(res.count(b"HTTP/1.1 200 OK\r\n"), 2)
+            self.assertIn(b"HTTP/1.1 404 Not Found\r\n", res)
+            self.assertTrue(res.endswith(b"Hello, world!"))
+            self.assertEqual(len(server.connections), 1)
+
+        serve(test)
+        self.assertEqual(events[-2:], ["startup", "shutdown"])
+
+    def test_connection_close(self) -> None:
+        async def test(server: Server) -> None:
+            res = await exchange(
+                server,
+                b"GET / HTTP/1.0\r\n\r\nGET / HTTP/1.0\r\n\r\n",
+                b"\r\n\r\n",
+                3,
+            )
+            self.assertIn(b"connection: close\r\n", res)
+            self.assertEqual(res.count(b"HTTP/1.1 200 OK"), 1)
+
+        serve(test)
+
+    def test_body(self) -> None:
+        async def test(server: Server) -> None:
+            res = await exchange(
+                server,
+                b"POST /echo HTTP/1.1\r\ncontent-length: 5\r\n\r\nHello"
+                b"POST /echo HTTP/1.1\r\ntransfer-encoding: chunked\r\n\r\n"
+                b"2\r\nHi\r\n0\r\n\r\n",
+                b"content-type",
+                2,
+            )
+            self.assertIn(b"\r\n\r\nHelloHTTP/1.1 200 OK", res)
+            self.assertTrue(res.endswith(b"Hi") or b"\r\n\r\nHi" in res)
+
+        serve(test)
+
+    def test_expect_continue(self) -> None:
+        async def test(server: Server) -> None:
+            reader, writer = await connect(server)
+            writer.write(
+                b"POST /echo HTTP/1.1\r\nexpect: 100-continue\r\n"
+                b"content-length: 2\r\n\r\n"
+            )
+            res = await reader.readuntil(b"\r\n\r\n")
+            self.assertEqual(res, b"HTTP/1.1 100 Continue\r\n\r\n")
+            writer.write(b"Hi")
+            res = await reader.readuntil(b"Hi")
+            self.assertTrue(res.startswith(b"HTTP/1.1 200 OK\r\n"))
+            writer.close()
+
+        serve(test)
+
+    def test_stream(self) -> None:
+        async def test(server: Server) -> None:
+            res = await exchange(
+                server, b"GET /stream HTTP/1.1\r\n\r\n", b"0\r\n\r\n"
+            )
+            self.assertIn(b"transfer-encoding: chunked\r\n", res)
+            self.assertTrue(
+                res.endswith(b"5\r\nHello\r\n8\r\n, world!\r\n0\r\n\r\n")
+            )
+
+        serve(test)
+
+    def test_stream_http10(self) -> None:
+        async def test(server: Server) -> None:
+            res = await exchange(server, b"GET /stream HTTP/1.0\r\n\r\n", b"!")
+            self.assertNotIn(b"transfer-encoding", res)
+            self.assertIn(b"connection: close\r\n", res)
+            self.assertTrue(res.endswith(b"\r\n\r\nHello, world!"))
+
+        serve(test)
+
+    def test_head(self) -> None:
+        async def test(server: Server) -> None:
+            res = await exchange(server, b"HEAD / HTTP/1.1\r\n\r\n")
+            self.assertIn(b"content-length: 13\r\n", res)
+            self.assertTrue(res.endswith(b"\r\n\r\n"))
+
+        serve(test)
+
+    def test_errors(self) -> None:
+        async def test(server: Server) -> None:
+            with self.assertLogs("slickpy.server"):
+                res = await exchange(server, b"GET /fail HTTP/1.1\r\n\r\n")
+            self.assertTrue(
+                res.startswith(b"HTTP/1.1 500 Internal Server Error\r\n")
+            )
+            res = await exchange(server, b"GET / HTTP/1.1\r\nbad\r\n\r\n")
+            self.assertTrue(res.startswith(b"HTTP/1.1 400 Bad Request\r\n"))
+
+        serve(test)
+
+    def test_unix_socket(self) -> None:
+        async def test(server: Server) -> None:
+            res = await exchange(server, b"GET / HTTP/1.1\r\n\r\n", b"!")
+            self.assertTrue(res.startswith(b"HTTP/1.1 200 OK\r\n"))
+
+        with tempfile.TemporaryDirectory() as d:
+            serve(test, uds=os.path.join(d, "slickpy.sock"))
+
+    def test_head_timeout(self) -> None:
+        async def test(server: Server) -> None:
+            reader, writer = await connect(server)
+            writer.write(b"GET / HTTP/1.1\r\n")
+            res = await asyncio.wait_for(reader.read(), 2.0)
+            self.assertEqual(res, b"")
+            self.assertEqual(len(server.connections), 0)
+            writer.close()
+
+        serve(test, keepalive_timeout=0.1)
+
+    def test_bad_chunk(self) -> None:
+        async def test(server: Server) -> None:
+            reader, writer = await connect(server)
+            writer.write(
+                b"POST /echo HTTP/1.1\r\ntransfer-encoding: chunked\r\n"
+                b"\r\n5\r\nhelloXX\r\n"
+            )
+            res = await asyncio.wait_for(reader.read(), 2.0)
+            self.assertTrue(res.startswith(b"HTTP/1.1 400 Bad Request\r\n"))
+            writer.close()
+            await asyncio.sleep(0.01)
+            self.assertEqual(app.inflight.count, 0)
+
+        serve(test)
+
+    def test_framing_errors(self) -> None:
+        async def test(server: Server) -> None:
+            for head in [
+                b"content-length: 50\r\ncontent-length: 2",
+                b"content-length: 0\r\ntransfer-encoding: chunked",
+                b"transfer-encoding: chunked\r\ncontent-length: 2",
+            ]:
+                res = await asyncio.wait_for(
+                    exchange(
+                        server,
+                        b"POST /echo HTTP/1.1\r\n%b\r\n\r\n"
+                        b"hiGET / HTTP/1.1\r\n\r\n" % head,
+                        b"HTTP/1.1 ",
+                        2,
+                    ),
+                    2.0,
+                )
+                self.assertTrue(
+                    res.startswith(b"HTTP/1.1 400 Bad Request\r\n"), head
+                )
+                self.assertEqual(res.count(b"HTTP/1.1 "), 1)
+            res = await exchange(
+                server,
+                b"POST /echo HTTP/1.1\r\ncontent-length: 2\r\n"
+                b"content-length: 2\r\n\r\nhi",
+                b"hi",
+            )
+            self.assertTrue(res.startswith(b"HTTP/1.1 200 OK\r\n"))
+
+        serve(test)
+
+
+class RunTestCase(unittest.TestCase):
+    def test_run(self) -> None:
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        statuses = []
+
+        def client() -> None:
+            deadline = time.monotonic() + 5.0
+            url = f"http://127.0.0.1:{port}/"
+            while time.monotonic() < deadline:
+                try:
+                    with urllib.request.urlopen(url) as r:
+                        statuses.append(r.status)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+            if not done.is_set():
+                os.kill(os.getpid(), signal.SIGTERM)
+
+        loop = asyncio.get_event_loop()
+        done = threading.Event()
+        t = threading.Thread(target=client)
+        t.start()
+        try:
+            run(app.asgi(), port=port)
+        finally:
+            done.set()
+            t.join()
+            asyncio.set_event_loop(loop)
+        self.assertEqual(statuses, [200])
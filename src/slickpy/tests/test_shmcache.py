@@ -0,0 +1,112 @@
+import asyncio
+import os
+import signal
+import time
+import unittest
+
+from slickpy import App
+from slickpy.functional import ASGIClient
+from slickpy.response import TextResponse
+from slickpy.shmcache import ShmCache, key_hash, shared_cache
+
+
+class ShmCacheTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache = ShmCache(slots=64, slot_size=64)
+        self.addCleanup(self.cache.close)
+
+    def test_get_set_delete(self) -> None:
+        cache = self.cache
+        self.assertIsNone(cache.get(b"a"))
+        self.assertEqual(cache.get(b"a", b"-"), b"-")
+        self.assertTrue(cache.set(b"a", b"1"))
+        self.assertTrue(cache.set(b"b", b""))
+        self.assertEqual(cache.get(b"a"), b"1")
+        self.assertEqual(cache.get(b"b"), b"")
+        self.assertTrue(cache.set(b"a", b"22"))
+        self.assertEqual(cache.get(b"a"), b"22")
+        self.assertTrue(cache.delete(b"a"))
+        self.assertFalse(cache.delete(b"a"))
+        self.assertIsNone(cache.get(b"a"))
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+        cache.clear()
+        self.assertIsNone(cache.get(b"b"))
+
+    def test_too_large(self) -> None:
+        self.assertTrue(self.cache.set(b"k", b"x" * 31))
+        self.assertFalse(self.cache.set(b"k", b"x" * 32))
+        self.assertEqual(self.cache.get(b"k"), b"x" * 31)
+
+    def test_ttl(self) -> None:
+        cache = self.cache
+        cache.set(b"a", b"1", ttl=0.01)
+        self.assertEqual(cache.get(b"a"), b"1")
+        time.sleep(0.02)
+        self.assertIsNone(cache.get(b"a"))
+
+    def test_clock_eviction(self) -> None:
+        cache = ShmCache(slots=2, slot_size=64, ways=2)
+        self.addCleanup(cache.close)
+        cache.set(b"a", b"1")
+        cache.set(b"b", b"2")
+        cache.get(b"a")
+        cache.set(b"c", b"3")
+        self.assertEqual(cache.get(b"a"), b"1")
+        self.assertIsNone(cache.get(b"b"))
+        self.assertEqual(cache.get(b"c"), b"3")
+
+    def test_shared_across_processes(self) -> None:
+        cache = self.cache
+        cache.set(b"parent", b"1")
+        pid = os.fork()
+        if not pid:
+            ok = cache.get(b"parent") == b"1" and cache.set(b"child", b"2")
+            os._exit(0 if ok else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertEqual(cache.get(b"child"), b"2")
+
+    def test_lock_timeout(self) -> None:
+        cache = self.cache
+        cache.set(b"a", b"1")
+        pid = os.fork()
+        if not pid:
+            # a worker killed while holding the lock of a's stripe
+            cache.acquire(key_hash(b"a") % cache.buckets)
+            os.kill(os.getpid(), signal.SIGKILL)
+        os.waitpid(pid, 0)
+        self.assertFalse(cache.set(b"a", b"2"))
+        self.assertFalse(cache.delete(b"a"))
+        self.assertFalse(cache.clear())
+        self.assertEqual(cache.get(b"a"), b"1")
+        self.assertEqual(cache.lock_timeouts, 3)
+
+    def test_invalid(self) -> None:
+        self.assertRaises(ValueError, ShmCache, ways=256)
+        self.assertRaises(ValueError, ShmCache, slot_size=32)
+
+    def test_key_hash(self) -> None:
+        self.assertEqual(key_hash(b"a"), key_hash(b"a"))
+        self.assertNotEqual(key_hash(b"a"), key_hash(b"b"))
+
+
+class SharedCacheTestCase(unittest.TestCase):
+    def test_resource(self) -> None:
+        app = App()
+        hot = shared_cache(app, "hot", slots=16)
+
+        @app.route("/")
+        async def welcome(cache: ShmCache = hot.inject()) -> TextResponse:
+            value = cache.get(b"greeting")
+            if value is None:
+                value = b"Hello, world!"
+                cache.set(b"greeting", value)
+            return TextResponse(value.decode())
+
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(app.lifespan.notify("lifespan.startup"))
+        client = ASGIClient(app.asgi())
+        self.assertEqual(client.go("/").text, "Hello, world!")
+        self.assertEqual(client.go("/").text, "Hello, world!")
+        self.assertEqual((hot.value.hits, hot.value.misses), (1, 1))
+        loop.run_until_complete(app.lifespan.notify("lifespan.shutdown"))
@@ -0,0 +1,79 @@
+import asyncio
+import typing
+import unittest
+
+from slickpy.tasks import TaskQueue, defer
+
+
+class DeferTestCase(unittest.TestCase):
+    def test_defer(self) -> None:
+        async def task(x: int) -> None:
+            pass  # pragma: nocover
+
+        scope: typing.Dict[str, typing.Any] = {}
+        defer(scope, task, 1)
+        defer(scope, task, 2)
+        self.assertEqual(scope["deferred"], [(task, (1,)), (task, (2,))])
+
+
+class TaskQueueTestCase(unittest.TestCase):
+    def test_run_and_drain(self) -> None:
+        calls = []
+
+        async def task(x: int) -> None:
+            await asyncio.sleep(0)
+            if x < 0:
+                raise ValueError()
+            calls.append(x)
+
+        async def run() -> None:
+            tq.put([(task, (1,)), (task, (-1,)), (task, (2,))])
+            await tq.drain()
+
+        tq = TaskQueue(concurrency=2)
+        loop = asyncio.get_event_loop()
+        with self.assertLogs("slickpy.tasks"):
+            loop.run_until_complete(run())
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(tq.metrics["tasks_deferred"], 3)
+        self.assertEqual(tq.metrics["tasks_done"], 2)
+        self.assertEqual(tq.metrics["tasks_failed"], 1)
+        self.assertEqual(tq.workers, [])
+        loop.run_until_complete(tq.drain())
+
+    def test_full(self) -> None:
+        calls = []
+
+        async def task(x: int) -> None:
+            calls.append(x)
+
+        async def run(tq: TaskQueue) -> None:
+            tq.put([(task, (i,)) for i in range(4)])
+            self.assertEqual(len(tq), 2)
+            await tq.drain()
+
+        loop = asyncio.get_event_loop()
+        tq = TaskQueue(maxsize=2)
+        loop.run_until_complete(run(tq))
+        self.assertEqual(calls, [0, 1])
+        self.assertEqual(tq.metrics["tasks_dropped"], 2)
+        calls.clear()
+        tq = TaskQueue(maxsize=2, policy="drop_oldest")
+        loop.run_until_complete(run(tq))
+        self.assertEqual(calls, [2, 3])
+        self.assertRaises(ValueError, lambda: TaskQueue(policy="x"))
+
+    def test_drain_timeout(self) -> None:
+        async def task() -> None:
+            await asyncio.sleep(10)
+
+        async def run() -> None:
+            tq.put([(task, ()), (task, ())])
+            await asyncio.sleep(0)
+            with self.assertLogs("slickpy.tasks"):
+                await tq.drain()
+
+        tq = TaskQueue(concurrency=1, drain_timeout=0.01)
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(run())
+        self.assertEqual(tq.metrics["tasks_abandoned"], 2)
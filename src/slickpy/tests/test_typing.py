@@ -2,7 +2,14 @@ import asyncio
 import io
 import unittest
 
-from slickpy.typing import MultipartFile, MultipartFiles, Params
+from slickpy.typing import (
+    MultipartFile,
+    MultipartFiles,
+    Params,
+    RequestHeaders,
+    RequestOptions,
+    default_options,
+)
 
 
 class ParamsTestCase(unittest.TestCase):
@@ -82,6 +89,99 @@ class ParamsTestCase(unittest.TestCase):
         self.assertEqual(p.getlist("msg"), [])
         p = Params([("msg", "hello"), ("msg", "hi")])
         self.assertEqual(p.getlist("msg"), ["hello", "hi"])
+        p.getlist("msg").append("x")
+        self.assertEqual(p.getlist("msg"), ["hello", "hi"])
+        p = Params([("msg", "hi")])
+        self.assertEqual(p.getlist("msg"), ["hi"])
+
+    def test_compact(self) -> None:
+        p = Params([("a", "1"), ("b", "2"), ("a", "3"), ("a", "4")])
+        self.assertEqual(p._mapping, {"a": ["1", "3", "4"], "b": "2"})
+        self.assertEqual(
+            list(p.items()), [("a", "1"), ("a", "3"), ("a", "4"), ("b", "2")]
+        )
+        self.assertTrue(("b", "2") in p.items())
+        self.assertFalse(("b", "1") in p.items())
+
+    def test_list_values(self) -> None:
+        p = Params([("a", ["1"]), ("b", ["2"]), ("b", ["3"])])
+        self.assertEqual(p["a"], ["1"])
+        self.assertEqual(p.a, ["1"])
+        self.assertEqual(p.get("a"), ["1"])
+        self.assertEqual(p.getlist("a"), [["1"]])
+        self.assertEqual(p["b"], ["3"])
+        self.assertEqual(list(p.values()), [["1"], ["2"], ["3"]])
+        self.assertTrue(("a", ["1"]) in p.items())
+
+
+class RequestOptionsTestCase(unittest.TestCase):
+    def test_replace(self) -> None:
+        options = default_options.replace(max_body_size=100)
+        self.assertEqual(options.max_body_size, 100)
+        self.assertEqual(options.spool_size, default_options.spool_size)
+        self.assertIsNone(default_options.max_body_size)
+
+    def test_replace_unknown(self) -> None:
+        self.assertRaises(TypeError, lambda: RequestOptions().replace(x=1))
+
+
+class RequestHeadersTestCase(unittest.TestCase):
+    raw = [
+        (b"host", b"localhost"),
+        (b"cookie", b"a=1"),
+        (b"content-type", b"text/plain"),
+        (b"cookie", b"b=2"),
+    ]
+
+    def test_get(self) -> None:
+        h = RequestHeaders(self.raw)
+        self.assertEqual(h.get(b"host"), b"localhost")
+        self.assertEqual(h.get(b"Host"), b"localhost")
+        self.assertEqual(h.get(b"cookie"), b"a=1")
+        self.assertEqual(h.get(b"x"), None)
+        self.assertEqual(h.get(b"x", b"default"), b"default")
+        self.assertIsNone(h._index)
+
+    def test_get_hot(self) -> None:
+        h = RequestHeaders(self.raw)
+        self.assertEqual(h.get(b"Content-Type"), b"text/plain")
+        self.assertEqual(h.get(b"content-type"), b"text/plain")
+        self.assertIsNone(h.get(b"content-length"))
+        self.assertEqual(h.get(b"content-length", b"0"), b"0")
+        self.assertEqual(
+            h._hot,
+            {b"content-type": b"text/plain", b"content-length": None},
+        )
+
+    def test_getitem(self) -> None:
+        h = RequestHeaders(self.raw)
+        self.assertEqual(h[b"HOST"], b"localhost")
+        self.assertRaises(KeyError, lambda: h[b"x"])
+        self.assertTrue(b"host" in h)
+        self.assertFalse(b"x" in h)
+
+    def test_getlist(self) -> None:
+        h = RequestHeaders(self.raw)
+        self.assertEqual(h.getlist(b"Cookie"), [b"a=1", b"b=2"])
+        self.assertEqual(h.getlist(b"x"), [])
+        self.assertEqual(len(h), 3)
+        self.assertEqual(h.getlist(b"cookie"), [b"a=1", b"b=2"])
+        self.assertEqual(h.getlist(b"x"), [])
+
+    def test_iter(self) -> None:
+        h = RequestHeaders(self.raw)
+        self.assertEqual(list(h), [b"host", b"cookie", b"content-type"])
+        self.assertEqual(len(h), 3)
+        self.assertEqual(h.get(b"cookie"), b"a=1")
+        self.assertEqual(h.get(b"x"), None)
+        self.assertEqual(
+            h,
+            {
+                b"host": b"localhost",
+                b"cookie": b"a=1",
+                b"content-type": b"text/plain",
+            },
+        )
 
 
 class MultipartFileTestCase(unittest.TestCase):
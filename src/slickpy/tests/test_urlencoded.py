@@ -0,0 +1,94 @@
+import asyncio
+import typing
+import unittest
+from urllib.parse import parse_qsl
+
+from slickpy.typing import HTTPError
+from slickpy.urlencoded import (
+    FormParser,
+    QueryCache,
+    parse_query,
+    parse_urlencoded,
+)
+
+query_test_cases = (
+    b"",
+    b"msg=hello",
+    b"msg=hello&msg=hi",
+    b"a&b=1&c=&=x&&d=%20+",
+    b"q=a+b&q=a%2Bb",
+    b"msg=%D0%BF%D1%80%D0%B8%D0%B2%D1%96%D1%82",
+    b"%D0%BC=1",
+    b"bad=%zz%D0",
+    b"eq=a=b",
+)
+
+
+class ParseQueryTestCase(unittest.TestCase):
+    def test_same_as_parse_qsl(self) -> None:
+        for qs in query_test_cases:
+            self.assertEqual(
+                parse_query(qs), parse_qsl(qs.decode("latin-1")), qs
+            )
+
+
+class QueryCacheTestCase(unittest.TestCase):
+    def test_get(self) -> None:
+        cache = QueryCache()
+        p = cache.get(b"msg=hello")
+        self.assertEqual(p["msg"], "hello")
+        self.assertIs(cache.get(b"msg=hello"), p)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(len(cache), 1)
+
+    def test_bounded(self) -> None:
+        cache = QueryCache(2)
+        a = cache.get(b"a=1")
+        cache.get(b"b=1")
+        self.assertIs(cache.get(b"a=1"), a)
+        cache.get(b"c=1")
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.get(b"a=1"), a)
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+        cache.get(b"b=1")
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+    def test_clear(self) -> None:
+        cache = QueryCache()
+        cache.get(b"a=1")
+        cache.clear()
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 0))
+
+
+class FormParserTestCase(unittest.TestCase):
+    def test_same_as_parse_qsl(self) -> None:
+        for qs in query_test_cases + ("ключ=значення&a=%2B".encode(),):
+            expected = parse_qsl(qs.decode("utf-8", "replace"))
+            for size in [1, 2, 5, len(qs) or 1]:
+                parser = FormParser()
+                for i in range(0, len(qs), size):
+                    parser.feed(qs[i:][:size])
+                self.assertEqual(parser.close(), expected, (qs, size))
+
+    def test_max_fields(self) -> None:
+        parser = FormParser(max_fields=2)
+        parser.feed(b"a=1&b=&c=2&")
+        self.assertRaises(HTTPError, parser.feed, b"d=3&")
+
+    def test_max_field_size(self) -> None:
+        parser = FormParser(max_field_size=5)
+        parser.feed(b"a=123&b=12")
+        self.assertRaises(HTTPError, parser.feed, b"34")
+        parser = FormParser(max_field_size=5)
+        self.assertRaises(HTTPError, parser.feed, b"a=1234&")
+
+    def test_parse_urlencoded(self) -> None:
+        async def chunks() -> typing.AsyncIterator[bytes]:
+            yield b"msg=hel"
+            yield b"lo&msg=hi"
+
+        loop = asyncio.get_event_loop()
+        self.assertEqual(
+            loop.run_until_complete(parse_urlencoded(chunks())),
+            [("msg", "hello"), ("msg", "hi")],
+        )
@@ -1,5 +1,7 @@
+import os
 import types
 import typing
+from concurrent.futures import Executor, ThreadPoolExecutor
 
 from slickpy.comp import get_running_loop
 
@@ -38,10 +40,93 @@ ASGIAdapter = typing.Callable[
 # abstractions
 
 
+class HTTPError(Exception):
+    """Aborts request handling with an HTTP error status code."""
+
+    def __init__(self, status_code: int, detail: typing.Any = None) -> None:
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+TRO = typing.TypeVar("TRO", bound="RequestOptions")
+
+
+class RequestOptions(object):
+    """Per application or route options that limit request handling."""
+
+    __slots__ = (
+        "max_body_size",
+        "spool_size",
+        "max_form_fields",
+        "max_form_field_size",
+        "decompress",
+        "max_compression_ratio",
+        "on_disconnect",
+        "spool_dir",
+        "spool_memfd",
+        "upload_stages",
+        "max_parts",
+        "max_file_size",
+        "allowed_file_types",
+        "max_json_item_size",
+    )
+
+    def __init__(
+        self,
+        *,
+        max_body_size: typing.Optional[int] = None,
+        spool_size: int = 1024 * 1024,
+        max_form_fields: typing.Optional[int] = None,
+        max_form_field_size: typing.Optional[int] = None,
+        decompress: bool = True,
+        max_compression_ratio: typing.Optional[int] = 100,
+        on_disconnect: typing.Optional[str] = None,
+        spool_dir: typing.Optional[str] = None,
+        spool_memfd: bool = False,
+        upload_stages: typing.Sequence[typing.Callable[[], typing.Any]] = (),
+        max_parts: typing.Optional[int] = None,
+        max_file_size: typing.Optional[int] = None,
+        allowed_file_types: typing.Optional[typing.Collection[str]] = None,
+        max_json_item_size: typing.Optional[int] = 1024 * 1024,
+    ) -> None:
+        self.max_body_size = max_body_size
+        self.spool_size = spool_size
+        self.max_form_fields = max_form_fields
+        self.max_form_field_size = max_form_field_size
+        self.decompress = decompress
+        self.max_compression_ratio = max_compression_ratio
+        self.on_disconnect = on_disconnect
+        self.spool_dir = spool_dir
+        self.spool_memfd = spool_memfd
+        self.upload_stages = upload_stages
+        self.max_parts = max_parts
+        self.max_file_size = max_file_size
+        self.allowed_file_types = allowed_file_types
+        self.max_json_item_size = max_json_item_size
+
+    def replace(self: TRO, **changes: typing.Any) -> TRO:
+        options = self.__class__.__new__(self.__class__)
+        for name in self.__slots__:
+            setattr(options, name, changes.pop(name, getattr(self, name)))
+        if changes:
+            raise TypeError(f"unknown options {', '.join(sorted(changes))}")
+        return options
+
+
+default_options = RequestOptions()
+
+
+class MultiValue(typing.List[T]):
+    """Marks a key of Params that is repeated."""
+
+    __slots__ = ()
+
+
 class ItemsView(typing.ItemsView[str, T]):
     __slots__ = ("_mapping",)
 
-    def __init__(self, mapping: typing.Mapping[str, typing.List[T]]) -> None:
+    def __init__(self, mapping: typing.Mapping[str, typing.Any]) -> None:
         self._mapping = mapping
 
     def __contains__(  # type: ignore[override]
@@ -50,57 +135,81 @@ class ItemsView(typing.ItemsView[str, T]):
         key, value = item
         mapping = self._mapping
         if key in mapping:
-            for v in mapping[key]:
-                if v is value or v == value:
-                    return True
+            v = mapping[key]
+            if type(v) is MultiValue:
+                for v in v:
+                    if v is value or v == value:
+                        return True
+            elif v is value or v == value:
+                return True
         return False
 
     def __iter__(self) -> typing.Iterator[typing.Tuple[str, T]]:
-        mapping = self._mapping
-        for key in mapping:
-            for value in mapping[key]:
+        for key, value in self._mapping.items():
+            if type(value) is MultiValue:
+                for v in value:
+                    yield key, v
+            else:
                 yield key, value
 
 
 class ValuesView(typing.ValuesView[T]):
     __slots__ = ("_mapping",)
 
-    def __init__(self, mapping: typing.Mapping[str, typing.List[T]]) -> None:
+    def __init__(self, mapping: typing.Mapping[str, typing.Any]) -> None:
         self._mapping = mapping
 
     def __contains__(self, value: T) -> bool:  # type: ignore[override]
-        mapping = self._mapping
-        for key in mapping:
-            for v in mapping[key]:
-                if v is value or v == value:
-                    return True
+        for v in self:
+            if v is value or v == value:
+                return True
         return False
 
     def __iter__(self) -> typing.Iterator[T]:
-        mapping = self._mapping
-        for key in mapping:
-            for value in mapping[key]:
+        for value in self._mapping.values():
+            if type(value) is MultiValue:
+                yield from value
+            else:
                 yield value
 
 
 class Params(typing.Mapping[str, T]):
+    """Multi-value mapping, the last value wins for a repeated key.
+
+    A key that appears once maps to its value directly, only repeated
+    keys are promoted to a list.
+    """
+
     __slots__ = ("_mapping",)
 
     def __init__(self, pairs: typing.List[typing.Tuple[str, T]]) -> None:
-        mapping: typing.MutableMapping[str, typing.List[T]] = {}
-        for key, value in pairs:
-            if key in mapping:
-                mapping[key].append(value)
-            else:
-                mapping[key] = [value]
+        mapping: typing.Dict[str, typing.Any] = dict(pairs)
+        if len(mapping) != len(pairs):
+            mapping = {}
+            for key, value in pairs:
+                if key in mapping:
+                    v = mapping[key]
+                    if type(v) is MultiValue:
+                        v.append(value)
+                    else:
+                        mapping[key] = MultiValue((v, value))
+                else:
+                    mapping[key] = value
         self._mapping = mapping
 
     def __getitem__(self, key: str) -> T:
-        return self._mapping[key][-1]
+        value = self._mapping[key]
+        if type(value) is MultiValue:
+            return value[-1]  # type: ignore[no-any-return]
+        return value  # type: ignore[no-any-return]
 
     def __getattr__(self, key: str) -> T:
-        if key in self._mapping:
-            return self._mapping[key][-1]
+        mapping = self._mapping
+        if key in mapping:
+            value = mapping[key]
+            if type(value) is MultiValue:
+                return value[-1]  # type: ignore[no-any-return]
+            return value  # type: ignore[no-any-return]
         raise AttributeError(key)
 
     def __len__(self) -> int:
@@ -121,13 +230,18 @@ class Params(typing.Mapping[str, T]):
     def get(  # type: ignore[override]
         self, key: str, default: typing.Optional[T] = None
     ) -> typing.Optional[T]:
-        if key in self._mapping:
-            return self._mapping[key][-1]
-        return default
+        value = self._mapping.get(key, default)
+        if type(value) is MultiValue:
+            return value[-1]  # type: ignore[no-any-return]
+        return value
 
     def getlist(self, key: str) -> typing.List[T]:
-        if key in self._mapping:
-            return self._mapping[key]
+        mapping = self._mapping
+        if key in mapping:
+            value = mapping[key]
+            if type(value) is MultiValue:
+                return list(value)
+            return [value]
         return []
 
 
@@ -135,21 +249,119 @@ class Params(typing.Mapping[str, T]):
 QueryParams = Params[str]
 FormParams = Params[str]
 
+HOT_HEADERS = frozenset(
+    (b"content-type", b"content-length", b"cookie", b"accept-encoding")
+)
+
+
+class RequestHeaders(typing.Mapping[bytes, bytes]):
+    """Case-insensitive, lazy view over raw ASGI request headers.
+
+    The first occurrence wins for repeated headers, see ``getlist``.
+    """
+
+    __slots__ = ("_raw", "_hot", "_index")
+
+    def __init__(
+        self, raw: typing.Iterable[typing.Tuple[bytes, bytes]]
+    ) -> None:
+        self._raw = raw
+        self._hot: typing.Optional[
+            typing.Dict[bytes, typing.Optional[bytes]]
+        ] = None
+        self._index: typing.Optional[
+            typing.Dict[bytes, typing.List[bytes]]
+        ] = None
+
+    def __getitem__(self, key: bytes) -> bytes:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._build_index())
+
+    def __iter__(self) -> typing.Iterator[bytes]:
+        return self._build_index().__iter__()
+
+    def __contains__(self, key: typing.Any) -> bool:
+        return self.get(key) is not None
+
+    def get(  # type: ignore[override]
+        self, key: bytes, default: typing.Optional[bytes] = None
+    ) -> typing.Optional[bytes]:
+        key = key.lower()
+        index = self._index
+        if index is not None:
+            values = index.get(key)
+            return values[0] if values else default
+        hot = self._hot
+        if key in HOT_HEADERS:
+            if hot is None:
+                self._hot = hot = {}
+            elif key in hot:
+                value = hot[key]
+                return default if value is None else value
+            value = None
+            for name, v in self._raw:
+                if name == key:
+                    value = v
+                    break
+            hot[key] = value
+            return default if value is None else value
+        for name, v in self._raw:
+            if name == key:
+                return v
+        return default
+
+    def getlist(self, key: bytes) -> typing.List[bytes]:
+        key = key.lower()
+        index = self._index
+        if index is not None:
+            return list(index.get(key, ()))
+        return [v for name, v in self._raw if name == key]
+
+    def _build_index(self) -> typing.Dict[bytes, typing.List[bytes]]:
+        index = self._index
+        if index is None:
+            index = {}
+            for name, value in self._raw:
+                name = name.lower()
+                if name in index:
+                    index[name].append(value)
+                else:
+                    index[name] = [value]
+            self._index = index
+        return index
+
+
 # multipart
 
 TMF = typing.TypeVar("TMF", bound="MultipartFile")
 
 
 class MultipartFile(object):
+    # uploads that rolled over to disk use own bounded pool of threads,
+    # so large uploads do not starve the default executor
+    executor: typing.ClassVar[Executor] = ThreadPoolExecutor(
+        max_workers=4, thread_name_prefix="slickpy-upload"
+    )
+    chunk_size = 256 * 1024
+
     def __init__(
         self,
         name: str,
         content_type: str,
         rolled: bool,
         file: typing.IO[bytes],
+        size: int = 0,
+        info: typing.Optional[typing.Mapping[str, typing.Any]] = None,
     ) -> None:
         self.name = name
         self.content_type = content_type
+        self.size = size
+        self.info = info or {}
         self._rolled = rolled
         self._file = file
 
@@ -169,17 +381,89 @@ class MultipartFile(object):
     async def read(self, size: int = -1) -> bytes:
         if self._rolled:
             return await get_running_loop().run_in_executor(
-                None, self._file.read, size
+                self.executor, self._file.read, size
             )
         return self._file.read(size)
 
+    async def chunks(self) -> typing.AsyncIterator[memoryview]:
+        """Yields the rest of file, chunks share one buffer.
+
+        A chunk is valid until the next one is requested, copy it with
+        ``bytes(chunk)`` to keep.
+        """
+        buf = bytearray(self.chunk_size)
+        view = memoryview(buf)
+        readinto = underlying_file(self._file).readinto
+        loop = get_running_loop()
+        while True:
+            if self._rolled:
+                n = await loop.run_in_executor(self.executor, readinto, buf)
+            else:
+                n = readinto(buf)
+            if not n:
+                break
+            yield view[:n]
+
+    def __aiter__(self) -> typing.AsyncIterator[memoryview]:
+        return self.chunks()
+
+    async def save(self, path: str) -> None:
+        """Writes the whole file to path in a single executor job."""
+        await get_running_loop().run_in_executor(
+            self.executor, save_file, self._file, path
+        )
+
     async def close(self) -> None:
         if self._rolled:
-            await get_running_loop().run_in_executor(None, self._file.close)
+            await get_running_loop().run_in_executor(
+                self.executor, self._file.close
+            )
         else:
             self._file.close()
 
 
+def underlying_file(file: typing.IO[bytes]) -> typing.Any:
+    """Returns in-memory or disk file behind SpooledTemporaryFile."""
+    return getattr(file, "_file", file)
+
+
+def save_file(file: typing.IO[bytes], path: str) -> None:
+    f = underlying_file(file)
+    with open(path, "wb") as dst:
+        if hasattr(f, "getbuffer"):
+            with f.getbuffer() as view:
+                dst.write(view)
+            return
+        f.flush()
+        copy_fd(f.fileno(), dst.fileno())
+
+
+def copy_fd(src: int, dst: int) -> None:
+    """Copies file in kernel space where possible, e.g. with reflink."""
+    size = os.fstat(src).st_size
+    offset = 0
+    copy_file_range = getattr(os, "copy_file_range", None)
+    try:
+        while offset < size:
+            if copy_file_range is not None:
+                n = copy_file_range(src, dst, size - offset, offset, offset)
+            else:  # pragma: nocover
+                os.lseek(dst, offset, os.SEEK_SET)
+                n = os.sendfile(dst, src, offset, size - offset)
+            if not n:
+                break
+            offset += n
+    except OSError:
+        # e.g. not supported across file systems or by the platform
+        pass
+    while offset < size:
+        chunk = os.pread(src, min(size - offset, 1024 * 1024), offset)
+        if not chunk:  # pragma: nocover
+            break
+        os.pwrite(dst, chunk, offset)
+        offset += len(chunk)
+
+
 TMFS = typing.TypeVar("TMFS", bound="MultipartFiles")
 
 
@@ -0,0 +1,136 @@
+import typing
+from collections import OrderedDict
+from urllib.parse import unquote
+
+from slickpy.typing import HTTPError, QueryParams
+
+Pairs = typing.List[typing.Tuple[str, str]]
+
+
+def decode(value: str) -> str:
+    if "+" in value:
+        value = value.replace("+", " ")
+    return unquote(value) if "%" in value else value
+
+
+def parse_query(qs: bytes) -> Pairs:
+    """Parses urlencoded bytes, pairs with blank values are ignored."""
+    pairs: Pairs = []
+    append = pairs.append
+    escaped = b"%" in qs or b"+" in qs
+    for field in qs.decode("latin-1").split("&"):
+        name, _, value = field.partition("=")
+        if value:
+            if escaped and ("%" in field or "+" in field):
+                name = decode(name)
+                value = decode(value)
+            append((name, value))
+    return pairs
+
+
+class QueryCache(object):
+    """A bounded LRU cache of parsed query strings."""
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: typing.OrderedDict[bytes, QueryParams] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, qs: bytes) -> QueryParams:
+        cache = self._cache
+        params = cache.get(qs)
+        if params is not None:
+            self.hits += 1
+            cache.move_to_end(qs)
+            return params
+        self.misses += 1
+        params = QueryParams(parse_query(qs))
+        if len(cache) >= self.maxsize:
+            cache.popitem(last=False)
+        cache[qs] = params
+        return params
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self.hits = self.misses = 0
+
+
+class FormParser(object):
+    """Incrementally parses application/x-www-form-urlencoded body.
+
+    Only a field split across chunks is buffered, so memory use is
+    bounded by the largest field. Limits raise HTTPError(413).
+    """
+
+    def __init__(
+        self,
+        max_fields: typing.Optional[int] = None,
+        max_field_size: typing.Optional[int] = None,
+    ) -> None:
+        self.max_fields = max_fields
+        self.max_field_size = max_field_size
+        self.pairs: Pairs = []
+        self.pending = bytearray()
+
+    def feed(self, chunk: bytes) -> None:
+        pending = self.pending
+        if b"&" not in chunk:
+            # the field continues in the next chunk
+            pending += chunk
+        else:
+            fields = chunk.split(b"&")
+            if pending:
+                pending += fields[0]
+                fields[0] = bytes(pending)
+                pending.clear()
+            pending += fields.pop()
+            add = self.add
+            for field in fields:
+                add(field)
+        if self.max_field_size is not None:
+            if len(pending) > self.max_field_size:
+                raise HTTPError(413)
+
+    def close(self) -> Pairs:
+        self.add(bytes(self.pending))
+        self.pending.clear()
+        return self.pairs
+
+    def add(self, field: bytes) -> None:
+        if self.max_field_size is not None:
+            if len(field) > self.max_field_size:
+                raise HTTPError(413)
+        name, _, value = field.partition(b"=")
+        if not value:
+            return
+        pairs = self.pairs
+        if self.max_fields is not None and len(pairs) >= self.max_fields:
+            raise HTTPError(413)
+        if b"%" in field or b"+" in field:
+            pairs.append((decode_utf8(name), decode_utf8(value)))
+        else:
+            pairs.append(
+                (
+                    name.decode("utf-8", "replace"),
+                    value.decode("utf-8", "replace"),
+                )
+            )
+
+
+def decode_utf8(value: bytes) -> str:
+    return unquote(value.replace(b"+", b" ").decode("utf-8", "replace"))
+
+
+async def parse_urlencoded(
+    chunks: typing.AsyncIterator[bytes],
+    max_fields: typing.Optional[int] = None,
+    max_field_size: typing.Optional[int] = None,
+) -> Pairs:
+    parser = FormParser(max_fields, max_field_size)
+    async for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
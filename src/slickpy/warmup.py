@@ -0,0 +1,63 @@
+import logging
+import time
+import typing
+
+from slickpy.functional import ASGIClient
+from slickpy.metrics import Metrics
+from slickpy.typing import ASGICallable, Headers
+
+
+class WarmupRequest(object):
+    __slots__ = ("method", "path", "headers", "body", "times")
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        headers: typing.Optional[Headers] = None,
+        body: typing.Optional[bytes] = None,
+        times: int = 1,
+    ) -> None:
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+        self.times = times
+
+
+class Warmup(object):
+    """Replays synthetic requests through the app in-process.
+
+    Failures are logged, they do not fail the startup.
+    """
+
+    def __init__(self, metrics: typing.Optional[Metrics] = None) -> None:
+        self.logger = logging.getLogger("slickpy.warmup")
+        self.metrics = Metrics() if metrics is None else metrics
+        self.requests: typing.List[WarmupRequest] = []
+
+    def add(self, request: WarmupRequest) -> None:
+        self.requests.append(request)
+
+    async def run(self, app: ASGICallable) -> None:
+        client = ASGIClient(app)
+        report = []
+        for r in self.requests:
+            name = f"warmup.{r.method} {r.path}"
+            started = time.perf_counter()
+            for _ in range(r.times):
+                try:
+                    res = await client.fetch(
+                        r.path, method=r.method, headers=r.headers, body=r.body
+                    )
+                except Exception:
+                    self.logger.exception("%s failed", name)
+                    break
+                if res.status_code >= 500:
+                    self.logger.warning(
+                        "%s responded %d", name, res.status_code
+                    )
+            elapsed = time.perf_counter() - started
+            self.metrics.observe(name, elapsed)
+            report.append(f"{r.method} {r.path} {elapsed:.3f}s")
+        self.logger.info("warm-up took %s", ", ".join(report))